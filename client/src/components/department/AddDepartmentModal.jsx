@@ -10,7 +10,6 @@ const AddDepartmentModal = ({ isOpen, onClose, onSuccess }) => {
   });
 
   const [errors, setErrors] = useState({});
-  const [departments, setDepartments] = useState([]);
   const [employees, setEmployees] = useState([]);
   const [locations, setLocations] = useState([]);
   const [loading, setLoading] = useState(false);
@@ -18,9 +17,8 @@ const AddDepartmentModal = ({ isOpen, onClose, onSuccess }) => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [empResponse, deptResponse, locResponse] = await Promise.all([
+        const [empResponse, locResponse] = await Promise.all([
           employeeService.getAll(),
-          departmentService.getAll(),
           hrLocation.getAll(),
         ]);
 
@@ -30,12 +28,6 @@ const AddDepartmentModal = ({ isOpen, onClose, onSuccess }) => {
           setEmployees([]);
         }
 
-        if (deptResponse.data.success) {
-          setDepartments(deptResponse.data.departments || []);
-        } else {
-          setDepartments([]);
-        }
-
         if (locResponse.data.success) {
           setLocations(locResponse.data.locations || []);
         } else {
@@ -78,14 +70,8 @@ const AddDepartmentModal = ({ isOpen, onClose, onSuccess }) => {
     setLoading(true);
 
     try {
-        const maxDepartmentId = departments.reduce((max, dept) => {
-          return dept.department_id > max ? dept.department_id : max;
-        }, 0);
-        const newDepartmentId = maxDepartmentId + 10;
-
       const departmentData = {
         department_name: formData.department_title,
-        department_id: newDepartmentId,
         manager_id: formData.manager_id ? parseInt(formData.manager_id, 10) : null,
         location_id: formData.location_id ? parseInt(formData.location_id, 10) : null,
       };
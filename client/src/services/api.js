@@ -49,7 +49,7 @@ export const authService = {
 };
 
 export const employeeService = {
-  getAll: () => api.get('/employees'),
+  getAll: (params) => api.get('/employees', { params }),
   getById: (id) => api.get(`/employees/${id}`),
   create: (employee) => api.post('/employees', employee),
   update: (id, employee) => api.put(`/employees/${id}`, employee),
@@ -57,7 +57,7 @@ export const employeeService = {
 };
 
 export const departmentService = {
-  getAll: () => api.get('/departments'),
+  getAll: (params) => api.get('/departments', { params }),
   getById: (id) => api.get(`/departments/${id}`),
   create: (department) => api.post('/departments', department),
   update: (id, department) => api.put(`/departments/${id}`, department),
@@ -73,12 +73,12 @@ export const jobService = {
 };
 
 export const jobHistoryService = {
-  getAll: () => api.get('/job-history'),
+  getAll: (params) => api.get('/job-history', { params }),
   getByEmployeeId: (employeeId) => api.get(`/job-history/employee/${employeeId}`),
 };
 
 export const hrLocation = {
-  getAll: () => api.get('/locations'),
+  getAll: (params) => api.get('/locations', { params }),
   getById: (id) => api.get(`/locations/${id}`),
   create: (location) => api.post('/locations', location),
   update: (id, location) => api.put(`/locations/${id}`, location),
@@ -1,14 +1,15 @@
 from flask import Flask
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-from .config import config
+from .config import config, DB_REPLICA_URI, EDGE_REPLICA_PATH
+from .utils.replicas import RoutingSession
 import oracledb
 
 # Configure oracledb to use thin mode (in oracledb 3.0+, thin mode is the default)
 # oracledb.init_mode = oracledb.THIN_MODE  # Not needed in 3.0+
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 def create_app(config_name='development'):
     """
@@ -23,6 +24,35 @@ def create_app(config_name='development'):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
     
+    # Share the direct helpers' session pool with the SQLAlchemy engine
+    from .utils.db_utils import get_engine_options
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', get_engine_options())
+    
+    # Optional read replica, used by the reads of GET requests
+    if DB_REPLICA_URI:
+        app.config.setdefault('SQLALCHEMY_BINDS', {
+            'replica': {'url': DB_REPLICA_URI, **get_engine_options('replica')}
+        })
+    
+    # Session sub-pool on the primary for the reads of heavy requests
+    from .utils.bulkheads import heavy_pool_configured
+    if heavy_pool_configured():
+        app.config.setdefault('SQLALCHEMY_BINDS', {})['heavy'] = {
+            'url': app.config['SQLALCHEMY_DATABASE_URI'], **get_engine_options('heavy')
+        }
+    
+    # Optional region shards of the employee and department data
+    from .utils.sharding import get_shard_uris
+    for shard, uri in get_shard_uris().items():
+        app.config.setdefault('SQLALCHEMY_BINDS', {})[shard] = {'url': uri, **get_engine_options(shard)}
+    
+    # Optional local edge replica, used by the reference lookups
+    if EDGE_REPLICA_PATH:
+        from .utils.edge_replica import get_edge_url, get_edge_engine_options
+        app.config.setdefault('SQLALCHEMY_BINDS', {})['edge'] = {
+            'url': get_edge_url(), **get_edge_engine_options()
+        }
+    
     # Disable automatic trailing slash behavior
     app.url_map.strict_slashes = False
     
@@ -36,6 +66,14 @@ def create_app(config_name='development'):
                                "allow_headers": ["Content-Type", "Authorization"]}},
          supports_credentials=True)
     
+    # Compile the model serializers once, before the first request
+    from .utils.serializers import init_serializers
+    init_serializers(app)
+    
+    # Build the read-only statements of the ORM list routes
+    from .utils.fast_reads import init_fast_reads
+    init_fast_reads(app)
+    
     # Register blueprints
     from .routes import init_app
     init_app(app)
@@ -51,6 +89,34 @@ def create_app(config_name='development'):
     from .utils.error_handlers import register_error_handlers
     register_error_handlers(app)
     
+    # Pin writing clients to the primary; registered first so it runs after the commit
+    from .utils.replicas import init_replicas
+    init_replicas(app)
+    
+    # Keep the local edge replica refreshed, and refresh it after local writes
+    from .utils.edge_replica import init_edge_replica
+    init_edge_replica(app)
+    
+    # Commit or roll back each request's direct database work once
+    from .utils.db_utils import init_unit_of_work
+    init_unit_of_work(app)
+    
+    # Bound each request's database calls; registered last so the 503 is set before the unit of work finishes
+    from .utils.deadlines import init_deadlines
+    init_deadlines(app)
+    
+    # Shed requests over their client's rate or the in-flight limit; registered before the bulkheads so shed requests never queue
+    from .utils.admission import init_admission
+    init_admission(app)
+    
+    # Give interactive and heavy requests separate worker slots; registered after the deadlines so queueing counts against them
+    from .utils.bulkheads import init_bulkheads
+    init_bulkheads(app)
+    
+    # Watch the ORM and direct data paths, tripping their circuit breakers on trouble
+    from .utils.circuit_breaker import init_breakers
+    init_breakers(app)
+    
     # Shell context for flask cli
     @app.shell_context_processor
     def make_shell_context():
@@ -1,10 +1,17 @@
 from datetime import datetime
+from sqlalchemy.orm import joinedload
 from werkzeug.security import generate_password_hash, check_password_hash
 from . import db
 
+# Models declare how their generated serializers (app/utils/serializers.py)
+# match to_dict(): __serialize_related__ lists the columns of related rows
+# serialized after their foreign key, __serialize_names__ renames columns and
+# __serialize_exclude__ leaves columns out. Keep them in step with to_dict().
+
 class User(db.Model):
     """User model for authentication and user information."""
     __tablename__ = 'users'
+    __serialize_exclude__ = ('password_hash',)
     
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
@@ -57,6 +64,7 @@ class Region(db.Model):
 class Country(db.Model):
     """Country model."""
     __tablename__ = 'HR_COUNTRIES'
+    __serialize_related__ = {'region': {'region_name': 'REGION_NAME'}}
     
     COUNTRY_ID = db.Column(db.String(2), primary_key=True)
     COUNTRY_NAME = db.Column(db.String(40))
@@ -65,6 +73,11 @@ class Country(db.Model):
     # Relationships - no backrefs
     region = db.relationship('Region')
     
+    @classmethod
+    def eager_query(cls):
+        """Query loading the region to_dict() reads in the same statement."""
+        return cls.query.options(joinedload(cls.region))
+    
     def to_dict(self):
         return {
             'country_id': self.COUNTRY_ID,
@@ -77,6 +90,7 @@ class Country(db.Model):
 class Location(db.Model):
     """Location model."""
     __tablename__ = 'HR_LOCATIONS'
+    __serialize_related__ = {'country': {'country_name': 'COUNTRY_NAME'}}
     
     LOCATION_ID = db.Column(db.Integer, primary_key=True)
     STREET_ADDRESS = db.Column(db.String(40))
@@ -88,6 +102,11 @@ class Location(db.Model):
     # Relationships - no backrefs
     country = db.relationship('Country')
     
+    @classmethod
+    def eager_query(cls):
+        """Query loading the country to_dict() reads in the same statement."""
+        return cls.query.options(joinedload(cls.country))
+    
     def to_dict(self):
         return {
             'location_id': self.LOCATION_ID,
@@ -103,6 +122,7 @@ class Location(db.Model):
 class Department(db.Model):
     """Department model."""
     __tablename__ = 'HR_DEPARTMENTS'
+    __serialize_related__ = {'location': {'location_city': 'CITY'}}
     
     DEPARTMENT_ID = db.Column(db.Integer, primary_key=True)
     DEPARTMENT_NAME = db.Column(db.String(30))
@@ -112,6 +132,11 @@ class Department(db.Model):
     # Relationships - no backrefs
     location = db.relationship('Location')
     
+    @classmethod
+    def eager_query(cls):
+        """Query loading the location to_dict() reads in the same statement."""
+        return cls.query.options(joinedload(cls.location))
+    
     def to_dict(self):
         return {
             'department_id': self.DEPARTMENT_ID,
@@ -144,6 +169,10 @@ class Job(db.Model):
 class Employee(db.Model):
     """Employee model."""
     __tablename__ = 'HR_EMPLOYEES'
+    __serialize_related__ = {
+        'job': {'job_title': 'JOB_TITLE'},
+        'department': {'department_name': 'DEPARTMENT_NAME'}
+    }
     
     EMPLOYEE_ID = db.Column(db.Integer, primary_key=True)
     FIRST_NAME = db.Column(db.String(20))
@@ -161,6 +190,11 @@ class Employee(db.Model):
     department = db.relationship('Department', foreign_keys=[DEPARTMENT_ID])
     job = db.relationship('Job', foreign_keys=[JOB_ID])
     
+    @classmethod
+    def eager_query(cls):
+        """Query loading the job and department to_dict() reads in the same statement."""
+        return cls.query.options(joinedload(cls.job), joinedload(cls.department))
+    
     def to_dict(self):
         return {
             'employee_id': self.EMPLOYEE_ID,
@@ -182,6 +216,11 @@ class Employee(db.Model):
 class JobHistory(db.Model):
     """Job History model."""
     __tablename__ = 'HR_JOB_HISTORY'
+    __serialize_related__ = {
+        'employee': {'employee_name': ('FIRST_NAME', 'LAST_NAME')},
+        'job': {'job_title': 'JOB_TITLE'},
+        'department': {'department_name': 'DEPARTMENT_NAME'}
+    }
     
     EMPLOYEE_ID = db.Column(db.Integer, db.ForeignKey('HR_EMPLOYEES.EMPLOYEE_ID'), primary_key=True)
     START_DATE = db.Column(db.Date, primary_key=True)
@@ -194,6 +233,15 @@ class JobHistory(db.Model):
     department = db.relationship('Department', foreign_keys=[DEPARTMENT_ID])
     employee = db.relationship('Employee', foreign_keys=[EMPLOYEE_ID])
     
+    @classmethod
+    def eager_query(cls):
+        """
+        Query loading the employee, job and department to_dict() reads in the
+        same statement. All three are many-to-one, so the joins add columns,
+        not rows, and a list of any length costs one round trip.
+        """
+        return cls.query.options(joinedload(cls.employee), joinedload(cls.job), joinedload(cls.department))
+    
     def to_dict(self):
         return {
             'employee_id': self.EMPLOYEE_ID,
@@ -210,6 +258,7 @@ class JobHistory(db.Model):
 class JobGrade(db.Model):
     """Job Grade model."""
     __tablename__ = 'HR_JOB_GRADES'
+    __serialize_names__ = {'LOWEST_SAL': 'lowest_salary', 'HIGHEST_SAL': 'highest_salary'}
     
     GRADE_LEVEL = db.Column(db.String(3), primary_key=True)
     LOWEST_SAL = db.Column(db.Integer)
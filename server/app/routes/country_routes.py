@@ -1,28 +1,54 @@
 from flask import Blueprint, request, jsonify
 from ..models import Country, Location
 from .. import db
+from ..utils.pagination import get_page_request, build_page
+from ..utils.serializers import serialize, serialize_all
+from ..utils.fast_reads import read_all, read_page
+from ..utils.edge_replica import serve_from_edge
+from ..utils.circuit_breaker import data_path
+from . import direct_routes
 
 country_bp = Blueprint('country', __name__)
 
 @country_bp.route('/', methods=['GET'])
+@serve_from_edge
+@data_path('orm', fallback=direct_routes.countries)
 def get_countries():
-    """Get all countries."""
-    countries = Country.query.all()
+    """Get all countries, or one keyset page with ?limit=&after=."""
+    try:
+        page = get_page_request('countries', key_types=(str,))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    if page is None:
+        return jsonify({
+            'success': True,
+            'countries': read_all(Country)
+        }), 200
+    
+    countries, next_cursor = build_page(read_page(Country, page.limit + 1, page.after), page,
+                                        lambda country: [country['country_id']])
     return jsonify({
         'success': True,
-        'countries': [country.to_dict() for country in countries]
+        'countries': countries,
+        'next_cursor': next_cursor
     }), 200
 
 @country_bp.route('/<string:country_id>', methods=['GET'])
+@serve_from_edge
+@data_path('orm', fallback=direct_routes.country)
 def get_country(country_id):
     """Get a single country by ID."""
-    country = Country.query.get_or_404(country_id)
+    country = Country.eager_query().get_or_404(country_id)
     
     # Get locations in this country
-    locations = Location.query.filter_by(COUNTRY_ID=country_id).all()
+    locations = Location.eager_query().filter_by(COUNTRY_ID=country_id).all()
     
-    result = country.to_dict()
-    result['locations'] = [location.to_dict() for location in locations]
+    result = serialize(country)
+    result['locations'] = serialize_all(locations)
     
     return jsonify({
         'success': True,
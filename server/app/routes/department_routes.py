@@ -1,16 +1,62 @@
+import functools
 from flask import Blueprint, request, jsonify
-from ..utils.db_utils import get_departments, get_department, get_department_options, create_department, update_department, delete_department
+from ..utils import db_utils, orm_reads
+from ..utils.db_utils import create_department, update_department, delete_department, DuplicateRecordError, CrossShardWriteError
+from ..utils.pagination import get_page_request, get_ids_request, build_page, is_full_list
+from ..utils.includes import parse_includes, load_includes
+from ..utils.edge_replica import serve_from_edge
+from ..utils.deadlines import deadline
+from ..utils.circuit_breaker import data_path
+from ..utils.bulkheads import HEAVY, workload
+from ..config import DB_LIST_DEADLINE
 
 department_bp = Blueprint('department', __name__)
 
-@department_bp.route('/', methods=['GET'])
-def get_departments_route():
-    """Get all departments using direct connection approach."""
+def list_departments(reads):
+    """
+    Answer the department list from reads: db_utils, or orm_reads while the
+    direct path is open, when the related records of ?include= cannot be
+    loaded (their loaders read on the direct path).
+    """
     try:
-        departments_data = get_departments()
+        page = get_page_request('departments')
+        ids = get_ids_request()
+        includes = parse_includes('departments', request.args.get('include'))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'error': 400
+        }), 400
+    
+    if includes and reads is orm_reads:
+        return None
+    
+    try:
+        if ids is not None:
+            departments_data, not_found = reads.get_departments_by_ids(ids)
+            load_includes('departments', departments_data, includes)
+            return jsonify({
+                'success': True,
+                'departments': departments_data,
+                'not_found': not_found
+            }), 200
+        
+        if page is None:
+            departments_data = reads.get_departments()
+            load_includes('departments', departments_data, includes)
+            return jsonify({
+                'success': True,
+                'departments': departments_data
+            }), 200
+        
+        rows = reads.get_departments(limit=page.limit + 1, after=page.after[0] if page.after else None)
+        departments_data, next_cursor = build_page(rows, page, lambda department: [department['department_id']])
+        load_includes('departments', departments_data, includes)
         return jsonify({
             'success': True,
-            'departments': departments_data
+            'departments': departments_data,
+            'next_cursor': next_cursor
         }), 200
     except Exception as e:
         return jsonify({
@@ -19,11 +65,22 @@ def get_departments_route():
             'error': 500
         }), 500
 
-@department_bp.route('/<int:department_id>', methods=['GET'])
-def get_department_route(department_id):
-    """Get a single department by ID using direct connection approach."""
+def show_department(reads, department_id):
+    """Answer a single department from reads, like list_departments."""
+    try:
+        includes = parse_includes('departments', request.args.get('include'))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'error': 400
+        }), 400
+    
+    if includes and reads is orm_reads:
+        return None
+    
     try:
-        department_data = get_department(department_id)
+        department_data = reads.get_department(department_id)
         if not department_data:
             return jsonify({
                 'success': False,
@@ -31,6 +88,7 @@ def get_department_route(department_id):
                 'error': 404
             }), 404
         
+        load_includes('departments', [department_data], includes)
         return jsonify({
             'success': True,
             'department': department_data
@@ -42,11 +100,10 @@ def get_department_route(department_id):
             'error': 500
         }), 500
 
-@department_bp.route('/options', methods=['GET'])
-def get_department_options_route():
-    """Get all departments as options for dropdown."""
+def list_department_options(reads):
+    """Answer the department options from reads."""
     try:
-        options = get_department_options()
+        options = reads.get_department_options()
         return jsonify({
             'success': True,
             'options': options
@@ -56,7 +113,33 @@ def get_department_options_route():
             'success': False,
             'message': str(e),
             'error': 500
-        }), 500 
+        }), 500
+
+@department_bp.route('/', methods=['GET'])
+@deadline(DB_LIST_DEADLINE, when=is_full_list)
+@data_path('direct', fallback=functools.partial(list_departments, orm_reads))
+@workload(HEAVY, when=is_full_list)
+def get_departments_route():
+    """
+    Get all departments, one keyset page with ?limit=&after=, or the departments named by
+    ?ids= (in that order, with the IDs not found), using direct connection approach.
+    
+    ?include= adds related records (see app/utils/includes.py).
+    """
+    return list_departments(db_utils)
+
+@department_bp.route('/<int:department_id>', methods=['GET'])
+@data_path('direct', fallback=functools.partial(show_department, orm_reads))
+def get_department_route(department_id):
+    """Get a single department by ID using direct connection approach, with the related records named by ?include=."""
+    return show_department(db_utils, department_id)
+
+@department_bp.route('/options', methods=['GET'])
+@serve_from_edge
+@data_path('direct', fallback=functools.partial(list_department_options, orm_reads))
+def get_department_options_route():
+    """Get all departments as options for dropdown."""
+    return list_department_options(db_utils)
         
         
 @department_bp.route('/', methods=['POST'])
@@ -66,7 +149,7 @@ def create_department_route():
         data = request.get_json()
         
         # Basic validation
-        required_fields = ['department_id', 'department_name', 'location_id', 'manager_id']
+        required_fields = ['department_name', 'location_id', 'manager_id']
         for field in required_fields:
             if field not in data or not data[field]:
                 return jsonify({
@@ -82,6 +165,12 @@ def create_department_route():
             'message': 'Department created successfully',
             'department': department_data
         }), 201
+    except (DuplicateRecordError, CrossShardWriteError) as e:
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'error': 400
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -95,21 +184,25 @@ def update_employee_route(department_id):
     try:
         data = request.get_json()
         
-        # Check if department exists
-        department_data = get_department(department_id)
-        if not department_data:
+        updated_department = update_department(department_id, data)
+        if not updated_department:
             return jsonify({
                 'success': False,
                 'message': f'Department with ID {department_id} not found',
                 'error': 404
             }), 404
         
-        updated_department = update_department(department_id, data)
         return jsonify({
             'success': True,
             'message': 'Employee updated successfully',
             'department': updated_department
         }), 200
+    except (DuplicateRecordError, CrossShardWriteError) as e:
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'error': 400
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -121,27 +214,18 @@ def update_employee_route(department_id):
 def delete_employee_route(department_id):
     """Delete an department using direct connection approach."""
     try:
-        # Check if employee exists
-        department_data = get_department(department_id)
-        if not department_data:
+        deleted_department = delete_department(department_id)
+        if not deleted_department:
             return jsonify({
                 'success': False,
                 'message': f'Department with ID {department_id} not found',
                 'error': 404
             }), 404
         
-        success = delete_department(department_id)
-        if success:
-            return jsonify({
-                'success': True,
-                'message': 'Department deleted successfully'
-            }), 200
-        else:
-            return jsonify({
-                'success': False,
-                'message': 'Failed to delete department',
-                'error': 500
-            }), 500
+        return jsonify({
+            'success': True,
+            'message': 'Department deleted successfully'
+        }), 200
     except Exception as e:
         return jsonify({
             'success': False,
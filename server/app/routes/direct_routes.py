@@ -3,10 +3,15 @@ Direct routes that bypass SQLAlchemy and use direct oracledb connections.
 These routes are based on the working example and serve as a fallback
 if the SQLAlchemy routes fail.
 """
+from datetime import date
 from flask import Blueprint, jsonify, request
 from ..utils.db_utils import (
     get_connection, 
     execute_query, 
+    execute_named_query,
+    get_pool_stats,
+    locate_shard,
+    split_detail_rows,
     get_departments,
     get_department_options,
     get_employees,
@@ -14,15 +19,98 @@ from ..utils.db_utils import (
     get_jobs,
     get_job_options,
     get_location_options,
+    get_countries,
+    get_country,
+    get_regions,
+    get_region,
+    get_job_grades,
+    get_job_grade,
+    get_job_histories,
+    get_employee_job_history,
     create_employee,
     update_employee,
-    delete_employee
+    delete_employee,
+    DuplicateRecordError,
+    CrossShardWriteError
 )
 
+from ..utils.pagination import get_page_request, build_page, is_full_list
+from ..utils.queries import get_query_stats, get_statement_stats
+from ..utils.id_allocator import get_allocator_stats
+from ..utils.group_commit import get_group_commit_stats
+from ..utils.retry import get_retry_stats
+from ..utils.replicas import get_replica_stats, replica_configured
+from ..utils.sharding import get_shard_stats, get_shards, on_shard, shard_configured
+from ..utils.edge_replica import get_edge_stats, serve_from_edge
+from ..utils.deadlines import deadline, get_deadline_stats
+from ..utils.circuit_breaker import get_breaker_stats
+from ..utils.bulkheads import HEAVY, get_bulkhead_stats, heavy_pool_configured, workload
+from ..utils.admission import exempt_from_admission, get_admission_stats
+from ..config import DB_LIST_DEADLINE
+
 direct_bp = Blueprint('direct', __name__)
 
+# POOL ROUTES
+@direct_bp.route('/pool-stats', methods=['GET'])
+@exempt_from_admission
+def pool_stats():
+    """Get statistics for the shared database session pool."""
+    return jsonify({
+        'success': True,
+        'pool': get_pool_stats(),
+        'heavy_pool': get_pool_stats('heavy') if heavy_pool_configured() else None,
+        'bulkheads': get_bulkhead_stats(),
+        'replica_pool': get_pool_stats('replica') if replica_configured() else None,
+        'replica': get_replica_stats(),
+        'shard_pools': {shard: get_pool_stats(shard) for shard in get_shards()[1:]} if shard_configured() else None,
+        'shards': get_shard_stats(),
+        'retries': get_retry_stats(),
+        'id_blocks': get_allocator_stats()
+    }), 200
+
+@direct_bp.route('/edge-stats', methods=['GET'])
+@exempt_from_admission
+def edge_stats():
+    """Get the staleness and refresh counters of the local edge replica."""
+    return jsonify({
+        'success': True,
+        'edge': get_edge_stats()
+    }), 200
+
+@direct_bp.route('/breaker-stats', methods=['GET'])
+@exempt_from_admission
+def breaker_stats():
+    """Get the state of the circuit breakers on the ORM and direct data paths."""
+    return jsonify({
+        'success': True,
+        'breakers': get_breaker_stats()
+    }), 200
+
+@direct_bp.route('/admission-stats', methods=['GET'])
+@exempt_from_admission
+def admission_stats():
+    """Get the in-flight limits and rejection counts of the admission controller."""
+    return jsonify({
+        'success': True,
+        'admission': get_admission_stats()
+    }), 200
+
+@direct_bp.route('/query-stats', methods=['GET'])
+@exempt_from_admission
+def query_stats():
+    """Get hit and latency counters for the named query registry."""
+    return jsonify({
+        'success': True,
+        'queries': get_query_stats(),
+        'statements': get_statement_stats(),
+        'group_commit': get_group_commit_stats(),
+        'deadlines': get_deadline_stats()
+    }), 200
+
 # DEPARTMENT ROUTES
 @direct_bp.route('/departments', methods=['GET'])
+@deadline(DB_LIST_DEADLINE)
+@workload(HEAVY)
 def departments():
     """Get all departments using direct database connection."""
     try:
@@ -42,14 +130,9 @@ def departments():
 def department(department_id):
     """Get a single department by ID using direct database connection."""
     try:
-        query = """
-        SELECT d.DEPARTMENT_ID, d.DEPARTMENT_NAME, d.MANAGER_ID, d.LOCATION_ID,
-               l.CITY, l.STATE_PROVINCE
-        FROM HR_DEPARTMENTS d
-        LEFT JOIN HR_LOCATIONS l ON d.LOCATION_ID = l.LOCATION_ID
-        WHERE d.DEPARTMENT_ID = :dept_id
-        """
-        rows = execute_query(query, {'dept_id': department_id})
+        # The department and its employees come back from one statement
+        with on_shard(locate_shard('departments', department_id)):
+            rows = execute_named_query('direct.departments.get', {'dept_id': department_id})
         
         if not rows:
             return jsonify({
@@ -58,7 +141,7 @@ def department(department_id):
                 'error': 404
             }), 404
         
-        row = rows[0]
+        row, emp_rows = split_detail_rows(rows, 6)
         department = {
             'department_id': row[0],
             'department_name': row[1],
@@ -68,14 +151,6 @@ def department(department_id):
             'location_state': row[5]
         }
         
-        # Get employees in this department
-        emp_query = """
-        SELECT EMPLOYEE_ID, FIRST_NAME, LAST_NAME, EMAIL, JOB_ID
-        FROM HR_EMPLOYEES
-        WHERE DEPARTMENT_ID = :dept_id
-        """
-        emp_rows = execute_query(emp_query, {'dept_id': department_id})
-        
         employees = [
             {
                 'employee_id': row[0],
@@ -101,6 +176,7 @@ def department(department_id):
         }), 500
 
 @direct_bp.route('/department-options', methods=['GET'])
+@serve_from_edge
 def department_options():
     """Get departments for dropdown options."""
     try:
@@ -118,6 +194,7 @@ def department_options():
 
 # JOB ROUTES
 @direct_bp.route('/jobs', methods=['GET'])
+@serve_from_edge
 def jobs():
     """Get all jobs using direct database connection."""
     try:
@@ -134,15 +211,11 @@ def jobs():
         }), 500
 
 @direct_bp.route('/jobs/<string:job_id>', methods=['GET'])
+@serve_from_edge
 def job(job_id):
     """Get a single job by ID using direct database connection."""
     try:
-        query = """
-        SELECT JOB_ID, JOB_TITLE, MIN_SALARY, MAX_SALARY
-        FROM HR_JOBS
-        WHERE JOB_ID = :job_id
-        """
-        rows = execute_query(query, {'job_id': job_id})
+        rows = execute_named_query('jobs.get', {'job_id': job_id})
         
         if not rows:
             return jsonify({
@@ -171,6 +244,7 @@ def job(job_id):
         }), 500
 
 @direct_bp.route('/job-options', methods=['GET'])
+@serve_from_edge
 def job_options():
     """Get jobs for dropdown options."""
     try:
@@ -187,6 +261,7 @@ def job_options():
         }), 500
 
 @direct_bp.route('/location-options', methods=['GET'])
+@serve_from_edge
 def location_options():
     """Get locations for dropdown options."""
     try:
@@ -202,8 +277,224 @@ def location_options():
             'error': 500
         }), 500
 
+# COUNTRY AND REGION ROUTES (served in place of the ORM routes while the ORM path is open)
+@direct_bp.route('/countries', methods=['GET'])
+@serve_from_edge
+def countries():
+    """Get all countries, or one keyset page with ?limit=&after=, using direct database connection."""
+    try:
+        page = get_page_request('countries', key_types=(str,))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    try:
+        if page is None:
+            return jsonify({
+                'success': True,
+                'countries': get_countries()
+            }), 200
+        
+        rows = get_countries(limit=page.limit + 1, after=page.after[0] if page.after else None)
+        countries, next_cursor = build_page(rows, page, lambda country: [country['country_id']])
+        return jsonify({
+            'success': True,
+            'countries': countries,
+            'next_cursor': next_cursor
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'error': 500
+        }), 500
+
+@direct_bp.route('/countries/<string:country_id>', methods=['GET'])
+@serve_from_edge
+def country(country_id):
+    """Get a single country and its locations using direct database connection."""
+    try:
+        country = get_country(country_id)
+        if not country:
+            return jsonify({
+                'success': False,
+                'message': f'Country with ID {country_id} not found',
+                'error': 404
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'country': country
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'error': 500
+        }), 500
+
+@direct_bp.route('/regions', methods=['GET'])
+@serve_from_edge
+def regions():
+    """Get all regions, or one keyset page with ?limit=&after=, using direct database connection."""
+    try:
+        page = get_page_request('regions')
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    try:
+        if page is None:
+            return jsonify({
+                'success': True,
+                'regions': get_regions()
+            }), 200
+        
+        rows = get_regions(limit=page.limit + 1, after=page.after[0] if page.after else None)
+        regions, next_cursor = build_page(rows, page, lambda region: [region['region_id']])
+        return jsonify({
+            'success': True,
+            'regions': regions,
+            'next_cursor': next_cursor
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'error': 500
+        }), 500
+
+@direct_bp.route('/regions/<int:region_id>', methods=['GET'])
+@serve_from_edge
+def region(region_id):
+    """Get a single region and its countries using direct database connection."""
+    try:
+        region = get_region(region_id)
+        if not region:
+            return jsonify({
+                'success': False,
+                'message': f'Region with ID {region_id} not found',
+                'error': 404
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'region': region
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'error': 500
+        }), 500
+
+# JOB GRADE AND JOB HISTORY ROUTES (served in place of the ORM routes while the ORM path is open)
+@direct_bp.route('/job-grades', methods=['GET'])
+@serve_from_edge
+def job_grades():
+    """Get all job grades using direct database connection."""
+    try:
+        return jsonify({
+            'success': True,
+            'job_grades': get_job_grades()
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'error': 500
+        }), 500
+
+@direct_bp.route('/job-grades/<string:grade_level>', methods=['GET'])
+@serve_from_edge
+def job_grade(grade_level):
+    """Get a single job grade by level using direct database connection."""
+    try:
+        job_grade = get_job_grade(grade_level)
+        if not job_grade:
+            return jsonify({
+                'success': False,
+                'message': f'Job grade {grade_level} not found',
+                'error': 404
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'job_grade': job_grade
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'error': 500
+        }), 500
+
+@direct_bp.route('/job-history', methods=['GET'])
+@deadline(DB_LIST_DEADLINE, when=is_full_list)
+@workload(HEAVY, when=is_full_list)
+def job_histories():
+    """Get all job histories, or one keyset page with ?limit=&after=, using direct database connection."""
+    try:
+        page = get_page_request('job_histories', key_types=(int, date.fromisoformat))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    try:
+        if page is None:
+            return jsonify({
+                'success': True,
+                'job_histories': get_job_histories()
+            }), 200
+        
+        rows = get_job_histories(limit=page.limit + 1, after=page.after)
+        job_histories, next_cursor = build_page(rows, page, lambda jh: [jh['employee_id'], jh['start_date']])
+        return jsonify({
+            'success': True,
+            'job_histories': job_histories,
+            'next_cursor': next_cursor
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'error': 500
+        }), 500
+
+@direct_bp.route('/job-history/employee/<int:employee_id>', methods=['GET'])
+def employee_job_history(employee_id):
+    """Get an employee's job history using direct database connection."""
+    try:
+        employee, job_histories = get_employee_job_history(employee_id)
+        if not employee:
+            return jsonify({
+                'success': False,
+                'message': f'Employee with ID {employee_id} not found',
+                'error': 404
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'employee': employee,
+            'job_histories': job_histories
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'error': 500
+        }), 500
+
 # EMPLOYEE ROUTES
 @direct_bp.route('/employees', methods=['GET'])
+@deadline(DB_LIST_DEADLINE)
+@workload(HEAVY)
 def employees():
     """Get all employees using direct database connection."""
     try:
@@ -258,22 +549,18 @@ def create_employee_route():
                     'error': 400
                 }), 400
         
-        # Check if email already exists
-        check_query = "SELECT COUNT(*) FROM HR_EMPLOYEES WHERE EMAIL = :email"
-        count = execute_query(check_query, {'email': data['email']})[0][0]
-        if count > 0:
-            return jsonify({
-                'success': False,
-                'message': f"Email '{data['email']}' is already in use",
-                'error': 400
-            }), 400
-            
         employee = create_employee(data)
         return jsonify({
             'success': True,
             'message': 'Employee created successfully',
             'employee': employee
         }), 201
+    except (DuplicateRecordError, CrossShardWriteError) as e:
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'error': 400
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -287,32 +574,25 @@ def update_employee_route(employee_id):
     try:
         data = request.get_json()
         
-        # Check if employee exists
-        employee = get_employee(employee_id)
-        if not employee:
+        updated_employee = update_employee(employee_id, data)
+        if not updated_employee:
             return jsonify({
                 'success': False,
                 'message': f'Employee with ID {employee_id} not found',
                 'error': 404
             }), 404
         
-        # Check email uniqueness if it's being updated
-        if 'email' in data and data['email'] != employee['email']:
-            check_query = "SELECT COUNT(*) FROM HR_EMPLOYEES WHERE EMAIL = :email AND EMPLOYEE_ID != :employee_id"
-            count = execute_query(check_query, {'email': data['email'], 'employee_id': employee_id})[0][0]
-            if count > 0:
-                return jsonify({
-                    'success': False,
-                    'message': f"Email '{data['email']}' is already in use",
-                    'error': 400
-                }), 400
-        
-        updated_employee = update_employee(employee_id, data)
         return jsonify({
             'success': True,
             'message': 'Employee updated successfully',
             'employee': updated_employee
         }), 200
+    except (DuplicateRecordError, CrossShardWriteError) as e:
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'error': 400
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -324,27 +604,18 @@ def update_employee_route(employee_id):
 def delete_employee_route(employee_id):
     """Delete an employee."""
     try:
-        # Check if employee exists
-        employee = get_employee(employee_id)
-        if not employee:
+        deleted_employee = delete_employee(employee_id)
+        if not deleted_employee:
             return jsonify({
                 'success': False,
                 'message': f'Employee with ID {employee_id} not found',
                 'error': 404
             }), 404
         
-        success = delete_employee(employee_id)
-        if success:
-            return jsonify({
-                'success': True,
-                'message': 'Employee deleted successfully'
-            }), 200
-        else:
-            return jsonify({
-                'success': False,
-                'message': 'Failed to delete employee',
-                'error': 500
-            }), 500
+        return jsonify({
+            'success': True,
+            'message': 'Employee deleted successfully'
+        }), 200
     except Exception as e:
         return jsonify({
             'success': False,
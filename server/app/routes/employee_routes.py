@@ -1,22 +1,67 @@
+import functools
 from flask import Blueprint, request, jsonify
+from ..utils import db_utils, orm_reads
 from ..utils.db_utils import (
-    get_employees,
-    get_employee,
     create_employee,
     update_employee,
-    delete_employee
+    delete_employee,
+    DuplicateRecordError,
+    CrossShardWriteError
 )
+from ..utils.pagination import get_page_request, get_ids_request, build_page, is_full_list
+from ..utils.includes import parse_includes, load_includes
+from ..utils.deadlines import deadline
+from ..utils.circuit_breaker import data_path
+from ..utils.bulkheads import HEAVY, workload
+from ..config import DB_LIST_DEADLINE
 
 employee_bp = Blueprint('employee', __name__)
 
-@employee_bp.route('/', methods=['GET'])
-def get_employees_route():
-    """Get all employees using direct connection approach."""
+def list_employees(reads):
+    """
+    Answer the employee list from reads: db_utils, or orm_reads while the
+    direct path is open, when the related records of ?include= cannot be
+    loaded (their loaders read on the direct path).
+    """
+    try:
+        page = get_page_request('employees')
+        ids = get_ids_request()
+        includes = parse_includes('employees', request.args.get('include'))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'error': 400
+        }), 400
+    
+    if includes and reads is orm_reads:
+        return None
+    
     try:
-        employees_data = get_employees()
+        if ids is not None:
+            employees_data, not_found = reads.get_employees_by_ids(ids)
+            load_includes('employees', employees_data, includes)
+            return jsonify({
+                'success': True,
+                'employees': employees_data,
+                'not_found': not_found
+            }), 200
+        
+        if page is None:
+            employees_data = reads.get_employees()
+            load_includes('employees', employees_data, includes)
+            return jsonify({
+                'success': True,
+                'employees': employees_data
+            }), 200
+        
+        rows = reads.get_employees(limit=page.limit + 1, after=page.after[0] if page.after else None)
+        employees_data, next_cursor = build_page(rows, page, lambda employee: [employee['employee_id']])
+        load_includes('employees', employees_data, includes)
         return jsonify({
             'success': True,
-            'employees': employees_data
+            'employees': employees_data,
+            'next_cursor': next_cursor
         }), 200
     except Exception as e:
         return jsonify({
@@ -25,11 +70,22 @@ def get_employees_route():
             'error': 500
         }), 500
 
-@employee_bp.route('/<int:employee_id>', methods=['GET'])
-def get_employee_route(employee_id):
-    """Get a single employee by ID using direct connection approach."""
+def show_employee(reads, employee_id):
+    """Answer a single employee from reads, like list_employees."""
     try:
-        employee_data = get_employee(employee_id)
+        includes = parse_includes('employees', request.args.get('include'))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'error': 400
+        }), 400
+    
+    if includes and reads is orm_reads:
+        return None
+    
+    try:
+        employee_data = reads.get_employee(employee_id)
         if not employee_data:
             return jsonify({
                 'success': False,
@@ -37,6 +93,7 @@ def get_employee_route(employee_id):
                 'error': 404
             }), 404
         
+        load_includes('employees', [employee_data], includes)
         return jsonify({
             'success': True,
             'employee': employee_data
@@ -48,6 +105,25 @@ def get_employee_route(employee_id):
             'error': 500
         }), 500
 
+@employee_bp.route('/', methods=['GET'])
+@deadline(DB_LIST_DEADLINE, when=is_full_list)
+@data_path('direct', fallback=functools.partial(list_employees, orm_reads))
+@workload(HEAVY, when=is_full_list)
+def get_employees_route():
+    """
+    Get all employees, one keyset page with ?limit=&after=, or the employees named by
+    ?ids= (in that order, with the IDs not found), using direct connection approach.
+    
+    ?include= adds related records (see app/utils/includes.py).
+    """
+    return list_employees(db_utils)
+
+@employee_bp.route('/<int:employee_id>', methods=['GET'])
+@data_path('direct', fallback=functools.partial(show_employee, orm_reads))
+def get_employee_route(employee_id):
+    """Get a single employee by ID using direct connection approach, with the related records named by ?include=."""
+    return show_employee(db_utils, employee_id)
+
 @employee_bp.route('/', methods=['POST'])
 def create_employee_route():
     """Create a new employee using direct connection approach."""
@@ -71,6 +147,12 @@ def create_employee_route():
             'message': 'Employee created successfully',
             'employee': employee_data
         }), 201
+    except (DuplicateRecordError, CrossShardWriteError) as e:
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'error': 400
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -84,21 +166,25 @@ def update_employee_route(employee_id):
     try:
         data = request.get_json()
         
-        # Check if employee exists
-        employee_data = get_employee(employee_id)
-        if not employee_data:
+        updated_employee = update_employee(employee_id, data)
+        if not updated_employee:
             return jsonify({
                 'success': False,
                 'message': f'Employee with ID {employee_id} not found',
                 'error': 404
             }), 404
         
-        updated_employee = update_employee(employee_id, data)
         return jsonify({
             'success': True,
             'message': 'Employee updated successfully',
             'employee': updated_employee
         }), 200
+    except (DuplicateRecordError, CrossShardWriteError) as e:
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'error': 400
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -110,27 +196,18 @@ def update_employee_route(employee_id):
 def delete_employee_route(employee_id):
     """Delete an employee using direct connection approach."""
     try:
-        # Check if employee exists
-        employee_data = get_employee(employee_id)
-        if not employee_data:
+        deleted_employee = delete_employee(employee_id)
+        if not deleted_employee:
             return jsonify({
                 'success': False,
                 'message': f'Employee with ID {employee_id} not found',
                 'error': 404
             }), 404
         
-        success = delete_employee(employee_id)
-        if success:
-            return jsonify({
-                'success': True,
-                'message': 'Employee deleted successfully'
-            }), 200
-        else:
-            return jsonify({
-                'success': False,
-                'message': 'Failed to delete employee',
-                'error': 500
-            }), 500
+        return jsonify({
+            'success': True,
+            'message': 'Employee deleted successfully'
+        }), 200
     except Exception as e:
         return jsonify({
             'success': False,
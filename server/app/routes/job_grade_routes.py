@@ -1,25 +1,33 @@
 from flask import Blueprint, request, jsonify
 from ..models import JobGrade
 from .. import db
+from ..utils.edge_replica import serve_from_edge
+from ..utils.circuit_breaker import data_path
+from ..utils.serializers import serialize
+from ..utils.fast_reads import read_all
+from . import direct_routes
 
 job_grade_bp = Blueprint('job_grade', __name__)
 
 @job_grade_bp.route('/', methods=['GET'])
+@serve_from_edge
+@data_path('orm', fallback=direct_routes.job_grades)
 def get_job_grades():
     """Get all job grades."""
-    job_grades = JobGrade.query.all()
     return jsonify({
         'success': True,
-        'job_grades': [jg.to_dict() for jg in job_grades]
+        'job_grades': read_all(JobGrade)
     }), 200
 
 @job_grade_bp.route('/<string:grade_level>', methods=['GET'])
+@serve_from_edge
+@data_path('orm', fallback=direct_routes.job_grade)
 def get_job_grade(grade_level):
     """Get a single job grade by level."""
     job_grade = JobGrade.query.get_or_404(grade_level)
     return jsonify({
         'success': True,
-        'job_grade': job_grade.to_dict()
+        'job_grade': serialize(job_grade)
     }), 200
 
 @job_grade_bp.route('/', methods=['POST'])
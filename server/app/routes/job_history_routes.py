@@ -1,27 +1,67 @@
 from flask import Blueprint, request, jsonify
-from datetime import datetime
+from datetime import datetime, date
 from ..models import JobHistory, Employee, Job, Department
 from .. import db
+from ..utils.pagination import get_page_request, build_page, is_full_list
+from ..utils.serializers import serialize_all
+from ..utils.fast_reads import read_all, read_page
+from ..utils.deadlines import deadline
+from ..utils.circuit_breaker import data_path
+from ..utils.bulkheads import HEAVY, workload
+from ..utils.db_utils import locate_shard
+from ..utils.sharding import MAIN_SHARD, on_shard, shard_configured
+from ..config import DB_LIST_DEADLINE
+from . import direct_routes
 
 job_history_bp = Blueprint('job_history', __name__)
 
+def department_in_other_shard(department_id, shard):
+    """Whether a department lives in another region's shard than the employee's job history."""
+    return bool(department_id) and shard_configured() and locate_shard('departments', department_id, write=True) != shard
+
 @job_history_bp.route('/', methods=['GET'])
+@deadline(DB_LIST_DEADLINE, when=is_full_list)
+@data_path('orm', fallback=direct_routes.job_histories)
+@workload(HEAVY, when=is_full_list)
 def get_job_histories():
-    """Get all job histories."""
-    job_histories = JobHistory.query.all()
+    """Get all job histories, or one keyset page with ?limit=&after=."""
+    try:
+        page = get_page_request('job_histories', key_types=(int, date.fromisoformat))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    if page is None:
+        return jsonify({
+            'success': True,
+            'job_histories': read_all(JobHistory)
+        }), 200
+    
+    # Keyset on the composite primary key (EMPLOYEE_ID, START_DATE)
+    job_histories, next_cursor = build_page(
+        read_page(JobHistory, page.limit + 1, page.after),
+        page,
+        lambda jh: [jh['employee_id'], jh['start_date']]
+    )
     return jsonify({
         'success': True,
-        'job_histories': [jh.to_dict() for jh in job_histories]
+        'job_histories': job_histories,
+        'next_cursor': next_cursor
     }), 200
 
 @job_history_bp.route('/employee/<int:employee_id>', methods=['GET'])
+@data_path('orm', fallback=direct_routes.employee_job_history)
 def get_employee_job_history(employee_id):
     """Get job history for a specific employee."""
-    # Verify employee exists
-    employee = Employee.query.get_or_404(employee_id)
-    
-    # Get job history for this employee
-    job_histories = JobHistory.query.filter_by(EMPLOYEE_ID=employee_id).order_by(JobHistory.START_DATE).all()
+    # The job history lives in its employee's shard
+    with on_shard(locate_shard('employees', employee_id)):
+        # Verify employee exists
+        employee = Employee.query.get_or_404(employee_id)
+        
+        # Get job history for this employee
+        job_histories = JobHistory.eager_query().filter_by(EMPLOYEE_ID=employee_id).order_by(JobHistory.START_DATE).all()
     
     return jsonify({
         'success': True,
@@ -30,7 +70,7 @@ def get_employee_job_history(employee_id):
             'name': f"{employee.FIRST_NAME} {employee.LAST_NAME}",
             'email': employee.EMAIL
         },
-        'job_histories': [jh.to_dict() for jh in job_histories]
+        'job_histories': serialize_all(job_histories)
     }), 200
 
 @job_history_bp.route('/', methods=['POST'])
@@ -62,41 +102,50 @@ def create_job_history():
             else:
                 oracle_data[field_mapping[key]] = value
     
+    # The job history lives in its employee's shard, and must name a department of the same region
+    shard = locate_shard('employees', oracle_data['EMPLOYEE_ID'], write=True) if oracle_data.get('EMPLOYEE_ID') else MAIN_SHARD
+    if department_in_other_shard(oracle_data.get('DEPARTMENT_ID'), shard):
+        return jsonify({
+            'success': False,
+            'message': 'A department in another region than the employee is not supported'
+        }), 400
+    
     try:
-        # Verify dependencies
-        if 'EMPLOYEE_ID' in oracle_data:
-            employee = Employee.query.get(oracle_data['EMPLOYEE_ID'])
-            if not employee:
-                return jsonify({
-                    'success': False,
-                    'message': f'Employee with ID {oracle_data["EMPLOYEE_ID"]} not found'
-                }), 404
+        with on_shard(shard):
+            # Verify dependencies
+            if 'EMPLOYEE_ID' in oracle_data:
+                employee = Employee.query.get(oracle_data['EMPLOYEE_ID'])
+                if not employee:
+                    return jsonify({
+                        'success': False,
+                        'message': f'Employee with ID {oracle_data["EMPLOYEE_ID"]} not found'
+                    }), 404
         
-        if 'JOB_ID' in oracle_data:
-            job = Job.query.get(oracle_data['JOB_ID'])
-            if not job:
-                return jsonify({
-                    'success': False,
-                    'message': f'Job with ID {oracle_data["JOB_ID"]} not found'
-                }), 404
+            if 'JOB_ID' in oracle_data:
+                job = Job.query.get(oracle_data['JOB_ID'])
+                if not job:
+                    return jsonify({
+                        'success': False,
+                        'message': f'Job with ID {oracle_data["JOB_ID"]} not found'
+                    }), 404
         
-        if 'DEPARTMENT_ID' in oracle_data:
-            department = Department.query.get(oracle_data['DEPARTMENT_ID'])
-            if not department:
-                return jsonify({
-                    'success': False,
-                    'message': f'Department with ID {oracle_data["DEPARTMENT_ID"]} not found'
-                }), 404
+            if 'DEPARTMENT_ID' in oracle_data:
+                department = Department.query.get(oracle_data['DEPARTMENT_ID'])
+                if not department:
+                    return jsonify({
+                        'success': False,
+                        'message': f'Department with ID {oracle_data["DEPARTMENT_ID"]} not found'
+                    }), 404
         
-        new_job_history = JobHistory(**oracle_data)
-        db.session.add(new_job_history)
-        db.session.commit()
+            new_job_history = JobHistory(**oracle_data)
+            db.session.add(new_job_history)
+            db.session.commit()
         
-        return jsonify({
-            'success': True,
-            'message': 'Job history created successfully',
-            'job_history': new_job_history.to_dict()
-        }), 201
+            return jsonify({
+                'success': True,
+                'message': 'Job history created successfully',
+                'job_history': new_job_history.to_dict()
+            }), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -107,46 +156,54 @@ def create_job_history():
 @job_history_bp.route('/<int:employee_id>/<start_date>', methods=['PUT'])
 def update_job_history(employee_id, start_date):
     """Update an existing job history entry."""
+    # The job history lives in its employee's shard, and must name a department of the same region
+    shard = locate_shard('employees', employee_id, write=True)
+    data = request.get_json()
+    if department_in_other_shard(data.get('department_id'), shard):
+        return jsonify({
+            'success': False,
+            'message': 'A department in another region than the employee is not supported'
+        }), 400
+    
     try:
-        # Parse start_date from URL
-        start_date_obj = datetime.fromisoformat(start_date)
-        
-        # Find the job history entry
-        job_history = JobHistory.query.filter_by(
-            EMPLOYEE_ID=employee_id, 
-            START_DATE=start_date_obj
-        ).first_or_404()
+        with on_shard(shard):
+            # Parse start_date from URL
+            start_date_obj = datetime.fromisoformat(start_date)
         
-        data = request.get_json()
+            # Find the job history entry
+            job_history = JobHistory.query.filter_by(
+                EMPLOYEE_ID=employee_id, 
+                START_DATE=start_date_obj
+            ).first_or_404()
         
-        # Map request fields to Oracle column names
-        field_mapping = {
-            'end_date': 'END_DATE',
-            'job_id': 'JOB_ID',
-            'department_id': 'DEPARTMENT_ID'
-        }
+            # Map request fields to Oracle column names
+            field_mapping = {
+                'end_date': 'END_DATE',
+                'job_id': 'JOB_ID',
+                'department_id': 'DEPARTMENT_ID'
+            }
         
-        for key, value in data.items():
-            if key in field_mapping:
-                # Parse dates if needed
-                if key == 'end_date' and value:
-                    try:
-                        setattr(job_history, field_mapping[key], datetime.fromisoformat(value))
-                    except ValueError:
-                        return jsonify({
-                            'success': False,
-                            'message': f'Invalid date format for {key}. Use ISO format (YYYY-MM-DD).'
-                        }), 400
-                else:
-                    setattr(job_history, field_mapping[key], value)
+            for key, value in data.items():
+                if key in field_mapping:
+                    # Parse dates if needed
+                    if key == 'end_date' and value:
+                        try:
+                            setattr(job_history, field_mapping[key], datetime.fromisoformat(value))
+                        except ValueError:
+                            return jsonify({
+                                'success': False,
+                                'message': f'Invalid date format for {key}. Use ISO format (YYYY-MM-DD).'
+                            }), 400
+                    else:
+                        setattr(job_history, field_mapping[key], value)
         
-        db.session.commit()
+            db.session.commit()
         
-        return jsonify({
-            'success': True,
-            'message': 'Job history updated successfully',
-            'job_history': job_history.to_dict()
-        }), 200
+            return jsonify({
+                'success': True,
+                'message': 'Job history updated successfully',
+                'job_history': job_history.to_dict()
+            }), 200
     except ValueError:
         return jsonify({
             'success': False,
@@ -163,22 +220,23 @@ def update_job_history(employee_id, start_date):
 def delete_job_history(employee_id, start_date):
     """Delete a job history entry."""
     try:
-        # Parse start_date from URL
-        start_date_obj = datetime.fromisoformat(start_date)
+        with on_shard(locate_shard('employees', employee_id, write=True)):
+            # Parse start_date from URL
+            start_date_obj = datetime.fromisoformat(start_date)
         
-        # Find the job history entry
-        job_history = JobHistory.query.filter_by(
-            EMPLOYEE_ID=employee_id, 
-            START_DATE=start_date_obj
-        ).first_or_404()
+            # Find the job history entry
+            job_history = JobHistory.query.filter_by(
+                EMPLOYEE_ID=employee_id, 
+                START_DATE=start_date_obj
+            ).first_or_404()
         
-        db.session.delete(job_history)
-        db.session.commit()
+            db.session.delete(job_history)
+            db.session.commit()
         
-        return jsonify({
-            'success': True,
-            'message': 'Job history deleted successfully'
-        }), 200
+            return jsonify({
+                'success': True,
+                'message': 'Job history deleted successfully'
+            }), 200
     except ValueError:
         return jsonify({
             'success': False,
@@ -1,13 +1,34 @@
+import functools
 from flask import Blueprint, request, jsonify
-from ..utils.db_utils import get_jobs, get_job, get_job_options
+from ..utils import db_utils, orm_reads
+from ..utils.pagination import get_ids_request, is_full_list
+from ..utils.edge_replica import serve_from_edge
+from ..utils.circuit_breaker import data_path
+from ..utils.bulkheads import HEAVY, workload
 
 job_bp = Blueprint('job', __name__)
 
-@job_bp.route('/', methods=['GET'])
-def get_jobs_route():
-    """Get all jobs using direct connection approach."""
+def list_jobs(reads):
+    """Answer the job list from reads: db_utils, or orm_reads while the direct path is open."""
     try:
-        jobs_data = get_jobs()
+        ids = get_ids_request(str)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'error': 400
+        }), 400
+    
+    try:
+        if ids is not None:
+            jobs_data, not_found = reads.get_jobs_by_ids(ids)
+            return jsonify({
+                'success': True,
+                'jobs': jobs_data,
+                'not_found': not_found
+            }), 200
+        
+        jobs_data = reads.get_jobs()
         return jsonify({
             'success': True,
             'jobs': jobs_data
@@ -19,11 +40,10 @@ def get_jobs_route():
             'error': 500
         }), 500
 
-@job_bp.route('/<string:job_id>', methods=['GET'])
-def get_job_route(job_id):
-    """Get a single job by ID using direct connection approach."""
+def show_job(reads, job_id):
+    """Answer a single job from reads."""
     try:
-        job_data = get_job(job_id)
+        job_data = reads.get_job(job_id)
         if not job_data:
             return jsonify({
                 'success': False,
@@ -42,11 +62,10 @@ def get_job_route(job_id):
             'error': 500
         }), 500
 
-@job_bp.route('/options', methods=['GET'])
-def get_job_options_route():
-    """Get all jobs as options for dropdown."""
+def list_job_options(reads):
+    """Answer the job options from reads."""
     try:
-        options = get_job_options()
+        options = reads.get_job_options()
         return jsonify({
             'success': True,
             'options': options
@@ -56,4 +75,26 @@ def get_job_options_route():
             'success': False,
             'message': str(e),
             'error': 500
-        }), 500 
\ No newline at end of file
+        }), 500
+
+@job_bp.route('/', methods=['GET'])
+@serve_from_edge
+@data_path('direct', fallback=functools.partial(list_jobs, orm_reads))
+@workload(HEAVY, when=is_full_list)
+def get_jobs_route():
+    """Get all jobs, or the jobs named by ?ids= (in that order, with the IDs not found), using direct connection approach."""
+    return list_jobs(db_utils)
+
+@job_bp.route('/<string:job_id>', methods=['GET'])
+@serve_from_edge
+@data_path('direct', fallback=functools.partial(show_job, orm_reads))
+def get_job_route(job_id):
+    """Get a single job by ID using direct connection approach."""
+    return show_job(db_utils, job_id)
+
+@job_bp.route('/options', methods=['GET'])
+@serve_from_edge
+@data_path('direct', fallback=functools.partial(list_job_options, orm_reads))
+def get_job_options_route():
+    """Get all jobs as options for dropdown."""
+    return list_job_options(db_utils) 
\ No newline at end of file
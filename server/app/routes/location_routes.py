@@ -1,19 +1,52 @@
+import functools
 from flask import Blueprint, request, jsonify
 from ..models import Location, Department
 from .. import db
-from ..utils.db_utils import get_locations, get_location, get_location_options
-from sqlalchemy.sql import text
+from ..utils import db_utils, orm_reads
+from ..utils.pagination import get_page_request, get_ids_request, build_page, is_full_list
+from ..utils.id_allocator import allocate_id
+from ..utils.edge_replica import serve_from_edge
+from ..utils.deadlines import deadline
+from ..utils.circuit_breaker import data_path
+from ..utils.bulkheads import HEAVY, workload
+from ..config import DB_LIST_DEADLINE
 
 location_bp = Blueprint('location', __name__)
 
-@location_bp.route('/', methods=['GET'])
-def get_locations_route():
-    """Get all locations using direct connection approach."""
+def list_locations(reads):
+    """Answer the location list from reads: db_utils, or orm_reads while the direct path is open."""
     try:
-        locations_data = get_locations()
+        page = get_page_request('locations')
+        ids = get_ids_request()
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'error': 400
+        }), 400
+    
+    try:
+        if ids is not None:
+            locations_data, not_found = reads.get_locations_by_ids(ids)
+            return jsonify({
+                'success': True,
+                'locations': locations_data,
+                'not_found': not_found
+            }), 200
+        
+        if page is None:
+            locations_data = reads.get_locations()
+            return jsonify({
+                'success': True,
+                'locations': locations_data
+            }), 200
+        
+        rows = reads.get_locations(limit=page.limit + 1, after=page.after[0] if page.after else None)
+        locations_data, next_cursor = build_page(rows, page, lambda location: [location['location_id']])
         return jsonify({
             'success': True,
-            'locations': locations_data
+            'locations': locations_data,
+            'next_cursor': next_cursor
         }), 200
     except Exception as e:
         return jsonify({
@@ -22,11 +55,10 @@ def get_locations_route():
             'error': 500
         }), 500
 
-@location_bp.route('/<int:location_id>', methods=['GET'])
-def get_location_route(location_id):
-    """Get a single location by ID using direct connection approach."""
+def show_location(reads, location_id):
+    """Answer a single location from reads."""
     try:
-        location_data = get_location(location_id)
+        location_data = reads.get_location(location_id)
         if not location_data:
             return jsonify({
                 'success': False,
@@ -45,11 +77,10 @@ def get_location_route(location_id):
             'error': 500
         }), 500
 
-@location_bp.route('/options', methods=['GET'])
-def get_location_options_route():
-    """Get all locations as options for dropdown."""
+def list_location_options(reads):
+    """Answer the location options from reads."""
     try:
-        options = get_location_options()
+        options = reads.get_location_options()
         return jsonify({
             'success': True,
             'options': options
@@ -61,6 +92,30 @@ def get_location_options_route():
             'error': 500
         }), 500
 
+@location_bp.route('/', methods=['GET'])
+@deadline(DB_LIST_DEADLINE, when=is_full_list)
+@data_path('direct', fallback=functools.partial(list_locations, orm_reads))
+@workload(HEAVY, when=is_full_list)
+def get_locations_route():
+    """
+    Get all locations, one keyset page with ?limit=&after=, or the locations named by
+    ?ids= (in that order, with the IDs not found), using direct connection approach.
+    """
+    return list_locations(db_utils)
+
+@location_bp.route('/<int:location_id>', methods=['GET'])
+@data_path('direct', fallback=functools.partial(show_location, orm_reads))
+def get_location_route(location_id):
+    """Get a single location by ID using direct connection approach."""
+    return show_location(db_utils, location_id)
+
+@location_bp.route('/options', methods=['GET'])
+@serve_from_edge
+@data_path('direct', fallback=functools.partial(list_location_options, orm_reads))
+def get_location_options_route():
+    """Get all locations as options for dropdown."""
+    return list_location_options(db_utils)
+
 @location_bp.route('/', methods=['POST'])
 def create_location():
     """Create a new location."""
@@ -83,7 +138,7 @@ def create_location():
     try:
         # Create a new location with a generated LOCATION_ID
         new_location = Location(
-            LOCATION_ID=db.session.execute(text('SELECT HR_LOCATIONS_SEQ.NEXTVAL FROM DUAL')).scalar(),
+            LOCATION_ID=allocate_id('locations'),
             **oracle_data
         )
         db.session.add(new_location)
@@ -1,28 +1,54 @@
 from flask import Blueprint, request, jsonify
 from ..models import Region, Country
 from .. import db
+from ..utils.pagination import get_page_request, build_page
+from ..utils.serializers import serialize, serialize_all
+from ..utils.fast_reads import read_all, read_page
+from ..utils.edge_replica import serve_from_edge
+from ..utils.circuit_breaker import data_path
+from . import direct_routes
 
 region_bp = Blueprint('region', __name__)
 
 @region_bp.route('/', methods=['GET'])
+@serve_from_edge
+@data_path('orm', fallback=direct_routes.regions)
 def get_regions():
-    """Get all regions."""
-    regions = Region.query.all()
+    """Get all regions, or one keyset page with ?limit=&after=."""
+    try:
+        page = get_page_request('regions')
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    if page is None:
+        return jsonify({
+            'success': True,
+            'regions': read_all(Region)
+        }), 200
+    
+    regions, next_cursor = build_page(read_page(Region, page.limit + 1, page.after), page,
+                                      lambda region: [region['region_id']])
     return jsonify({
         'success': True,
-        'regions': [region.to_dict() for region in regions]
+        'regions': regions,
+        'next_cursor': next_cursor
     }), 200
 
 @region_bp.route('/<int:region_id>', methods=['GET'])
+@serve_from_edge
+@data_path('orm', fallback=direct_routes.region)
 def get_region(region_id):
     """Get a single region by ID."""
     region = Region.query.get_or_404(region_id)
     
     # Get countries in this region
-    countries = Country.query.filter_by(REGION_ID=region_id).all()
+    countries = Country.eager_query().filter_by(REGION_ID=region_id).all()
     
-    result = region.to_dict()
-    result['countries'] = [country.to_dict() for country in countries]
+    result = serialize(region)
+    result['countries'] = serialize_all(countries)
     
     return jsonify({
         'success': True,
@@ -0,0 +1,208 @@
+"""
+Admission control in front of the database
+
+Every API request passes two checks before it may start database work:
+
+- A token bucket per client: DB_ADMISSION_CLIENT_RATE requests per second
+  with bursts of DB_ADMISSION_CLIENT_BURST, DB_ADMISSION_AUTHENTICATED_FACTOR
+  times more for a client with a valid JWT. Clients over their rate get a
+  429. Clients are told apart by the JWT subject, or by address.
+- A cap on the requests in flight. Authenticated reads may use all
+  DB_ADMISSION_MAX_IN_FLIGHT slots. Writes and anonymous reads may use
+  DB_ADMISSION_LOW_PRIORITY_SHARE of them, and anonymous writes that share
+  of that again. Requests over their cap get a 503 at once instead of
+  queueing for a session.
+
+Views marked with exempt_from_admission (the monitoring endpoints) are
+never shed.
+"""
+import collections
+import math
+import threading
+import time
+import jwt
+from flask import current_app, g, jsonify, request
+from ..config import (
+    JWT_SECRET_KEY,
+    DB_ADMISSION_MAX_IN_FLIGHT,
+    DB_ADMISSION_LOW_PRIORITY_SHARE,
+    DB_ADMISSION_CLIENT_RATE,
+    DB_ADMISSION_CLIENT_BURST,
+    DB_ADMISSION_AUTHENTICATED_FACTOR,
+    DB_ADMISSION_MAX_CLIENTS,
+    DB_ADMISSION_RETRY_AFTER
+)
+
+READ_METHODS = ('GET', 'HEAD')
+
+# Priorities, highest first, and the share of the in-flight cap open to each
+PRIORITIES = ('authenticated_read', 'normal', 'anonymous_write')
+PRIORITY_SHARES = {
+    'authenticated_read': 1.0,
+    'normal': DB_ADMISSION_LOW_PRIORITY_SHARE,
+    'anonymous_write': DB_ADMISSION_LOW_PRIORITY_SHARE ** 2
+}
+
+_lock = threading.Lock()
+_buckets = collections.OrderedDict()
+_in_flight = 0
+_stats = {
+    'admitted': 0,
+    'rate_limited': 0,
+    'overloaded': 0,
+    'peak_in_flight': 0,
+    'shed_by_priority': {priority: 0 for priority in PRIORITIES}
+}
+
+
+def exempt_from_admission(view):
+    """Mark a view that is never shed, such as a monitoring endpoint."""
+    view.db_admission_exempt = True
+    return view
+
+
+def get_client_identity():
+    """
+    Get who sent the current request.
+
+    Returns:
+        (identity, authenticated): 'user:<subject>' for a valid bearer JWT,
+            otherwise 'addr:<remote address>'
+    """
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        try:
+            claims = jwt.decode(header[7:], JWT_SECRET_KEY, algorithms=['HS256'])
+        except jwt.InvalidTokenError:
+            claims = None
+        if claims and claims.get('sub') is not None:
+            return f"user:{claims['sub']}", True
+    return f'addr:{request.remote_addr}', False
+
+
+def take_token(identity, authenticated):
+    """
+    Take one request from a client's token bucket.
+
+    Returns:
+        wait: 0 if the request may go ahead, otherwise seconds until a token is free
+    """
+    if DB_ADMISSION_CLIENT_RATE <= 0:
+        return 0
+
+    factor = DB_ADMISSION_AUTHENTICATED_FACTOR if authenticated else 1
+    rate = DB_ADMISSION_CLIENT_RATE * factor
+    burst = DB_ADMISSION_CLIENT_BURST * factor
+    now = time.monotonic()
+
+    with _lock:
+        tokens, updated = _buckets.pop(identity, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        wait = 0 if tokens >= 1 else (1 - tokens) / rate
+        if not wait:
+            tokens -= 1
+        _buckets[identity] = (tokens, now)
+        while len(_buckets) > DB_ADMISSION_MAX_CLIENTS:
+            _buckets.popitem(last=False)
+    return wait
+
+
+def get_priority(authenticated):
+    """Get the priority of the current request from its method and client."""
+    read = request.method in READ_METHODS
+    if read and authenticated:
+        return 'authenticated_read'
+    if read or authenticated:
+        return 'normal'
+    return 'anonymous_write'
+
+
+def shed(priority, status, message, retry_after):
+    """Build the response of a shed request and count it."""
+    with _lock:
+        _stats['rate_limited' if status == 429 else 'overloaded'] += 1
+        _stats['shed_by_priority'][priority] += 1
+
+    response = jsonify({
+        'success': False,
+        'message': message,
+        'error': status
+    })
+    response.status_code = status
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+def admit_request():
+    """Admit the request, or shed it with a 429 or 503 before it reaches the database."""
+    global _in_flight
+    if request.method == 'OPTIONS' or not request.path.startswith('/api'):
+        return None
+    view = current_app.view_functions.get(request.endpoint)
+    if getattr(view, 'db_admission_exempt', False):
+        return None
+
+    identity, authenticated = get_client_identity()
+    priority = get_priority(authenticated)
+
+    wait = take_token(identity, authenticated)
+    if wait:
+        return shed(priority, 429, 'Too many requests, please slow down', math.ceil(wait))
+
+    with _lock:
+        if DB_ADMISSION_MAX_IN_FLIGHT > 0 and _in_flight >= DB_ADMISSION_MAX_IN_FLIGHT * PRIORITY_SHARES[priority]:
+            admitted = False
+        else:
+            admitted = True
+            _in_flight += 1
+            _stats['admitted'] += 1
+            _stats['peak_in_flight'] = max(_stats['peak_in_flight'], _in_flight)
+    if not admitted:
+        return shed(priority, 503, 'The server is overloaded, please retry', DB_ADMISSION_RETRY_AFTER)
+
+    g.db_admitted = True
+    return None
+
+
+def release_request(exception=None):
+    """Free the in-flight slot of a finished request."""
+    global _in_flight
+    if g.pop('db_admitted', False):
+        with _lock:
+            _in_flight -= 1
+
+
+def init_admission(app):
+    """
+    Register the request hooks that admit or shed each API request. Call
+    before init_bulkheads, so shed requests never join a bulkhead queue.
+    """
+    app.before_request(admit_request)
+    app.teardown_request(release_request)
+
+
+def get_admission_stats():
+    """
+    Get the admission limits, the requests in flight and the shed counts.
+
+    Returns:
+        stats: Limits per priority, client rates and admission counters
+    """
+    with _lock:
+        stats = {**_stats, 'shed_by_priority': dict(_stats['shed_by_priority'])}
+        in_flight = _in_flight
+        clients = len(_buckets)
+
+    return {
+        'max_in_flight': DB_ADMISSION_MAX_IN_FLIGHT or None,
+        'limits': {
+            priority: math.floor(DB_ADMISSION_MAX_IN_FLIGHT * share) if DB_ADMISSION_MAX_IN_FLIGHT else None
+            for priority, share in PRIORITY_SHARES.items()
+        },
+        'client_rate': DB_ADMISSION_CLIENT_RATE or None,
+        'client_burst': DB_ADMISSION_CLIENT_BURST,
+        'authenticated_factor': DB_ADMISSION_AUTHENTICATED_FACTOR,
+        'in_flight': in_flight,
+        'clients': clients,
+        **stats
+    }
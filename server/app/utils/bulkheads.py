@@ -0,0 +1,186 @@
+"""
+Bulkheads between interactive and heavy workloads
+
+Every API request belongs to a workload class: 'interactive' by default, or
+the class its view declares with the workload decorator ('heavy' for the
+list routes when they read the whole table; their pages and multi-gets stay
+interactive). Each class has its own concurrency limit, so at most
+DB_HEAVY_CONCURRENCY heavy requests run at once and the rest queue for up
+to DB_BULKHEAD_QUEUE_TIMEOUT milliseconds before being answered with a 503.
+
+The reads of heavy requests also use their own session sub-pool of
+DB_HEAVY_POOL_MAX sessions (the 'heavy' bind, see replicas.read_target),
+so a burst of list calls cannot take the sessions the single-record reads
+of the modals need.
+"""
+import threading
+import time
+from flask import current_app, g, has_request_context, jsonify, request
+from .deadlines import get_deadline
+from .dialects import get_dialect
+from ..config import (
+    DB_INTERACTIVE_CONCURRENCY,
+    DB_HEAVY_CONCURRENCY,
+    DB_HEAVY_POOL_MAX,
+    DB_BULKHEAD_QUEUE_TIMEOUT,
+    DB_BULKHEAD_RETRY_AFTER
+)
+
+INTERACTIVE = 'interactive'
+HEAVY = 'heavy'
+
+
+def heavy_pool_configured():
+    """Whether heavy reads use a session sub-pool of their own."""
+    # Every connection to an in-memory SQLite database is a separate database
+    return DB_HEAVY_POOL_MAX > 0 and getattr(get_dialect(), 'path', None) != ':memory:'
+
+
+class Bulkhead:
+    """Limits how many requests of one workload class run at once."""
+
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self._slots = threading.BoundedSemaphore(limit) if limit > 0 else None
+        self._lock = threading.Lock()
+        self._stats = {'admitted': 0, 'rejected': 0, 'running': 0, 'queued': 0,
+                       'queue_time_total': 0.0, 'queue_time_max': 0.0}
+
+    def enter(self, timeout):
+        """
+        Wait for a free slot of this class.
+
+        Args:
+            timeout: Seconds to wait at most
+
+        Returns:
+            entered: Whether the request got a slot
+        """
+        with self._lock:
+            self._stats['queued'] += 1
+        start = time.perf_counter()
+        entered = self._slots is None or self._slots.acquire(timeout=max(timeout, 0))
+        waited = time.perf_counter() - start
+
+        with self._lock:
+            self._stats['queued'] -= 1
+            self._stats['queue_time_total'] += waited
+            self._stats['queue_time_max'] = max(self._stats['queue_time_max'], waited)
+            if entered:
+                self._stats['admitted'] += 1
+                self._stats['running'] += 1
+            else:
+                self._stats['rejected'] += 1
+        return entered
+
+    def leave(self):
+        """Free the slot of a finished request."""
+        with self._lock:
+            self._stats['running'] -= 1
+        if self._slots is not None:
+            self._slots.release()
+
+    def stats(self):
+        """Get the limit, queue times and counters of this class."""
+        with self._lock:
+            stats = dict(self._stats)
+        waits = stats['admitted'] + stats['rejected']
+        return {
+            'limit': self.limit or None,
+            'admitted': stats['admitted'],
+            'rejected': stats['rejected'],
+            'running': stats['running'],
+            'queued': stats['queued'],
+            'queue_time_total_ms': round(stats['queue_time_total'] * 1000, 3),
+            'queue_time_avg_ms': round(stats['queue_time_total'] * 1000 / waits, 3) if waits else 0.0,
+            'queue_time_max_ms': round(stats['queue_time_max'] * 1000, 3)
+        }
+
+
+_bulkheads = {
+    INTERACTIVE: Bulkhead(INTERACTIVE, DB_INTERACTIVE_CONCURRENCY),
+    HEAVY: Bulkhead(HEAVY, DB_HEAVY_CONCURRENCY)
+}
+
+
+def workload(name, when=None):
+    """
+    Assign a view to a workload class ('interactive' or 'heavy').
+
+    May be applied anywhere below the route decorator.
+
+    Args:
+        name: The workload class
+        when: Function telling whether the current request is in the class
+            (default: always); the other requests are interactive
+    """
+    def decorator(view):
+        view.db_workload = (name, when)
+        return view
+    return decorator
+
+
+def current_workload():
+    """Get the workload class of the current request, or None outside a request."""
+    if not has_request_context():
+        return None
+    return g.get('db_workload', INTERACTIVE)
+
+
+def enter_bulkhead():
+    """Queue the request for a slot of its view's workload class."""
+    if request.method == 'OPTIONS' or not request.path.startswith('/api'):
+        return None
+
+    view = current_app.view_functions.get(request.endpoint)
+    name, when = getattr(view, 'db_workload', (INTERACTIVE, None))
+    g.db_workload = name if when is None or when() else INTERACTIVE
+
+    timeout = DB_BULKHEAD_QUEUE_TIMEOUT / 1000
+    expires = get_deadline()
+    if expires is not None:
+        timeout = min(timeout, expires - time.monotonic())
+
+    if not _bulkheads[g.db_workload].enter(timeout):
+        response = jsonify({
+            'success': False,
+            'message': 'The server is busy, please retry',
+            'error': 503
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = str(DB_BULKHEAD_RETRY_AFTER)
+        return response
+
+    g.db_bulkhead_entered = True
+    return None
+
+
+def leave_bulkhead(exception=None):
+    """Free the request's slot once it is done."""
+    if g.pop('db_bulkhead_entered', False):
+        _bulkheads[g.db_workload].leave()
+
+
+def init_bulkheads(app):
+    """
+    Register the request hooks that admit each request into its workload
+    class. Call after init_deadlines, so the queue wait counts against the
+    request's deadline.
+    """
+    app.before_request(enter_bulkhead)
+    app.teardown_request(leave_bulkhead)
+
+
+def get_bulkhead_stats():
+    """
+    Get the limits and queue times of every workload class.
+
+    Returns:
+        stats: Per-class limits, counters and queue times, and the heavy sub-pool size
+    """
+    return {
+        'queue_timeout_ms': DB_BULKHEAD_QUEUE_TIMEOUT,
+        'heavy_pool_max': DB_HEAVY_POOL_MAX if heavy_pool_configured() else None,
+        'classes': {name: bulkhead.stats() for name, bulkhead in _bulkheads.items()}
+    }
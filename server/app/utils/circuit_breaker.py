@@ -0,0 +1,273 @@
+"""
+Circuit breakers on the ORM and direct data paths
+
+The API reaches the database two ways: through SQLAlchemy ('orm', used by
+the country, region, job grade and job history routes) and through the
+direct helpers of db_utils ('direct', used by everything else and by the
+/api/direct fallback routes). Each path has a breaker that watches the
+outcome and latency of its last DB_BREAKER_WINDOW calls.
+
+When too many of them fail (DB_BREAKER_ERROR_RATE) or are slow
+(DB_BREAKER_SLOW_RATE), the breaker opens: views marked with data_path stop
+using the path for DB_BREAKER_OPEN_SECONDS and are served by their fallback
+view on the other path, or answered with a fast 503 when they have none.
+Afterwards the breaker lets a few requests through half-open and closes
+again once DB_BREAKER_PROBES calls in a row succeed.
+"""
+import functools
+import math
+import threading
+import time
+from collections import deque
+from flask import has_request_context, jsonify
+from sqlalchemy import event
+from .deadlines import DeadlineExceeded
+from .dialects import get_dialect
+from ..config import (
+    DB_BREAKER_WINDOW,
+    DB_BREAKER_MIN_CALLS,
+    DB_BREAKER_ERROR_RATE,
+    DB_BREAKER_SLOW_RATE,
+    DB_BREAKER_SLOW_CALL,
+    DB_BREAKER_OPEN_SECONDS,
+    DB_BREAKER_PROBES
+)
+
+PATHS = ('orm', 'direct')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def breakers_enabled():
+    """Whether the data paths are guarded by circuit breakers."""
+    return DB_BREAKER_WINDOW > 0
+
+
+class CircuitBreaker:
+    """Tracks the recent calls of one data path and decides whether it may be used."""
+
+    def __init__(self, path):
+        self.path = path
+        self.state = CLOSED
+        self._calls = deque(maxlen=DB_BREAKER_WINDOW)
+        self._opened_at = 0.0
+        self._admitted = 0
+        self._successes = 0
+        self._lock = threading.Lock()
+        self._stats = {'trips': 0, 'rejected': 0, 'fallbacks': 0, 'calls': 0, 'failures': 0, 'slow_calls': 0}
+
+    def allow(self):
+        """
+        Whether a request may use the path now. While half-open only
+        DB_BREAKER_PROBES requests are let through per probe period.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+
+            now = time.monotonic()
+            if now - self._opened_at >= DB_BREAKER_OPEN_SECONDS:
+                # Open long enough, or the probes of the last period never reported back
+                self.state = HALF_OPEN
+                self._opened_at = now
+                self._admitted = 0
+                self._successes = 0
+            if self.state == HALF_OPEN and self._admitted < DB_BREAKER_PROBES:
+                self._admitted += 1
+                return True
+
+            self._stats['rejected'] += 1
+            return False
+
+    def record(self, elapsed, failed):
+        """
+        Record the outcome of one call on the path.
+
+        Args:
+            elapsed: Seconds the call took
+            failed: Whether the database failed it
+        """
+        slow = elapsed * 1000 >= DB_BREAKER_SLOW_CALL
+        with self._lock:
+            self._stats['calls'] += 1
+            self._stats['failures'] += failed
+            self._stats['slow_calls'] += slow
+
+            if self.state == HALF_OPEN:
+                if failed or slow:
+                    self._trip()
+                else:
+                    self._successes += 1
+                    if self._successes >= DB_BREAKER_PROBES:
+                        self.state = CLOSED
+                        self._calls.clear()
+                return
+            if self.state == OPEN:
+                # A call that started before the breaker opened
+                return
+
+            self._calls.append((failed, slow))
+            if len(self._calls) < max(DB_BREAKER_MIN_CALLS, 1):
+                return
+            failures = sum(1 for failed, _ in self._calls if failed)
+            slow_calls = sum(1 for _, slow in self._calls if slow)
+            if failures / len(self._calls) >= DB_BREAKER_ERROR_RATE or slow_calls / len(self._calls) >= DB_BREAKER_SLOW_RATE:
+                self._trip()
+
+    def _trip(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._calls.clear()
+        self._stats['trips'] += 1
+
+    def retry_after(self):
+        """Get the whole seconds until the breaker probes the path again."""
+        return max(1, math.ceil(DB_BREAKER_OPEN_SECONDS - (time.monotonic() - self._opened_at)))
+
+    def record_fallback(self):
+        """Count a request served by the other path because this one is open."""
+        with self._lock:
+            self._stats['fallbacks'] += 1
+
+    def stats(self):
+        """Get the state, window rates and counters of this breaker."""
+        with self._lock:
+            calls = list(self._calls)
+            stats = dict(self._stats)
+            state = self.state
+        return {
+            'state': state,
+            'window_calls': len(calls),
+            'error_rate': round(sum(1 for failed, _ in calls if failed) / len(calls), 3) if calls else 0.0,
+            'slow_rate': round(sum(1 for _, slow in calls if slow) / len(calls), 3) if calls else 0.0,
+            **stats
+        }
+
+
+_breakers = {path: CircuitBreaker(path) for path in PATHS}
+
+
+def get_breaker(path):
+    """Get the process-wide breaker of a data path ('orm' or 'direct')."""
+    return _breakers[path]
+
+
+def record_call(path, elapsed, error=None, dialect=None):
+    """
+    Record a database call of a request on its data path.
+
+    Args:
+        path: 'orm' or 'direct'
+        elapsed: Seconds the call took, retries included
+        error: The error the call raised, if any
+        dialect: Dialect classifying the error (default: the primary's)
+    """
+    if not breakers_enabled() or not has_request_context():
+        return
+    failed = error is not None and (
+        isinstance(error, DeadlineExceeded) or (dialect or get_dialect()).is_database_failure(error)
+    )
+    _breakers[path].record(elapsed, failed)
+
+
+def data_path(path, fallback=None):
+    """
+    Mark the data path a view uses, so the view is guarded by its breaker.
+
+    While the breaker is open the request is served by fallback, a view
+    with the same arguments on the other path, or answered with a 503.
+    A fallback returns None for a request it cannot serve, which is then
+    answered with the 503 too. Must be applied below the route decorator.
+
+    Args:
+        path: 'orm' or 'direct'
+        fallback: View to serve while the path is open (optional)
+    """
+    other = 'direct' if path == 'orm' else 'orm'
+
+    def divert(breaker, args, kwargs):
+        if fallback is not None and _breakers[other].allow():
+            response = fallback(*args, **kwargs)
+            if response is not None:
+                breaker.record_fallback()
+                return response
+
+        response = jsonify({
+            'success': False,
+            'message': 'The database is unavailable, please retry',
+            'error': 503
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = str(breaker.retry_after())
+        return response
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            breaker = _breakers[path]
+            if not breakers_enabled() or breaker.allow():
+                return view(*args, **kwargs)
+            return divert(breaker, args, kwargs)
+        return wrapper
+    return decorator
+
+
+def time_orm_statement(conn, cursor, statement, parameters, context, executemany):
+    """Engine hook noting when an ORM statement starts."""
+    conn.info.setdefault('breaker_started', []).append(time.perf_counter())
+
+
+def statement_elapsed(conn):
+    """Get the seconds since the innermost timed statement of a connection started."""
+    started = conn.info.get('breaker_started')
+    return time.perf_counter() - started.pop() if started else 0.0
+
+
+def record_orm_statement(conn, cursor, statement, parameters, context, executemany):
+    """Engine hook recording a successful ORM statement."""
+    record_call('orm', statement_elapsed(conn))
+
+
+def record_orm_error(context):
+    """Engine hook recording a failed ORM statement."""
+    if context.connection is not None:
+        record_call('orm', statement_elapsed(context.connection), context.original_exception)
+
+
+def init_breakers(app):
+    """Record the ORM statements of every database engine on the 'orm' breaker."""
+    from .. import db
+
+    if not breakers_enabled():
+        return
+
+    with app.app_context():
+        for bind, engine in db.engines.items():
+            # The local edge copy is not the database the breaker protects
+            if bind == 'edge':
+                continue
+            event.listen(engine, 'before_cursor_execute', time_orm_statement)
+            event.listen(engine, 'after_cursor_execute', record_orm_statement)
+            event.listen(engine, 'handle_error', record_orm_error)
+
+
+def get_breaker_stats():
+    """
+    Get the thresholds and the state of each data path's breaker.
+
+    Returns:
+        stats: Settings and per-path state, rates and counters
+    """
+    return {
+        'enabled': breakers_enabled(),
+        'window': DB_BREAKER_WINDOW,
+        'min_calls': DB_BREAKER_MIN_CALLS,
+        'error_rate': DB_BREAKER_ERROR_RATE,
+        'slow_rate': DB_BREAKER_SLOW_RATE,
+        'slow_call_ms': DB_BREAKER_SLOW_CALL,
+        'open_seconds': DB_BREAKER_OPEN_SECONDS,
+        'probes': DB_BREAKER_PROBES,
+        'paths': {path: breaker.stats() for path, breaker in _breakers.items()}
+    }
@@ -1,55 +1,1079 @@
 """
 Database utility functions for direct database connections
+
+The helpers run on Oracle or, for local development and CI, on SQLite;
+see dialects.py for what differs between the two.
 """
+import functools
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import oracledb
-from ..config import ORACLE_USER, ORACLE_PASSWORD, ORACLE_DSN
+from flask import current_app, g, has_request_context, jsonify
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+from .. import db
+from .circuit_breaker import record_call
+from .deadlines import DeadlineExceeded, call_deadline, get_deadline, mark_deadline_exceeded, remaining_ms
+from .dialects import ArrayBind, bind_arrays, get_dialect
+from .group_commit import get_committer, group_commit_enabled
+from .id_allocator import allocate_id
+from .queries import BATCH_SIZES, get_query, record_execution, record_statement
+from .retry import call_with_retry, record_retry_event
+from .replicas import current_dialect, read_target
+from .sharding import (
+    MAIN_SHARD,
+    CrossShardWriteError,
+    shard_configured,
+    get_shard_uris,
+    get_shards,
+    shard_for_region,
+    current_shard,
+    on_shard,
+    cached_shard,
+    remember_shard,
+    forget_shard,
+    known_missing,
+    remember_missing,
+    record_scatter
+)
+from ..config import (
+    ORACLE_USER,
+    ORACLE_PASSWORD,
+    ORACLE_DSN,
+    ORACLE_FAILOVER_DSNS,
+    DB_POOL_MIN,
+    DB_POOL_MAX,
+    DB_POOL_INCREMENT,
+    DB_POOL_PING_INTERVAL,
+    DB_POOL_IDLE_TIMEOUT,
+    DB_POOL_WAIT_TIMEOUT,
+    DB_STMT_CACHE_SIZE,
+    DB_REPLICA_URI,
+    DB_HEAVY_POOL_MAX
+)
+
+# Process-wide session pools (primary, heavy sub-pool, replica and shards), created lazily on first checkout
+_pools = {}
+_pool_lock = threading.Lock()
+_pool_counters = {}
+
+# Pools on the primary database, which move together on failover
+PRIMARY_TARGETS = ('primary', 'heavy')
+
+# Position of the primary's current DSN in get_primary_dsns, moved on failover
+_dsn_index = 0
+
+# Worker threads of scatter-gather reads, created on first use
+_scatter_executor = None
+_scatter_lock = threading.Lock()
+
+def get_target_uri(target):
+    """
+    Get the database URL of a non-primary target.
+    
+    Args:
+        target: 'replica', or the bind name of a region shard
+        
+    Returns:
+        uri: The configured database URL
+    """
+    if target == 'replica':
+        return DB_REPLICA_URI
+    return get_shard_uris()[target]
+
+def get_primary_dsns():
+    """Get the primary DSN followed by its failover DSNs."""
+    return [ORACLE_DSN] + ORACLE_FAILOVER_DSNS
+
+def get_oracle_credentials(target='primary'):
+    """
+    Get the user, password and DSN of a database.
+    
+    Args:
+        target: 'primary', 'heavy' for the primary's heavy sub-pool, 'replica'
+            for the read replica in DB_REPLICA_URI, or the bind name of a
+            region shard in DB_SHARDS
+        
+    Returns:
+        (user, password, dsn): Connection arguments for python-oracledb
+    """
+    if target in PRIMARY_TARGETS:
+        dsns = get_primary_dsns()
+        return ORACLE_USER, ORACLE_PASSWORD, dsns[_dsn_index % len(dsns)]
+    
+    url = make_url(get_target_uri(target))
+    return url.username, url.password, f"{url.host}:{url.port or 1521}/{url.database}"
+
+def get_pool(target='primary'):
+    """
+    Get a process-wide oracledb session pool, creating it on first use.
+    
+    Sessions idle for longer than DB_POOL_PING_INTERVAL are pinged when
+    checked out, and sessions idle for longer than DB_POOL_IDLE_TIMEOUT
+    are closed so the pool shrinks back towards DB_POOL_MIN.
+    
+    Args:
+        target: 'primary', 'heavy', 'replica' or a shard bind name
+        
+    Returns:
+        pool: An oracledb ConnectionPool object
+    """
+    pool = _pools.get(target)
+    if pool is None:
+        with _pool_lock:
+            pool = _pools.get(target)
+            if pool is None:
+                user, password, dsn = get_oracle_credentials(target)
+                pool_min, pool_max = get_pool_size(target)
+                pool = _pools[target] = oracledb.create_pool(
+                    user=user,
+                    password=password,
+                    dsn=dsn,
+                    min=pool_min,
+                    max=pool_max,
+                    increment=DB_POOL_INCREMENT,
+                    ping_interval=DB_POOL_PING_INTERVAL,
+                    timeout=DB_POOL_IDLE_TIMEOUT,
+                    getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+                    wait_timeout=DB_POOL_WAIT_TIMEOUT,
+                    stmtcachesize=DB_STMT_CACHE_SIZE
+                )
+    return pool
+
+def get_pool_size(target='primary'):
+    """Get the minimum and maximum session count of a pool; the heavy sub-pool has its own maximum."""
+    if target == 'heavy':
+        return min(DB_POOL_MIN, DB_HEAVY_POOL_MAX), DB_HEAVY_POOL_MAX
+    return DB_POOL_MIN, DB_POOL_MAX
+
+def acquire_pooled_connection(target='primary'):
+    """
+    Check out a raw session from a process-wide pool, recording the
+    checkout count and the time spent waiting for a free session.
+    
+    This is the creator used by the SQLAlchemy engines, so the ORM routes
+    and the direct helpers draw from the same bounded pools.
+    
+    Args:
+        target: 'primary', 'heavy', 'replica' or a shard bind name
+        
+    Returns:
+        connection: An oracledb connection object
+    """
+    pool = get_pool(target)
+    start = time.perf_counter()
+    try:
+        connection = pool.acquire()
+    except oracledb.Error as e:
+        if not fail_over(target, pool, e):
+            raise
+        connection = get_pool(target).acquire()
+    waited = time.perf_counter() - start
+    
+    with _pool_lock:
+        counters = _pool_counters.setdefault(target, {
+            'checkouts': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0
+        })
+        counters['checkouts'] += 1
+        counters['wait_time_total'] += waited
+        counters['wait_time_max'] = max(counters['wait_time_max'], waited)
+    
+    return connection
+
+def fail_over(target, pool, error):
+    """
+    Move the primary's pools to the next failover DSN after its database
+    could not be reached.
+    
+    Args:
+        target: Pool target; only the primary's pools have failover DSNs
+        pool: The pool that failed
+        error: The connect error
+        
+    Returns:
+        failed_over: Whether a new pool on another DSN may be tried
+    """
+    global _dsn_index
+    if target not in PRIMARY_TARGETS or not ORACLE_FAILOVER_DSNS or not get_dialect().is_disconnect(error):
+        return False
+    
+    with _pool_lock:
+        # Another thread may have failed over already
+        if _pools.get(target) is pool:
+            _dsn_index = (_dsn_index + 1) % len(get_primary_dsns())
+            for stale in [_pools.pop(name) for name in PRIMARY_TARGETS if name in _pools]:
+                try:
+                    stale.close(force=True)
+                except oracledb.Error:
+                    pass
+            record_retry_event('failovers')
+    return True
+
+def get_engine_options(target='primary'):
+    """
+    Get the SQLAlchemy engine options that route an engine through its
+    shared session pool.
+    
+    SQLAlchemy's own pooling is disabled (NullPool) so the oracledb pool
+    remains the single place where sessions are sized and counted. On
+    SQLite the dialect supplies tuned, pooled connections instead.
+    
+    Args:
+        target: 'primary', 'heavy' for the heavy sub-pool bind, 'replica'
+            for the read-replica bind, or a shard bind name
+        
+    Returns:
+        options: A dict suitable for SQLALCHEMY_ENGINE_OPTIONS
+    """
+    dialect = get_dialect()
+    if dialect.name != 'oracle':
+        if target in PRIMARY_TARGETS:
+            return dialect.engine_options(None, get_pool_size(target)[1])
+        return dialect.engine_options(get_target_uri(target))
+    
+    return {
+        'creator': functools.partial(acquire_pooled_connection, target),
+        'poolclass': NullPool
+    }
+
+def get_connection(shard=MAIN_SHARD):
+    """
+    Check out a connection from the shared SQLAlchemy engine, or from the
+    replica's, edge replica's or heavy sub-pool's engine when the current
+    request reads there.
+    
+    Calling close() on the returned connection releases the session back
+    to the pool instead of tearing it down.
+    
+    Args:
+        shard: Region shard to connect to (default: the main database)
+        
+    Returns:
+        connection: A DBAPI connection proxied by the SQLAlchemy engine
+    """
+    if shard != MAIN_SHARD:
+        return db.engines[shard].raw_connection()
+    
+    target = read_target()
+    engine = db.engines[target] if target != 'primary' else db.engine
+    return engine.raw_connection()
+
+def get_pool_stats(target='primary'):
+    """
+    Get a snapshot of a session pool's statistics.
+    
+    Args:
+        target: 'primary', 'heavy', 'replica' or a shard bind name
+        
+    Returns:
+        stats: Pool sizing, open/busy sessions, checkout count and wait times
+    """
+    pool = _pools.get(target)
+    pool_min, pool_max = get_pool_size(target)
+    with _pool_lock:
+        counters = dict(_pool_counters.get(target, {}))
+    
+    checkouts = counters.get('checkouts', 0)
+    wait_time_total = counters.get('wait_time_total', 0.0)
+    return {
+        'min': pool_min,
+        'max': pool_max,
+        'increment': DB_POOL_INCREMENT,
+        'dsn': pool.dsn if pool is not None else None,
+        'open': pool.opened if pool is not None else 0,
+        'busy': pool.busy if pool is not None else 0,
+        'checkouts': checkouts,
+        'wait_time_total_ms': round(wait_time_total * 1000, 3),
+        'wait_time_avg_ms': round(wait_time_total * 1000 / checkouts, 3) if checkouts else 0.0,
+        'wait_time_max_ms': round(counters.get('wait_time_max', 0.0) * 1000, 3)
+    }
+
+@contextmanager
+def unit_of_work(write=False):
+    """
+    Yield the connection for the current unit of work.
+    
+    Inside a request every helper shares one connection and one transaction
+    per shard, which is committed or rolled back once when the request
+    finishes (see init_unit_of_work). Outside a request a connection is
+    checked out for the duration of the block and committed or rolled back
+    on exit.
+    
+    Args:
+        write: Whether the block modifies data and needs a commit
+        
+    Yields:
+        connection: A DBAPI connection to the current shard
+    """
+    shard = current_shard()
+    if not has_request_context():
+        connection = get_connection(shard)
+        try:
+            yield connection
+            if write:
+                connection.commit()
+        except Exception as e:
+            # A lost connection cannot roll back; drop it from the pool
+            if unit_dialect().is_disconnect(e):
+                connection.invalidate()
+            else:
+                connection.rollback()
+            raise
+        finally:
+            connection.close()
+        return
+    
+    if write and shard == MAIN_SHARD and read_target() != 'primary':
+        raise RuntimeError("Read-only requests cannot write to the database")
+    
+    if 'db_connections' not in g:
+        g.db_connections = {}
+        g.db_dirty = set()
+        g.db_failed = False
+    
+    connection = g.db_connections.get(shard)
+    if connection is None:
+        connection = g.db_connections[shard] = get_connection(shard)
+    
+    try:
+        yield connection
+    except Exception:
+        # Any failure dooms the whole unit of work
+        g.db_failed = True
+        raise
+    
+    if write:
+        g.db_dirty.add(shard)
+
+def unit_dialect():
+    """Get the dialect of the current unit of work's database."""
+    return current_dialect() if current_shard() == MAIN_SHARD else get_dialect()
+
+def run_in_unit_of_work(work, write=False):
+    """
+    Run work(connection) in the current unit of work, retrying it after
+    transient errors (see retry.py).
+    
+    A retried failure does not doom the unit of work. A lost connection is
+    replaced before the retry, unless it held uncommitted writes of this
+    request, which are gone with it. Every attempt is bounded by the
+    request's deadline (see deadlines.py), and the outcome is recorded on
+    the direct path's circuit breaker unless the edge copy served it.
+    
+    Args:
+        work: Callable taking the connection
+        write: Whether work modifies data
+        
+    Returns:
+        result: The result of work
+    """
+    dialect = unit_dialect()
+    failed = g.get('db_failed', False) if has_request_context() else False
+    
+    def attempt():
+        with unit_of_work(write=write) as connection, call_deadline(connection, dialect):
+            return work(connection)
+    
+    def before_retry(error):
+        if not has_request_context():
+            return True
+        if dialect.is_disconnect(error):
+            shard = current_shard()
+            if shard in g.get('db_dirty', ()):
+                return False
+            connection = g.get('db_connections', {}).pop(shard, None)
+            if connection is not None:
+                connection.invalidate()
+        g.db_failed = failed
+        return True
+    
+    if current_shard() == MAIN_SHARD and has_request_context() and read_target() == 'edge':
+        return call_with_retry(attempt, dialect, write, before_retry)
+    
+    start = time.perf_counter()
+    try:
+        result = call_with_retry(attempt, dialect, write, before_retry)
+    except Exception as e:
+        record_call('direct', time.perf_counter() - start, e, dialect)
+        raise
+    record_call('direct', time.perf_counter() - start)
+    return result
+
+def finish_unit_of_work(response):
+    """
+    Commit the request's unit of work if it wrote anything and succeeded,
+    otherwise roll it back, then release the connections.
+    
+    A request that wrote to several shards commits them one after the
+    other; the helpers never write to more than one.
+    
+    Args:
+        response: The response about to be sent
+        
+    Returns:
+        response: The same response, or a 500 response if the commit failed
+    """
+    connections = g.pop('db_connections', None)
+    if not connections:
+        return response
+    
+    commit = not g.db_failed and response.status_code < 400
+    try:
+        for shard, connection in connections.items():
+            if shard in g.db_dirty:
+                if commit:
+                    connection.commit()
+                else:
+                    connection.rollback()
+    except Exception as e:
+        release_connections(connections)
+        response = jsonify({
+            'success': False,
+            'message': str(e),
+            'error': 500
+        })
+        response.status_code = 500
+        return response
+    
+    release_connections(connections, rollback=False)
+    return response
+
+def release_connections(connections, rollback=True):
+    """
+    Roll back and close every connection of a unit of work, even when some
+    of them fail to; each failure is logged.
+    
+    Args:
+        connections: Dict of shard to connection
+        rollback: Whether to roll back before closing (default: True)
+    
+    Returns:
+        error: The first failure, or None
+    """
+    error = None
+    for shard, connection in connections.items():
+        for step in ((connection.rollback, connection.close) if rollback else (connection.close,)):
+            try:
+                step()
+            except Exception as e:
+                current_app.logger.error(f"Releasing the {shard} connection failed: {str(e)}")
+                error = error or e
+    return error
+
+def release_unit_of_work(exception=None):
+    """
+    Roll back and release a unit of work left open by an unhandled error,
+    raising the first failure once every connection is released.
+    """
+    error = release_connections(g.pop('db_connections', None) or {})
+    if error is not None:
+        raise error
+
+def init_unit_of_work(app):
+    """Register the request hooks that finish each request's unit of work."""
+    app.after_request(finish_unit_of_work)
+    app.teardown_request(release_unit_of_work)
+
+def execute_query(query, params=None, fetchall=True, arraysize=None, prefetchrows=None):
+    """
+    Execute a SQL query directly on the configured backend.
+    
+    Args:
+        query: The SQL query to execute, in the backend's dialect
+        params: Query parameters (optional)
+        fetchall: Whether to fetch all results (default: True)
+        arraysize: Rows fetched per round trip (optional)
+        prefetchrows: Rows returned with the execute round trip (optional)
+        
+    Returns:
+        results: Query results
+    """
+    def work(connection):
+        cursor = connection.cursor()
+        dialect = unit_dialect()
+        dialect.prepare_cursor(cursor, arraysize, prefetchrows)
+        try:
+            if params:
+                cursor.execute(query, bind_arrays(dialect, cursor, params))
+            else:
+                cursor.execute(query)
+            
+            if fetchall:
+                return cursor.fetchall()
+            return cursor.rowcount
+        finally:
+            cursor.close()
+    
+    record_statement(query)
+    # For INSERT, UPDATE, DELETE the unit of work takes care of the commit
+    return run_in_unit_of_work(work, write=not fetchall)
+
+def execute_named_query(name, params=None, fetchall=True):
+    """
+    Execute a statement from the query registry.
+    
+    The registered SQL text is sent unchanged so the session's statement
+    cache can reuse the parsed cursor, and the cursor is sized with the
+    fetch profile declared for the statement.
+    
+    Args:
+        name: Name of the registered statement
+        params: Query parameters (optional)
+        fetchall: Whether to fetch all results (default: True)
+        
+    Returns:
+        results: Query results
+    """
+    query = get_query(name)
+    start = time.perf_counter()
+    failed = False
+    
+    try:
+        return execute_query(query.statement(current_dialect()), params, fetchall,
+                             arraysize=query.arraysize, prefetchrows=query.prefetchrows)
+    except Exception:
+        failed = True
+        raise
+    finally:
+        record_execution(name, time.perf_counter() - start, failed)
+
+def get_scatter_executor():
+    """Get the worker threads of scatter-gather reads, creating them on first use."""
+    global _scatter_executor
+    if _scatter_executor is None:
+        with _scatter_lock:
+            if _scatter_executor is None:
+                _scatter_executor = ThreadPoolExecutor(max_workers=len(get_shards()) * DB_POOL_MAX,
+                                                       thread_name_prefix='shard-scatter')
+    return _scatter_executor
+
+def fetch_from_shard(engine, statement, params, arraysize, prefetchrows, expires=None):
+    """
+    Run a SELECT on its own connection to one shard and fetch every row,
+    retrying transient errors. expires is the caller's deadline, since the
+    worker thread has no request of its own.
+    """
+    dialect = get_dialect()
+    
+    def attempt():
+        connection = engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            try:
+                with call_deadline(connection, dialect, expires):
+                    dialect.prepare_cursor(cursor, arraysize, prefetchrows)
+                    cursor.execute(statement, bind_arrays(dialect, cursor, params or {}))
+                    return cursor.fetchall()
+            finally:
+                cursor.close()
+        except Exception as e:
+            if dialect.is_disconnect(e):
+                connection.invalidate()
+            raise
+        finally:
+            connection.close()
+    
+    return call_with_retry(attempt, dialect, expires=expires)
+
+def scatter_named_query(name, params=None):
+    """
+    Run a SELECT from the query registry on every shard in parallel.
+    
+    Each shard is read on its own connection, outside the request's unit
+    of work, so the slowest shard sets the latency instead of their sum.
+    
+    Args:
+        name: Name of the registered statement
+        params: Query parameters (optional)
+        
+    Returns:
+        results: The rows of each shard, in get_shards order
+    """
+    query = get_query(name)
+    statement = query.statement(get_dialect())
+    engines = [db.engine if shard == MAIN_SHARD else db.engines[shard] for shard in get_shards()]
+    expires = get_deadline()
+    start = time.perf_counter()
+    failed = False
+    
+    record_statement(statement)
+    record_scatter()
+    try:
+        executor = get_scatter_executor()
+        futures = [
+            executor.submit(fetch_from_shard, engine, statement, params, query.arraysize, query.prefetchrows, expires)
+            for engine in engines
+        ]
+        results = [future.result() for future in futures]
+    except DeadlineExceeded as e:
+        failed = True
+        mark_deadline_exceeded()
+        record_call('direct', time.perf_counter() - start, e)
+        raise
+    except Exception as e:
+        failed = True
+        record_call('direct', time.perf_counter() - start, e)
+        raise
+    finally:
+        record_execution(name, time.perf_counter() - start, failed)
+    
+    record_call('direct', time.perf_counter() - start)
+    return results
+
+def gather_named_query(name, params=None, key=None, limit=None):
+    """
+    Execute a SELECT from the query registry across the region shards.
+    
+    Without sharding this is execute_named_query. With sharding the
+    statement is scattered to every shard and the results are merged: in
+    key order when key is given (each shard's rows must already be in that
+    order), otherwise shard after shard.
+    
+    Args:
+        name: Name of the registered statement
+        params: Query parameters (optional)
+        key: Sort key of the merged rows (optional)
+        limit: Number of merged rows to keep, for keyset pages (optional)
+        
+    Returns:
+        results: Query results
+    """
+    if not shard_configured():
+        return execute_named_query(name, params)
+    
+    results = scatter_named_query(name, params)
+    if key is None:
+        return [row for rows in results for row in rows]
+    
+    rows = heapq.merge(*results, key=key)
+    return list(rows if limit is None else itertools.islice(rows, limit))
+
+def gather_batch_query(name, keys, key=None):
+    """
+    Execute a batch lookup from the query registry for a set of keys.
+    
+    The keys are sent in as few statements as the BATCH_SIZES allow,
+    padded with NULLs to the size of the statement used.
+    
+    Args:
+        name: Name of the batch lookup (see register_batch_query)
+        keys: Distinct keys to look up
+        key: Sort key of each shard's rows, to merge them in order (optional)
+        
+    Returns:
+        results: Rows of every batch
+    """
+    keys = list(keys)
+    rows = []
+    for start in range(0, len(keys), BATCH_SIZES[-1]):
+        batch = keys[start:start + BATCH_SIZES[-1]]
+        size = next(size for size in BATCH_SIZES if size >= len(batch))
+        params = {f'id{index}': batch[index] if index < len(batch) else None for index in range(size)}
+        rows.extend(gather_named_query(f'{name}[{size}]', params, key=key))
+    return rows
+
+def gather_many(name, ids, build, element_type=int, sharded=True):
+    """
+    Look up records by key with one statement, in the order of the keys.
+    
+    Args:
+        name: Name of a multi-get lookup, reading the keys from TABLE(:ids)
+        ids: Distinct keys, in the order to return the records
+        build: Function building a record from a row whose first column is its key
+        element_type: Type of the keys (int or str)
+        sharded: Whether the rows live on the region shards, or only in the main database
+        
+    Returns:
+        (records, not_found): The records found, in the order of ids, and the keys of none
+    """
+    params = {'ids': ArrayBind(ids, element_type)}
+    rows = gather_named_query(name, params) if sharded else execute_named_query(name, params)
+    found = {row[0]: row for row in rows}
+    return [build(found[key]) for key in ids if key in found], [key for key in ids if key not in found]
+
+def locate_shard(resource, key, write=False):
+    """
+    Get the shard holding an employee or department, looking for it on
+    every shard the first time.
+    
+    A key found on no shard is remembered as missing for a few seconds
+    (DB_SHARD_MISS_TTL). Writes look again, since another process may have
+    just created the record.
+    
+    Args:
+        resource: 'employees' or 'departments'
+        key: Primary key
+        write: Whether the caller is about to write (default: False)
+        
+    Returns:
+        shard: A shard name; the main database if sharding is off or the key does not exist
+    """
+    if not shard_configured():
+        return MAIN_SHARD
+    
+    shard = cached_shard(resource, key)
+    if shard is not None:
+        return shard
+    if not write and known_missing(resource, key):
+        return MAIN_SHARD
+    
+    for shard, rows in zip(get_shards(), scatter_named_query(f'{resource}.exists', {'id': key})):
+        if rows:
+            remember_shard(resource, key, shard)
+            return shard
+    remember_missing(resource, key)
+    return MAIN_SHARD
+
+def check_manager_shard(manager_id, shard):
+    """
+    Reject a manager held by another shard than the employee or department
+    they manage, since the foreign key cannot cross databases.
+    
+    Raises:
+        CrossShardWriteError: If the manager is in another region's shard
+    """
+    if manager_id and shard_configured() and locate_shard('employees', manager_id, write=True) != shard:
+        raise CrossShardWriteError("A manager from another region is not supported")
+
+def check_email_unique(email, employee_id=None):
+    """
+    Reject an email another employee uses on any shard. Each shard's unique
+    constraint only covers its own rows, so with DB_SHARDS set every shard
+    is asked before the write; two concurrent writes of the same email to
+    different shards can still both pass.
+    
+    Args:
+        email: Email about to be written
+        employee_id: Employee being updated, who may keep their own email (optional)
+        
+    Raises:
+        DuplicateRecordError: If another employee uses the email
+    """
+    if not email or not shard_configured():
+        return
+    for rows in scatter_named_query('employees.email_owner', {'email': email}):
+        if any(row[0] != employee_id for row in rows):
+            raise DuplicateRecordError(f"Email '{email}' is already in use")
+
+def location_shard(location_id):
+    """Get the shard holding the departments of a location, by the location's region."""
+    if not shard_configured() or location_id is None:
+        return MAIN_SHARD
+    
+    with on_shard(MAIN_SHARD):
+        rows = execute_named_query('locations.region', {'loc_id': location_id})
+    return shard_for_region(rows[0][0]) if rows else MAIN_SHARD
+
+class DuplicateRecordError(Exception):
+    """Raised when a write violates a unique constraint."""
+
+# Out binds of the single-round-trip writes, in employee_from_row order
+EMPLOYEE_OUT_BINDS = [
+    ('r_employee_id', int),
+    ('r_first_name', str),
+    ('r_last_name', str),
+    ('r_email', str),
+    ('r_phone_number', str),
+    ('r_hire_date', oracledb.DB_TYPE_DATE),
+    ('r_job_id', str),
+    ('r_salary', float),
+    ('r_commission_pct', float),
+    ('r_manager_id', int),
+    ('r_department_id', int),
+    ('r_department_name', str),
+    ('r_job_title', str),
+    ('r_row_count', int)
+]
+
+# Out binds of the single-round-trip writes, in department_from_rows order
+DEPARTMENT_OUT_BINDS = [
+    ('r_department_id', int),
+    ('r_department_name', str),
+    ('r_manager_id', int),
+    ('r_manager_first_name', str),
+    ('r_location_city', str),
+    ('r_location_country', str),
+    ('r_job_title', str),
+    ('r_location_id', int),
+    ('r_row_count', int)
+]
+
+def execute_returning(query, params, out_binds, duplicate_message=None):
+    """
+    Execute a write that hands its resulting row back through out binds,
+    so the write and the read-back cost a single round trip.
+    
+    Args:
+        query: A PL/SQL block on Oracle, or a list of RETURNING steps on SQLite
+        params: Input parameters
+        out_binds: List of (name, type) pairs for the out binds
+        duplicate_message: Message for a unique-constraint violation (optional)
+        
+    Returns:
+        values: Dict of out bind name to value; REF CURSOR binds are fetched into row lists
+        
+    Raises:
+        DuplicateRecordError: If the write violates a unique constraint
+    """
+    dialect = get_dialect()
+    
+    def work(connection):
+        cursor = connection.cursor()
+        try:
+            return dialect.execute_returning(cursor, query, params, out_binds)
+        except Exception as e:
+            if dialect.is_unique_violation(e):
+                raise DuplicateRecordError(duplicate_message or 'A record with the same unique value already exists')
+            raise
+        finally:
+            cursor.close()
+    
+    record_statement(query)
+    return run_in_unit_of_work(work, write=True)
+
+def execute_named_returning(name, params, out_binds, duplicate_message=None):
+    """
+    Execute a single-round-trip write from the query registry.
+    
+    See execute_returning for the arguments and return value.
+    """
+    query = get_query(name)
+    start = time.perf_counter()
+    failed = False
+    
+    try:
+        return execute_returning(query.statement(get_dialect()), params, out_binds, duplicate_message)
+    except Exception:
+        failed = True
+        raise
+    finally:
+        record_execution(name, time.perf_counter() - start, failed)
+
+def execute_group_write(name, params, duplicate_message=None):
+    """
+    Execute a write through the group-commit layer of the current shard.
+    
+    The write commits with the other writes of its batch, outside the
+    request's unit of work, before this call returns. The wait is bounded
+    by the request's deadline and recorded on the direct path's breaker.
+    
+    Args:
+        name: A statement listed in group_commit.GROUP_WRITES
+        params: Input parameters of the row
+        duplicate_message: Message for a unique-constraint violation (optional)
+        
+    Returns:
+        row: The written row, or None if no row matched
+        
+    Raises:
+        DuplicateRecordError: If the row violates a unique constraint
+        DeadlineExceeded: If the batch did not commit within the request's deadline
+    """
+    shard = current_shard()
+    engine = db.engine if shard == MAIN_SHARD else db.engines[shard]
+    dialect = get_dialect()
+    expires = get_deadline()
+    start = time.perf_counter()
+    
+    try:
+        timeout = remaining_ms(expires) / 1000 if expires is not None else None
+        try:
+            row = get_committer(name, shard, engine).submit(params, timeout)
+        except TimeoutError as e:
+            mark_deadline_exceeded()
+            raise DeadlineExceeded(str(e)) from e
+    except Exception as e:
+        record_call('direct', time.perf_counter() - start, e, dialect)
+        if dialect.is_unique_violation(e):
+            raise DuplicateRecordError(duplicate_message or 'A record with the same unique value already exists')
+        raise
+    record_call('direct', time.perf_counter() - start)
+    return row
+
+# Updatable fields of the fixed-shape employees.update/departments.update statements
+EMPLOYEE_UPDATE_FIELDS = [
+    'first_name', 'last_name', 'email', 'phone_number', 'job_id',
+    'salary', 'commission_pct', 'manager_id', 'department_id'
+]
+DEPARTMENT_UPDATE_FIELDS = ['department_name', 'department_id', 'location_id', 'manager_id']
+
+def update_params(data, fields):
+    """
+    Build the binds of a fixed-shape update.
+    
+    Every field is bound on every call, with a set_<field> flag telling the
+    statement whether to write it or keep the existing value.
+    
+    Raises:
+        ValueError: If data contains none of the fields
+    """
+    if not any(field in data for field in fields):
+        raise ValueError("No fields provided for update")
+    
+    params = {}
+    for field in fields:
+        params[f'set_{field}'] = 1 if field in data else 0
+        params[field] = data.get(field)
+    return params
+
+def employee_from_out_binds(values):
+    """Build an employee dict from the out binds of a single-round-trip write."""
+    if not values['r_row_count']:
+        return None
+    return employee_from_row([values[name] for name, _ in EMPLOYEE_OUT_BINDS[:-1]])
+
+def department_from_out_binds(values, emp_rows):
+    """Build a department detail dict from the out binds of a single-round-trip write."""
+    if not values['r_row_count']:
+        return None
+    return department_from_rows([values[name] for name, _ in DEPARTMENT_OUT_BINDS[:7]], emp_rows)
+
+def split_detail_rows(rows, parent_width):
+    """
+    Fold the rows of a single-round-trip detail statement into the parent
+    row and its child rows.
+    
+    Every row repeats the parent columns followed by one child's columns;
+    a parent without children comes back as one row of NULL child columns.
+    
+    Args:
+        rows: Result rows of the detail statement
+        parent_width: Number of leading parent columns
+        
+    Returns:
+        (parent, children): The parent row and the list of child rows
+    """
+    parent = rows[0][:parent_width]
+    children = [row[parent_width:] for row in rows if row[parent_width] is not None]
+    return parent, children
+
+def iso_date(value):
+    """Format a date column; Oracle returns date objects and SQLite ISO strings."""
+    if value is None or isinstance(value, str):
+        return value
+    return value.isoformat()
+
+def employee_from_row(row):
+    """Build an employee dict from an employees.list/employees.get row."""
+    return {
+        "employee_id": row[0],
+        "first_name": row[1],
+        "last_name": row[2],
+        "email": row[3],
+        "phone_number": row[4],
+        "hire_date": iso_date(row[5]),
+        "job_id": row[6],
+        "salary": row[7],
+        "commission_pct": row[8],
+        "manager_id": row[9],
+        "department_id": row[10],
+        "department_name": row[11],
+        "job_title": row[12]
+    }
+
+def department_from_rows(row, emp_rows):
+    """Build a department detail dict from a departments.get row and its employee rows."""
+    employees = [
+        {
+            "employee_id": emp[0],
+            "first_name": emp[1],
+            "last_name": emp[2],
+            "job_id": emp[3]
+        }
+        for emp in emp_rows
+    ]
+    
+    return {
+        "department_id": row[0],
+        "department_name": row[1],
+        "manager_id": row[2],
+        "manager_first_name": row[3] if row[3] else 'Not Assigned',  # Manager's first name
+        "location_city": row[4] if row[4] else 'Not Specified',  # Location city
+        "location_country": row[5] if row[5] else 'Not Specified',  # Location country
+        "job_title": row[6] if row[6] else 'Not Assigned',  # Job title of the manager
+        "employees": employees
+    }
+
+def job_from_rows(row, emp_rows):
+    """Build a job detail dict from a jobs.get row and its employee rows."""
+    employees = [
+        {
+            "employee_id": emp[0],
+            "first_name": emp[1],
+            "last_name": emp[2],
+            "department_id": emp[3]
+        }
+        for emp in emp_rows
+    ]
+    
+    return {
+        "job_id": row[0],
+        "job_title": row[1],
+        "min_salary": row[2],
+        "max_salary": row[3],
+        "employees": employees
+    }
+
+def location_from_rows(row, dept_rows):
+    """Build a location detail dict from a locations.get row and its department rows."""
+    departments = [
+        {
+            "department_id": dept[0],
+            "department_name": dept[1],
+            "manager_id": dept[2]
+        }
+        for dept in dept_rows
+    ]
+    
+    return {
+        "location_id": row[0],
+        "street_address": row[1],
+        "postal_code": row[2],
+        "city": row[3],
+        "state_province": row[4],
+        "country_id": row[5],
+        "country_name": row[6],
+        "departments": departments
+    }
+
+def location_from_row(row):
+    """Build a location dict from the location columns of a row, as in locations.list."""
+    return {
+        "location_id": row[0],
+        "street_address": row[1],
+        "postal_code": row[2],
+        "city": row[3],
+        "state_province": row[4],
+        "country_id": row[5],
+        "country_name": row[6]
+    }
 
-def get_connection():
-    """
-    Get a direct connection to the Oracle database using the approach
-    that's working in the example code.
-    
-    Returns:
-        connection: An oracledb connection object
-    """
-    connection = oracledb.connect(user=ORACLE_USER, password=ORACLE_PASSWORD, dsn=ORACLE_DSN)
-    return connection
+def department_summary_from_row(row):
+    """Build a department dict from a departments.by_ids row."""
+    return {
+        "department_id": row[0],
+        "department_name": row[1],
+        "manager_id": row[2],
+        "location_id": row[3]
+    }
 
-def execute_query(query, params=None, fetchall=True):
-    """
-    Execute a SQL query directly using oracledb.
-    
-    Args:
-        query: The SQL query to execute
-        params: Query parameters (optional)
-        fetchall: Whether to fetch all results (default: True)
-        
-    Returns:
-        results: Query results
-    """
-    connection = get_connection()
-    cursor = connection.cursor()
-    
-    try:
-        if params:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
-        
-        if fetchall:
-            results = cursor.fetchall()
-        else:
-            # For INSERT, UPDATE, DELETE
-            connection.commit()
-            results = cursor.rowcount
-    except Exception as e:
-        connection.rollback()
-        raise e
-    finally:
-        cursor.close()
-        connection.close()
-    
-    return results
+def job_history_from_row(row):
+    """Build a job history dict from a job_history.by_employees row."""
+    return {
+        "employee_id": row[0],
+        "start_date": iso_date(row[1]),
+        "end_date": iso_date(row[2]),
+        "job_id": row[3],
+        "job_title": row[4],
+        "department_id": row[5],
+        "department_name": row[6]
+    }
 
 # def get_departments():
 #     """Get all departments using direct connection."""
@@ -67,50 +1091,52 @@ def execute_query(query, params=None, fetchall=True):
 #     ]
 
 
-def get_departments():
-    """Get all departments with manager first name, last name, location city, location country, and job title."""
+def get_departments(limit=None, after=None):
+    """
+    Get departments with manager first name, last name, location city, location country, and job title.
+    
+    Args:
+        limit: Page size; all departments are returned when omitted
+        after: Return departments with an ID greater than this one (optional)
+    """
     
     # Modified SQL query to join HR_DEPARTMENTS, HR_EMPLOYEES, HR_LOCATIONS, and HR_JOBS
-    query = """
-    SELECT 
-        d.DEPARTMENT_ID,
-        d.DEPARTMENT_NAME,
-        d.MANAGER_ID,
-        e.FIRST_NAME AS MANAGER_FIRST_NAME,
-        e.LAST_NAME AS MANAGER_LAST_NAME,  -- Added last name
-        l.CITY AS LOCATION_CITY,
-        c.COUNTRY_NAME AS LOCATION_COUNTRY,
-        j.JOB_TITLE AS JOB_TITLE
-    FROM HR_DEPARTMENTS d
-    LEFT JOIN HR_EMPLOYEES e ON d.MANAGER_ID = e.EMPLOYEE_ID
-    LEFT JOIN HR_LOCATIONS l ON d.LOCATION_ID = l.LOCATION_ID
-    LEFT JOIN HR_COUNTRIES c ON l.COUNTRY_ID = c.COUNTRY_ID
-    LEFT JOIN HR_JOBS j ON e.JOB_ID = j.JOB_ID
-    """
-    
-    rows = execute_query(query)
+    if limit is None:
+        rows = gather_named_query('departments.list')
+    else:
+        rows = gather_named_query('departments.page', {'after': -1 if after is None else after, 'limit': limit},
+                                  key=lambda row: row[0], limit=limit)
     
     # Return the list of departments with the added manager first name, last name, location info, and job title
-    return [
-        {
-            "department_id": row[0],
-            "department_name": row[1],
-            "manager_id": row[2],
-            "manager_first_name": row[3] if row[3] else 'Not Assigned',  # Manager's first name
-            "manager_last_name": row[4] if row[4] else 'Not Assigned',  # Manager's last name
-            "location_city": row[5] if row[5] else 'Not Specified',  # Location city
-            "location_country": row[6] if row[6] else 'Not Specified',  # Location country
-            "job_title": row[7] if row[7] else 'Not Assigned'  # Job title of the manager
-        }
-        for row in rows
-    ]
+    return [department_list_from_row(row) for row in rows]
+
+def department_list_from_row(row):
+    """Build a department dict from a departments.list/departments.page row."""
+    return {
+        "department_id": row[0],
+        "department_name": row[1],
+        "manager_id": row[2],
+        "manager_first_name": row[3] if row[3] else 'Not Assigned',  # Manager's first name
+        "manager_last_name": row[4] if row[4] else 'Not Assigned',  # Manager's last name
+        "location_city": row[5] if row[5] else 'Not Specified',  # Location city
+        "location_country": row[6] if row[6] else 'Not Specified',  # Location country
+        "job_title": row[7] if row[7] else 'Not Assigned'  # Job title of the manager
+    }
+
+def get_departments_by_ids(department_ids):
+    """
+    Get the departments with the given IDs in one statement.
+    
+    Returns:
+        (departments, not_found): See gather_many
+    """
+    return gather_many('departments.get_many', department_ids, department_list_from_row)
 
 
 
 def get_department_options():
     """Get departments for dropdown options."""
-    query = "SELECT DEPARTMENT_ID, DEPARTMENT_NAME FROM HR_DEPARTMENTS ORDER BY DEPARTMENT_NAME"
-    rows = execute_query(query)
+    rows = gather_named_query('departments.options', key=lambda row: row[1] or '')
     
     return [
         {
@@ -122,23 +1148,31 @@ def get_department_options():
 
 def get_jobs():
     """Get all jobs using direct connection."""
-    query = "SELECT JOB_ID, JOB_TITLE, MIN_SALARY, MAX_SALARY FROM HR_JOBS"
-    rows = execute_query(query)
+    rows = execute_named_query('jobs.list')
     
-    return [
-        {
-            "job_id": row[0],
-            "job_title": row[1],
-            "min_salary": row[2],
-            "max_salary": row[3]
-        }
-        for row in rows
-    ]
+    return [job_from_row(row) for row in rows]
+
+def job_from_row(row):
+    """Build a job dict from a jobs.list row."""
+    return {
+        "job_id": row[0],
+        "job_title": row[1],
+        "min_salary": row[2],
+        "max_salary": row[3]
+    }
+
+def get_jobs_by_ids(job_ids):
+    """
+    Get the jobs with the given IDs in one statement.
+    
+    Returns:
+        (jobs, not_found): See gather_many
+    """
+    return gather_many('jobs.get_many', job_ids, job_from_row, element_type=str, sharded=False)
 
 def get_job_options():
     """Get jobs for dropdown options."""
-    query = "SELECT JOB_ID, JOB_TITLE FROM HR_JOBS ORDER BY JOB_TITLE"
-    rows = execute_query(query)
+    rows = execute_named_query('jobs.options')
     
     return [
         {
@@ -150,13 +1184,7 @@ def get_job_options():
 
 def get_location_options():
     """Get locations for dropdown options."""
-    query = """
-    SELECT l.LOCATION_ID, l.CITY || ', ' || l.STATE_PROVINCE || ' (' || c.COUNTRY_NAME || ')' AS LOCATION_DISPLAY
-    FROM HR_LOCATIONS l
-    LEFT JOIN HR_COUNTRIES c ON l.COUNTRY_ID = c.COUNTRY_ID
-    ORDER BY l.CITY
-    """
-    rows = execute_query(query)
+    rows = execute_named_query('locations.options')
     
     return [
         {
@@ -166,90 +1194,52 @@ def get_location_options():
         for row in rows
     ]
 
-def get_employees():
-    """Get all employees using direct connection."""
-    query = """
-    SELECT e.EMPLOYEE_ID, e.FIRST_NAME, e.LAST_NAME, e.EMAIL, 
-           e.PHONE_NUMBER, e.HIRE_DATE, e.JOB_ID, e.SALARY, 
-           e.COMMISSION_PCT, e.MANAGER_ID, e.DEPARTMENT_ID,
-           d.DEPARTMENT_NAME, j.JOB_TITLE
-    FROM HR_EMPLOYEES e
-    LEFT JOIN HR_DEPARTMENTS d ON e.DEPARTMENT_ID = d.DEPARTMENT_ID
-    LEFT JOIN HR_JOBS j ON e.JOB_ID = j.JOB_ID
+def get_employees(limit=None, after=None):
     """
-    rows = execute_query(query)
+    Get employees using direct connection.
     
-    return [
-        {
-            "employee_id": row[0],
-            "first_name": row[1],
-            "last_name": row[2],
-            "email": row[3],
-            "phone_number": row[4],
-            "hire_date": row[5].isoformat() if row[5] else None,
-            "job_id": row[6],
-            "salary": row[7],
-            "commission_pct": row[8],
-            "manager_id": row[9],
-            "department_id": row[10],
-            "department_name": row[11],
-            "job_title": row[12]
-        }
-        for row in rows
-    ]
+    Args:
+        limit: Page size; all employees are returned when omitted
+        after: Return employees with an ID greater than this one (optional)
+    """
+    if limit is None:
+        rows = gather_named_query('employees.list')
+    else:
+        rows = gather_named_query('employees.page', {'after': -1 if after is None else after, 'limit': limit},
+                                  key=lambda row: row[0], limit=limit)
+    
+    return [employee_from_row(row) for row in rows]
 
 def get_employee(employee_id):
     """Get a single employee by ID."""
-    query = """
-    SELECT e.EMPLOYEE_ID, e.FIRST_NAME, e.LAST_NAME, e.EMAIL, 
-           e.PHONE_NUMBER, e.HIRE_DATE, e.JOB_ID, e.SALARY, 
-           e.COMMISSION_PCT, e.MANAGER_ID, e.DEPARTMENT_ID,
-           d.DEPARTMENT_NAME, j.JOB_TITLE
-    FROM HR_EMPLOYEES e
-    LEFT JOIN HR_DEPARTMENTS d ON e.DEPARTMENT_ID = d.DEPARTMENT_ID
-    LEFT JOIN HR_JOBS j ON e.JOB_ID = j.JOB_ID
-    WHERE e.EMPLOYEE_ID = :emp_id
-    """
-    rows = execute_query(query, {'emp_id': employee_id})
+    with on_shard(locate_shard('employees', employee_id)):
+        rows = execute_named_query('employees.get', {'emp_id': employee_id})
     
     if not rows:
         return None
     
-    row = rows[0]
-    return {
-        "employee_id": row[0],
-        "first_name": row[1],
-        "last_name": row[2],
-        "email": row[3],
-        "phone_number": row[4],
-        "hire_date": row[5].isoformat() if row[5] else None,
-        "job_id": row[6],
-        "salary": row[7],
-        "commission_pct": row[8],
-        "manager_id": row[9],
-        "department_id": row[10],
-        "department_name": row[11],
-        "job_title": row[12]
-    }
+    return employee_from_row(rows[0])
+
+def get_employees_by_ids(employee_ids):
+    """
+    Get the employees with the given IDs in one statement (per shard).
+    
+    Returns:
+        (employees, not_found): See gather_many
+    """
+    return gather_many('employees.get_many', employee_ids, employee_from_row)
 
 def create_employee(data):
-    """Create a new employee."""
-    query = """
-    BEGIN
-    INSERT INTO HR_EMPLOYEES (
-        EMPLOYEE_ID, FIRST_NAME, LAST_NAME, EMAIL, PHONE_NUMBER,
-        HIRE_DATE, JOB_ID, SALARY, COMMISSION_PCT, MANAGER_ID, DEPARTMENT_ID
-    ) VALUES (
-        HR_EMPLOYEES_SEQ.NEXTVAL, :first_name, :last_name, :email, :phone_number,
-        TO_DATE(:hire_date, 'YYYY-MM-DD'), :job_id, :salary, :commission_pct, :manager_id, :department_id
-    ) RETURNING EMPLOYEE_ID INTO :employee_id;
-    END;
-    """
-
-    connection = get_connection()
-    cursor = connection.cursor()
+    """
+    Create a new employee and return the inserted row in the same round trip.
+    
+    Raises:
+        DuplicateRecordError: If the email is already in use
+        CrossShardWriteError: If the manager is in another region's shard
+    """
     # Default values for nullable fields
     params = {
+        'employee_id': allocate_id('employees'),
         'first_name': data.get('first_name'),
         'last_name': data.get('last_name'),
         'email': data.get('email'),
@@ -259,321 +1249,334 @@ def create_employee(data):
         'hire_date': data.get('hire_date') or None,
         'commission_pct': data.get('commission_pct') or None,
         'manager_id': data.get('manager_id') or None,
-        'department_id': data.get('department_id') or None,
-        'employee_id': cursor.var(oracledb.NUMBER)  # Output parameter
+        'department_id': data.get('department_id') or None
     }
-
-    try:
-        cursor.execute(query, params)
-        employee_id = params['employee_id'].getvalue()
-        connection.commit()
-
-        # Get the newly created employee
-        employee = get_employee(employee_id)
-        return employee
-    except Exception as e:
-        connection.rollback()
-        raise e
-    finally:
-        cursor.close()
-        connection.close()
+    
+    # Employees live with their department; those without one stay in the main database
+    shard = locate_shard('departments', params['department_id'], write=True) if params['department_id'] else MAIN_SHARD
+    check_manager_shard(params['manager_id'], shard)
+    check_email_unique(params['email'])
+    with on_shard(shard):
+        values = execute_named_returning('employees.insert', params, EMPLOYEE_OUT_BINDS,
+                                         duplicate_message=f"Email '{params['email']}' is already in use")
+    remember_shard('employees', params['employee_id'], shard)
+    return employee_from_out_binds(values)
 
 def update_employee(employee_id, data):
-    """Update an existing employee."""
-    # Build dynamic query based on provided fields
-    set_clauses = []
-    params = {'employee_id': employee_id}
-    
-    # Map fields to Oracle column names and build SET clauses
-    field_mapping = {
-        'first_name': 'FIRST_NAME',
-        'last_name': 'LAST_NAME',
-        'email': 'EMAIL',
-        'phone_number': 'PHONE_NUMBER',
-        'job_id': 'JOB_ID',
-        'salary': 'SALARY',
-        'commission_pct': 'COMMISSION_PCT',
-        'manager_id': 'MANAGER_ID',
-        'department_id': 'DEPARTMENT_ID'
-    }
-    
-    for field, column in field_mapping.items():
-        if field in data:
-            set_clauses.append(f"{column} = :{field}")
-            params[field] = data.get(field)
-    
-    if not set_clauses:
-        raise ValueError("No fields provided for update")
+    """
+    Update an existing employee and return the updated row in the same round trip.
     
-    query = f"""
-    UPDATE HR_EMPLOYEES
-    SET {', '.join(set_clauses)}
-    WHERE EMPLOYEE_ID = :employee_id
+    Returns:
+        employee: The updated employee, or None if it does not exist
+        
+    Raises:
+        DuplicateRecordError: If the new email is already in use
+        CrossShardWriteError: If the new department or manager is in another region's shard
     """
+    params = update_params(data, EMPLOYEE_UPDATE_FIELDS)
+    params['employee_id'] = employee_id
     
-    result = execute_query(query, params, fetchall=False)
+    shard = locate_shard('employees', employee_id, write=True)
+    if data.get('department_id') and locate_shard('departments', data['department_id'], write=True) != shard:
+        raise CrossShardWriteError("Moving an employee to a department in another region is not supported")
+    check_manager_shard(data.get('manager_id'), shard)
+    check_email_unique(data.get('email'), employee_id)
     
-    # Get the updated employee
-    employee = get_employee(employee_id)
-    return employee
+    duplicate_message = f"Email '{data.get('email')}' is already in use"
+    with on_shard(shard):
+        if group_commit_enabled():
+            row = execute_group_write('employees.update', params, duplicate_message)
+            return employee_from_row(row) if row else None
+        
+        values = execute_named_returning('employees.update', params, EMPLOYEE_OUT_BINDS,
+                                         duplicate_message=duplicate_message)
+    return employee_from_out_binds(values)
 
 def delete_employee(employee_id):
-    """Delete an employee."""
-    query = "DELETE FROM HR_EMPLOYEES WHERE EMPLOYEE_ID = :employee_id"
-    result = execute_query(query, {'employee_id': employee_id}, fetchall=False)
-    return result > 0  # Return True if a row was deleted
+    """
+    Delete an employee.
+    
+    Returns:
+        employee: The deleted employee, or None if it did not exist
+    """
+    with on_shard(locate_shard('employees', employee_id, write=True)):
+        values = execute_named_returning('employees.delete', {'employee_id': employee_id}, EMPLOYEE_OUT_BINDS)
+    forget_shard('employees', employee_id)
+    return employee_from_out_binds(values)
 
 def get_department(department_id):
     """Get a single department by ID with manager first name, location city, location country, and job title."""
     
-    query = """
-    SELECT 
-        d.DEPARTMENT_ID,
-        d.DEPARTMENT_NAME,
-        d.MANAGER_ID,
-        e.FIRST_NAME AS MANAGER_FIRST_NAME,
-        l.CITY AS LOCATION_CITY,
-        c.COUNTRY_NAME AS LOCATION_COUNTRY,
-        j.JOB_TITLE AS JOB_TITLE
-    FROM HR_DEPARTMENTS d
-    LEFT JOIN HR_EMPLOYEES e ON d.MANAGER_ID = e.EMPLOYEE_ID
-    LEFT JOIN HR_LOCATIONS l ON d.LOCATION_ID = l.LOCATION_ID
-    LEFT JOIN HR_COUNTRIES c ON l.COUNTRY_ID = c.COUNTRY_ID
-    LEFT JOIN HR_JOBS j ON e.JOB_ID = j.JOB_ID
-    WHERE d.DEPARTMENT_ID = :dept_id
-    """
-    
-    rows = execute_query(query, {'dept_id': department_id})
+    # The department and its employees come back from one statement
+    with on_shard(locate_shard('departments', department_id)):
+        rows = execute_named_query('departments.get', {'dept_id': department_id})
     
     if not rows:
         return None
     
-    row = rows[0]
-    
-    # Get employees in this department
-    emp_query = """
-    SELECT EMPLOYEE_ID, FIRST_NAME, LAST_NAME, JOB_ID
-    FROM HR_EMPLOYEES
-    WHERE DEPARTMENT_ID = :dept_id
-    """
-    
-    emp_rows = execute_query(emp_query, {'dept_id': department_id})
-    
-    employees = [
-        {
-            "employee_id": emp[0],
-            "first_name": emp[1],
-            "last_name": emp[2],
-            "job_id": emp[3]
-        }
-        for emp in emp_rows
-    ]
-    
-    return {
-        "department_id": row[0],
-        "department_name": row[1],
-        "manager_id": row[2],
-        "manager_first_name": row[3] if row[3] else 'Not Assigned',  # Manager's first name
-        "location_city": row[4] if row[4] else 'Not Specified',  # Location city
-        "location_country": row[5] if row[5] else 'Not Specified',  # Location country
-        "job_title": row[6] if row[6] else 'Not Assigned',  # Job title of the manager
-        "employees": employees
-    }
+    return department_from_rows(*split_detail_rows(rows, 7))
 
 
 
 def create_department(data):
-    """Create a new department."""
-    query = """
-    BEGIN
-        INSERT INTO HR_DEPARTMENTS (
-            DEPARTMENT_ID, DEPARTMENT_NAME, MANAGER_ID, LOCATION_ID
-        ) VALUES (
-            :department_id, :department_name, :manager_id, :location_id
-        ) RETURNING DEPARTMENT_ID INTO :department_id;
-    END;
     """
-
-    connection = get_connection()
-    cursor = connection.cursor()
+    Create a new department and return the inserted row in the same round trip.
+    
+    The department ID always comes from the departments sequence; an ID
+    sent by the client is ignored, since it could fall inside a block
+    another process has already reserved.
     
+    Raises:
+        DuplicateRecordError: If the department ID is already in use
+        CrossShardWriteError: If the manager is in another region's shard
+    """
     # Prepare the parameters for the insertion
     params = {
         'department_name': data.get('department_name'),
         'manager_id': data.get('manager_id'),
         'location_id': data.get('location_id'),
-        'department_id': data.get('department_id')
+        'department_id': allocate_id('departments')
     }
-    print(params)
-    try:
-        cursor.execute(query, params)
-
-        # Fetch the department_id from the bind variable
-        department_id = params['department_id']
-
-        # Commit the transaction
-        connection.commit()
-
-        # Get the newly created department (you can define this function to retrieve department data)
-        department = get_department(department_id)
-
-        return department
-
-    except Exception as e:
-        connection.rollback()
-        raise e
-
-    finally:
-        cursor.close()
-        connection.close()
- 
-
+    
+    # Departments live in the shard of their location's region
+    shard = location_shard(params['location_id'])
+    check_manager_shard(params['manager_id'], shard)
+    with on_shard(shard):
+        values = execute_named_returning('departments.insert', params, DEPARTMENT_OUT_BINDS,
+                                         duplicate_message=f"Department with ID {params['department_id']} already exists")
+    remember_shard('departments', params['department_id'], shard)
+    
+    # A new department has no employees yet
+    return department_from_out_binds(values, [])
 
 def update_department(department_id, data):
-    """Update an existing department."""
-    # Build dynamic query based on provided fields
-    set_clauses = []
-    params = {'department_id': department_id}
-    
-    # Map fields to Oracle column names and build SET clauses
-    field_mapping = {
-        'department_name': 'DEPARTMENT_NAME',
-        'department_id': 'DEPARTMENT_ID',
-        'location_id': 'LOCATION_ID',
-        'manager_id': 'MANAGER_ID'
-    }
+    """
+    Update an existing department and return the updated row in the same round trip.
     
-    for field, column in field_mapping.items():
-        if field in data:
-            set_clauses.append(f"{column} = :{field}")
-            params[field] = data.get(field)
+    Returns:
+        department: The updated department, or None if it does not exist
+        
+    Raises:
+        DuplicateRecordError: If the new department ID is already in use
+        CrossShardWriteError: If the new location or manager is in another region's shard
+    """
+    params = update_params(data, DEPARTMENT_UPDATE_FIELDS)
+    params['current_department_id'] = department_id
     
-    if not set_clauses:
-        raise ValueError("No fields provided for update")
+    shard = locate_shard('departments', department_id, write=True)
+    if data.get('location_id') and location_shard(data['location_id']) != shard:
+        raise CrossShardWriteError("Moving a department to a location in another region is not supported")
+    check_manager_shard(data.get('manager_id'), shard)
     
-    query = f"""
-    UPDATE HR_DEPARTMENTS
-    SET {', '.join(set_clauses)}
-    WHERE DEPARTMENT_ID = :department_id
-    """
-        
-    result = execute_query(query, params, fetchall=False)
+    with on_shard(shard):
+        values = execute_named_returning('departments.update', params,
+                                         DEPARTMENT_OUT_BINDS + [('r_employees', oracledb.DB_TYPE_CURSOR)],
+                                         duplicate_message=f"Department with ID {data.get('department_id')} already exists")
     
-    # Get the updated departments
-    department = get_department(department_id)
+    department = department_from_out_binds(values, values['r_employees'])
+    if department and department['department_id'] != department_id:
+        forget_shard('departments', department_id)
+        remember_shard('departments', department['department_id'], shard)
     return department
 
 def delete_department(department_id):
-    """Delete an department."""
-    query = "DELETE FROM HR_DEPARTMENTS WHERE DEPARTMENT_ID = :department_id"
-    result = execute_query(query, {'department_id': department_id}, fetchall=False)
-    return result > 0  # Return True if a row was deleted
+    """
+    Delete a department.
+    
+    Returns:
+        department: The deleted department, or None if it did not exist
+    """
+    with on_shard(locate_shard('departments', department_id, write=True)):
+        values = execute_named_returning('departments.delete', {'department_id': department_id}, DEPARTMENT_OUT_BINDS)
+    forget_shard('departments', department_id)
+    return department_from_out_binds(values, [])
 
 
 
 def get_job(job_id):
     """Get a single job by ID."""
-    query = """
-    SELECT JOB_ID, JOB_TITLE, MIN_SALARY, MAX_SALARY
-    FROM HR_JOBS
-    WHERE JOB_ID = :job_id
-    """
-    rows = execute_query(query, {'job_id': job_id})
+    # The job and its employees come back from one statement per shard
+    rows = gather_named_query('jobs.get_with_employees', {'job_id': job_id}, key=lambda row: row[4] or 0)
     
     if not rows:
         return None
     
-    row = rows[0]
+    return job_from_rows(*split_detail_rows(rows, 4))
+
+def get_locations(limit=None, after=None):
+    """
+    Get locations using direct connection.
     
-    # Get employees with this job
-    emp_query = """
-    SELECT EMPLOYEE_ID, FIRST_NAME, LAST_NAME, DEPARTMENT_ID
-    FROM HR_EMPLOYEES
-    WHERE JOB_ID = :job_id
+    Args:
+        limit: Page size; all locations are returned when omitted
+        after: Return locations with an ID greater than this one (optional)
     """
-    emp_rows = execute_query(emp_query, {'job_id': job_id})
+    if limit is None:
+        rows = execute_named_query('locations.list')
+    else:
+        rows = execute_named_query('locations.page', {'after': -1 if after is None else after, 'limit': limit})
     
-    employees = [
-        {
-            "employee_id": emp[0],
-            "first_name": emp[1],
-            "last_name": emp[2],
-            "department_id": emp[3]
-        }
-        for emp in emp_rows
-    ]
+    return [location_from_row(row) for row in rows]
+
+def get_locations_by_ids(location_ids):
+    """
+    Get the locations with the given IDs in one statement.
+    
+    Returns:
+        (locations, not_found): See gather_many
+    """
+    return gather_many('locations.get_many', location_ids, location_from_row, sharded=False)
+
+def get_location(location_id):
+    """Get a single location by ID."""
+    # The location and its departments come back from one statement
+    with on_shard(location_shard(location_id)):
+        rows = execute_named_query('locations.get', {'loc_id': location_id})
     
+    if not rows:
+        return None
+    
+    return location_from_rows(*split_detail_rows(rows, 7))
+
+def country_from_row(row):
+    """Build a country dict from a countries.list/countries.get row, like Country.to_dict."""
     return {
-        "job_id": row[0],
-        "job_title": row[1],
-        "min_salary": row[2],
-        "max_salary": row[3],
-        "employees": employees
+        "country_id": row[0],
+        "country_name": row[1],
+        "region_id": row[2],
+        "region_name": row[3]
     }
 
-def get_locations():
-    """Get all locations using direct connection."""
-    query = """
-    SELECT l.LOCATION_ID, l.STREET_ADDRESS, l.POSTAL_CODE, l.CITY, 
-           l.STATE_PROVINCE, l.COUNTRY_ID, c.COUNTRY_NAME
-    FROM HR_LOCATIONS l
-    LEFT JOIN HR_COUNTRIES c ON l.COUNTRY_ID = c.COUNTRY_ID
+def get_countries(limit=None, after=None):
     """
-    rows = execute_query(query)
+    Get countries using direct connection.
     
-    return [
+    Args:
+        limit: Page size; all countries are returned when omitted
+        after: Return countries with an ID greater than this one (optional)
+    """
+    if limit is None:
+        rows = execute_named_query('countries.list')
+    else:
+        rows = execute_named_query('countries.page', {'after': after, 'limit': limit})
+    
+    return [country_from_row(row) for row in rows]
+
+def get_country(country_id):
+    """Get a single country and its locations by ID."""
+    rows = execute_named_query('countries.get', {'country_id': country_id})
+    if not rows:
+        return None
+    
+    row, location_rows = split_detail_rows(rows, 4)
+    country = country_from_row(row)
+    country['locations'] = [
         {
-            "location_id": row[0],
-            "street_address": row[1],
-            "postal_code": row[2],
-            "city": row[3],
-            "state_province": row[4],
-            "country_id": row[5],
-            "country_name": row[6]
+            "location_id": location[0],
+            "street_address": location[1],
+            "postal_code": location[2],
+            "city": location[3],
+            "state_province": location[4],
+            "country_id": location[5],
+            "country_name": location[6]
         }
-        for row in rows
+        for location in location_rows
     ]
+    return country
 
-def get_location(location_id):
-    """Get a single location by ID."""
-    query = """
-    SELECT l.LOCATION_ID, l.STREET_ADDRESS, l.POSTAL_CODE, l.CITY, 
-           l.STATE_PROVINCE, l.COUNTRY_ID, c.COUNTRY_NAME
-    FROM HR_LOCATIONS l
-    LEFT JOIN HR_COUNTRIES c ON l.COUNTRY_ID = c.COUNTRY_ID
-    WHERE l.LOCATION_ID = :loc_id
+def get_regions(limit=None, after=None):
     """
-    rows = execute_query(query, {'loc_id': location_id})
+    Get regions using direct connection.
     
+    Args:
+        limit: Page size; all regions are returned when omitted
+        after: Return regions with an ID greater than this one (optional)
+    """
+    if limit is None:
+        rows = execute_named_query('regions.list')
+    else:
+        rows = execute_named_query('regions.page', {'after': -1 if after is None else after, 'limit': limit})
+    
+    return [{"region_id": row[0], "region_name": row[1]} for row in rows]
+
+def get_region(region_id):
+    """Get a single region and its countries by ID."""
+    rows = execute_named_query('regions.get', {'region_id': region_id})
     if not rows:
         return None
     
-    row = rows[0]
+    row, country_rows = split_detail_rows(rows, 2)
+    return {
+        "region_id": row[0],
+        "region_name": row[1],
+        "countries": [country_from_row(country) for country in country_rows]
+    }
+
+def job_grade_from_row(row):
+    """Build a job grade dict from a job_grades.list/job_grades.get row, like JobGrade.to_dict."""
+    return {
+        "grade_level": row[0],
+        "lowest_salary": row[1],
+        "highest_salary": row[2]
+    }
+
+def get_job_grades():
+    """Get all job grades using direct connection."""
+    return [job_grade_from_row(row) for row in execute_named_query('job_grades.list')]
+
+def get_job_grade(grade_level):
+    """Get a single job grade by level."""
+    rows = execute_named_query('job_grades.get', {'grade_level': grade_level})
+    return job_grade_from_row(rows[0]) if rows else None
+
+def job_history_list_from_row(row):
+    """Build a job history dict from a job_history.list/job_history.page row, like JobHistory.to_dict."""
+    return {
+        "employee_id": row[0],
+        "employee_name": f"{row[1]} {row[2]}" if row[1] is not None or row[2] is not None else None,
+        "start_date": iso_date(row[3]),
+        "end_date": iso_date(row[4]),
+        "job_id": row[5],
+        "job_title": row[6],
+        "department_id": row[7],
+        "department_name": row[8]
+    }
+
+def get_job_histories(limit=None, after=None):
+    """
+    Get job histories using direct connection, in primary-key order.
+    
+    Args:
+        limit: Page size; all job histories are returned when omitted
+        after: (employee ID, start date) of the last row of the previous page (optional)
+    """
+    if limit is None:
+        rows = gather_named_query('job_history.list', key=lambda row: (row[0], row[3]))
+    else:
+        after_id, after_date = after if after else (-1, None)
+        rows = gather_named_query('job_history.page', {'after_id': after_id, 'after_date': after_date, 'limit': limit},
+                                  key=lambda row: (row[0], row[3]), limit=limit)
     
-    # Get departments at this location
-    dept_query = """
-    SELECT DEPARTMENT_ID, DEPARTMENT_NAME, MANAGER_ID
-    FROM HR_DEPARTMENTS
-    WHERE LOCATION_ID = :loc_id
+    return [job_history_list_from_row(row) for row in rows]
+
+def get_employee_job_history(employee_id):
     """
-    dept_rows = execute_query(dept_query, {'loc_id': location_id})
+    Get an employee and their job history, from the employee's shard.
     
-    departments = [
-        {
-            "department_id": dept[0],
-            "department_name": dept[1],
-            "manager_id": dept[2]
-        }
-        for dept in dept_rows
-    ]
+    Returns:
+        (employee, job_histories): The employee's ID, name and email, and
+            their job history; None for both if the employee does not exist
+    """
+    with on_shard(locate_shard('employees', employee_id)):
+        rows = execute_named_query('job_history.employee', {'emp_id': employee_id})
     
-    return {
-        "location_id": row[0],
-        "street_address": row[1],
-        "postal_code": row[2],
-        "city": row[3],
-        "state_province": row[4],
-        "country_id": row[5],
-        "country_name": row[6],
-        "departments": departments
-    } 
\ No newline at end of file
+    if not rows:
+        return None, None
+    
+    row, history_rows = split_detail_rows(rows, 4)
+    employee = {
+        "employee_id": row[0],
+        "name": f"{row[1]} {row[2]}",
+        "email": row[3]
+    }
+    return employee, [job_history_list_from_row(history) for history in history_rows]
@@ -0,0 +1,207 @@
+"""
+Per-request query deadlines
+
+Every API request gets a budget of DB_DEFAULT_DEADLINE milliseconds for its
+database work; a view can declare its own with the deadline decorator.
+Before each database call the time left becomes the call's timeout: the
+driver's call_timeout on Oracle, which breaks the call and cancels the
+statement on the server, and a progress handler that interrupts the
+statement on SQLite.
+
+A request whose budget runs out is answered with a 503 and a Retry-After
+header instead of whatever its view made of the error, its unit of work is
+rolled back, and the event is counted per route.
+"""
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, jsonify, request
+from sqlalchemy import event
+from .dialects import get_dialect
+from .edge_replica import get_edge_dialect
+from ..config import DB_DEFAULT_DEADLINE, DB_DEADLINE_RETRY_AFTER
+
+_counters_lock = threading.Lock()
+_exceeded = {}
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's database budget has run out."""
+
+
+def deadline(milliseconds, when=None):
+    """
+    Give a view its own database budget, counted from the start of the request.
+
+    The budget is recorded on the view, so the request hooks that run
+    before it (the bulkhead queue) already wait within it. Must be applied
+    below the route decorator.
+
+    Args:
+        milliseconds: The view's budget
+        when: Function telling whether the current request gets the budget (default: always)
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if when is None or when():
+                g.db_deadline = g.get('request_started', time.monotonic()) + milliseconds / 1000
+            return view(*args, **kwargs)
+        wrapper.db_deadline = (milliseconds, when)
+        return wrapper
+    return decorator
+
+
+def get_deadline():
+    """Get the current request's deadline on the monotonic clock, or None if it has none."""
+    if not has_request_context():
+        return None
+    return g.get('db_deadline')
+
+
+def mark_deadline_exceeded():
+    """Record that the current request ran out of budget, so it is answered with a 503."""
+    if has_request_context():
+        g.db_deadline_exceeded = True
+
+
+def remaining_ms(expires):
+    """
+    Get the budget left before a deadline.
+
+    Raises:
+        DeadlineExceeded: If nothing is left
+    """
+    remaining = int((expires - time.monotonic()) * 1000)
+    if remaining <= 0:
+        mark_deadline_exceeded()
+        raise DeadlineExceeded("Query deadline exceeded")
+    return remaining
+
+
+@contextmanager
+def call_deadline(connection, dialect, expires=None):
+    """
+    Bound the database calls of the block by a deadline.
+
+    Args:
+        connection: Connection the calls run on
+        dialect: Dialect of its database
+        expires: Deadline on the monotonic clock (default: the current request's)
+
+    Raises:
+        DeadlineExceeded: If the budget ran out before or during the calls
+    """
+    if expires is None:
+        expires = get_deadline()
+    if expires is None:
+        yield connection
+        return
+
+    dialect.set_call_timeout(connection, remaining_ms(expires))
+    try:
+        yield connection
+    except Exception as e:
+        if dialect.is_deadline_exceeded(e):
+            mark_deadline_exceeded()
+            raise DeadlineExceeded("Query deadline exceeded") from e
+        raise
+    finally:
+        dialect.set_call_timeout(connection, 0)
+
+
+def start_deadline():
+    """Start the current request's budget: its view's (see deadline), or the default one."""
+    g.request_started = time.monotonic()
+    if not request.path.startswith('/api'):
+        return
+
+    view = current_app.view_functions.get(request.endpoint)
+    milliseconds, when = getattr(view, 'db_deadline', (None, None))
+    if milliseconds is not None and (when is None or when()):
+        g.db_deadline = g.request_started + milliseconds / 1000
+    elif DB_DEFAULT_DEADLINE > 0:
+        g.db_deadline = g.request_started + DB_DEFAULT_DEADLINE / 1000
+
+
+def answer_deadline_exceeded(response):
+    """Replace the response of a request that ran out of budget with a 503."""
+    if not g.get('db_deadline_exceeded'):
+        return response
+
+    route = request.endpoint or request.path
+    with _counters_lock:
+        _exceeded[route] = _exceeded.get(route, 0) + 1
+
+    response = jsonify({
+        'success': False,
+        'message': 'The database did not answer in time, please retry',
+        'error': 503
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(DB_DEADLINE_RETRY_AFTER)
+    return response
+
+
+def bound_orm_statement(dialect):
+    """Get an engine hook applying the request's deadline to each ORM statement."""
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        expires = get_deadline()
+        if expires is not None:
+            dialect.set_call_timeout(conn.connection, remaining_ms(expires))
+    return before_cursor_execute
+
+
+def detect_orm_deadline(dialect):
+    """Get an engine hook recording ORM statements cancelled by their deadline."""
+    def handle_error(context):
+        if dialect.is_deadline_exceeded(context.original_exception):
+            mark_deadline_exceeded()
+    return handle_error
+
+
+def clear_call_timeout(dialect):
+    """Get a pool hook removing any call timeout from connections checked back in."""
+    def checkin(dbapi_connection, connection_record):
+        if dbapi_connection is not None:
+            dialect.set_call_timeout(dbapi_connection, 0)
+    return checkin
+
+
+def init_deadlines(app):
+    """
+    Register the request hooks that start each request's budget and answer
+    the requests that ran out of it, and bound the ORM's statements by it.
+
+    Call after init_unit_of_work, so the 503 is in place before the unit of
+    work decides between commit and rollback.
+    """
+    from .. import db
+
+    app.before_request(start_deadline)
+    app.after_request(answer_deadline_exceeded)
+
+    with app.app_context():
+        for bind, engine in db.engines.items():
+            dialect = get_edge_dialect() if bind == 'edge' else get_dialect()
+            event.listen(engine, 'before_cursor_execute', bound_orm_statement(dialect))
+            event.listen(engine, 'handle_error', detect_orm_deadline(dialect))
+            event.listen(engine.pool, 'checkin', clear_call_timeout(dialect))
+
+
+def get_deadline_stats():
+    """
+    Get the deadline settings and the deadline-exceeded count of each route.
+
+    Returns:
+        stats: Default budget, Retry-After and counts by route
+    """
+    with _counters_lock:
+        exceeded = dict(_exceeded)
+
+    return {
+        'default_ms': DB_DEFAULT_DEADLINE,
+        'retry_after_seconds': DB_DEADLINE_RETRY_AFTER,
+        'exceeded': exceeded
+    }
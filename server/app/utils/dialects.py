@@ -0,0 +1,484 @@
+"""
+SQL dialects of the direct data layer
+
+The registered statements are written for Oracle. A dialect adapts them and
+the driver calls around them to the configured backend, so the same hot
+paths run against the college Oracle server and a local SQLite file.
+"""
+import functools
+import json
+import re
+import sqlite3
+import time
+import oracledb
+from sqlalchemy import literal_column, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, StaticPool
+from ..config import (
+    SQLALCHEMY_DATABASE_URI,
+    DB_POOL_MAX,
+    DB_POOL_WAIT_TIMEOUT,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_SYNCHRONOUS,
+    SQLITE_CACHE_SIZE,
+    SQLITE_MMAP_SIZE,
+    SQLITE_BUSY_TIMEOUT,
+    SQLITE_PROGRESS_STEPS
+)
+
+_dialect = None
+
+
+class ArrayBind:
+    """
+    A list of keys bound as one parameter, for statements that read it with
+    IN (SELECT COLUMN_VALUE FROM TABLE(:name)). The statement text is the
+    same whatever the length of the list.
+    """
+
+    def __init__(self, values, element_type=int):
+        self.values = list(values)
+        self.element_type = element_type
+
+
+def bind_arrays(dialect, cursor, params):
+    """Turn the ArrayBind values of params into the dialect's collection binds."""
+    if not isinstance(params, dict) or not any(isinstance(value, ArrayBind) for value in params.values()):
+        return params
+    return {
+        name: dialect.bind_array(cursor, value) if isinstance(value, ArrayBind) else value
+        for name, value in params.items()
+    }
+
+
+class OracleDialect:
+    """The college Oracle server, through python-oracledb."""
+
+    name = 'oracle'
+
+    # Errors that lose the session: the call may be retried on a new one
+    DISCONNECT_ERRORS = {
+        'ORA-03113',  # end-of-file on communication channel
+        'ORA-03114',  # not connected to ORACLE
+        'ORA-03135',  # connection lost contact
+        'ORA-12170',  # connect timeout
+        'ORA-12514',  # listener does not know of the service
+        'ORA-12537',  # connection closed
+        'ORA-12541',  # no listener
+        'ORA-25408',  # cannot safely replay call
+        'DPY-4011',   # the database or network closed the connection
+        'DPY-6000',   # cannot connect: listener refused the connection
+        'DPY-6005'    # cannot connect to the database
+    }
+    # Errors that roll back only the failed statement, so even a write may be retried
+    STATEMENT_ERRORS = {
+        'ORA-00060'   # deadlock detected while waiting for resource
+    }
+    # Errors of a call cancelled by its call timeout
+    DEADLINE_ERRORS = {
+        'DPY-4024',   # call timeout exceeded (thin mode)
+        'DPI-1067',   # call timeout exceeded (thick mode)
+        'ORA-03156'   # OCI call timed out
+    }
+    # Collection types of array binds, by element type
+    ARRAY_TYPES = {
+        int: 'SYS.ODCINUMBERLIST',
+        str: 'SYS.ODCIVARCHAR2LIST'
+    }
+
+    def translate(self, sql):
+        """Registered statements are already Oracle SQL."""
+        return sql
+
+    def prepare_cursor(self, cursor, arraysize=None, prefetchrows=None):
+        """Apply a statement's fetch sizing to a cursor."""
+        if arraysize is not None:
+            cursor.arraysize = arraysize
+        if prefetchrows is not None:
+            cursor.prefetchrows = prefetchrows
+
+    def bind_array(self, cursor, array):
+        """
+        Bind an ArrayBind as a collection object of the cursor's connection.
+        python-oracledb caches the looked-up type on the connection, so only
+        the first bind of each type costs a round trip.
+        """
+        collection_type = cursor.connection.gettype(self.ARRAY_TYPES[array.element_type])
+        return collection_type.newobject(array.values)
+
+    def execute_returning(self, cursor, statement, params, out_binds):
+        """
+        Execute a PL/SQL block that hands its results back through out binds.
+
+        Returns:
+            values: Dict of out bind name to value; REF CURSOR binds are fetched into row lists
+        """
+        out_vars = {name: cursor.var(bind_type) for name, bind_type in out_binds}
+        cursor.execute(statement, {**params, **out_vars})
+
+        values = {}
+        for name, var in out_vars.items():
+            value = var.getvalue()
+            if isinstance(value, oracledb.Cursor):
+                value = value.fetchall()
+            values[name] = value
+        return values
+
+    def execute_batch(self, cursor, statement, rows):
+        """
+        Run a DML statement once per row in a single round trip. With batch
+        errors on, a failing row is reported and the other rows still run.
+
+        Returns:
+            outcomes: One (rowcount, error) pair per row; error is None on success
+        """
+        cursor.executemany(statement, rows, batcherrors=True, arraydmlrowcounts=True)
+        errors = {error.offset: error for error in cursor.getbatcherrors()}
+        counts = cursor.getarraydmlrowcounts()
+
+        outcomes = []
+        for offset, count in enumerate(counts):
+            error = errors.get(offset)
+            if error is None:
+                outcomes.append((count, None))
+            elif error.full_code == 'ORA-00001':
+                outcomes.append((0, oracledb.IntegrityError(error)))
+            else:
+                outcomes.append((0, oracledb.DatabaseError(error)))
+        return outcomes
+
+    def error_code(self, error):
+        """Get the ORA-/DPY- code of a driver error, unwrapping SQLAlchemy errors."""
+        error = getattr(error, 'orig', error)
+        if not isinstance(error, oracledb.Error) or not error.args:
+            return None
+        return getattr(error.args[0], 'full_code', None)
+
+    def is_disconnect(self, error):
+        """Whether an error lost the session."""
+        return self.error_code(error) in self.DISCONNECT_ERRORS
+
+    def is_retryable(self, error, write=False):
+        """
+        Whether a failed call may be tried again: reads after any transient
+        error, writes only when the failed statement was rolled back alone.
+        """
+        code = self.error_code(error)
+        return code in self.STATEMENT_ERRORS or (not write and code in self.DISCONNECT_ERRORS)
+
+    def set_call_timeout(self, connection, timeout_ms):
+        """
+        Bound every round trip of a connection; the driver breaks the call
+        and the server cancels the statement when it runs out. 0 removes the bound.
+        """
+        getattr(connection, 'dbapi_connection', connection).call_timeout = timeout_ms
+
+    def is_deadline_exceeded(self, error):
+        """Whether an error is a call cancelled by its call timeout."""
+        return self.error_code(error) in self.DEADLINE_ERRORS
+
+    def is_database_failure(self, error):
+        """
+        Whether an error means trouble with the database rather than with
+        the request; constraint violations are the caller's mistake.
+        """
+        error = getattr(error, 'orig', error)
+        return isinstance(error, oracledb.Error) and not isinstance(error, oracledb.IntegrityError)
+
+    def is_unique_violation(self, error):
+        """Whether a driver error is a unique-constraint violation (ORA-00001)."""
+        if not isinstance(error, oracledb.IntegrityError):
+            return False
+        return error.args[0].full_code == 'ORA-00001'
+
+    def reserve_ids(self, connection, sequence, table, column, count):
+        """Reserve count values of an Oracle sequence in one round trip."""
+        cursor = connection.cursor()
+        try:
+            self.prepare_cursor(cursor, count, count + 1)
+            cursor.execute(f"SELECT {sequence}.NEXTVAL FROM DUAL CONNECT BY LEVEL <= :count", {'count': count})
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    def fetch_changes(self, connection, table, since=None):
+        """
+        Fetch the rows of a table changed since a previous fetch, using the
+        system change number Oracle keeps for every row (or block, for
+        tables created without ROWDEPENDENCIES, which only over-reports).
+
+        Args:
+            connection: SQLAlchemy connection to the database
+            table: SQLAlchemy table
+            since: SCN returned by the previous fetch, or None for every row
+
+        Returns:
+            rows: List of column name to value dicts
+            since: SCN to pass to the next fetch
+        """
+        scn = literal_column('ORA_ROWSCN')
+        query = select(table, scn.label('ora_rowscn'))
+        if since is not None:
+            query = query.where(scn > since)
+
+        rows = []
+        for row in connection.execute(query).mappings():
+            row = dict(row)
+            scn_value = row.pop('ora_rowscn')
+            since = scn_value if since is None else max(since, scn_value)
+            rows.append(row)
+        return rows, since
+
+
+class SQLiteDialect:
+    """
+    A local SQLite file, for development and CI.
+
+    Connections are opened once with a tuned pragma profile and reused
+    through a bounded pool. Oracle-only syntax in the registered statements
+    is rewritten on first use, and writes that return rows run as a short
+    list of steps in place of a PL/SQL block.
+    """
+
+    name = 'sqlite'
+
+    # Mechanical rewrites of Oracle syntax used by the registered statements
+    REWRITES = [
+        (re.compile(r'FETCH FIRST (:\w+|\d+) ROWS ONLY'), r'LIMIT \1'),
+        (re.compile(r"TO_DATE\((:\w+), 'YYYY-MM-DD'\)"), r'\1'),
+        (re.compile(r'TO_NUMBER\((:\w+)\)'), r'\1'),
+        (re.compile(r'\s+FROM DUAL\b'), ''),
+        (re.compile(r'SELECT COLUMN_VALUE FROM TABLE\((:\w+)\)'), r'SELECT value FROM json_each(\1)')
+    ]
+
+    def __init__(self, url):
+        self.path = make_url(url).database or ':memory:'
+
+    def translate(self, sql):
+        """Rewrite Oracle-only syntax into SQLite syntax."""
+        for pattern, replacement in self.REWRITES:
+            sql = pattern.sub(replacement, sql)
+        return sql
+
+    def connect(self, path=None):
+        """
+        Open a connection with the tuned pragma profile.
+
+        WAL lets readers run alongside the single writer, synchronous=NORMAL
+        only syncs at checkpoints (durable against application crashes, which
+        is all WAL needs), and a larger page cache plus memory-mapped reads
+        keep the hot tables out of the read() path.
+
+        Args:
+            path: Database file (default: the primary database)
+
+        Returns:
+            connection: A sqlite3 connection that may be used from any thread
+        """
+        connection = sqlite3.connect(path or self.path, timeout=SQLITE_BUSY_TIMEOUT / 1000, check_same_thread=False)
+        connection.execute(f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+        connection.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+        connection.execute(f"PRAGMA cache_size = {SQLITE_CACHE_SIZE}")
+        connection.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+        connection.execute("PRAGMA temp_store = MEMORY")
+        return connection
+
+    def engine_options(self, url=None, pool_size=DB_POOL_MAX):
+        """
+        Get the SQLAlchemy engine options that open tuned connections and
+        reuse them across requests.
+
+        Args:
+            url: Database URL (default: the primary database)
+            pool_size: Connections kept by the engine (default: DB_POOL_MAX)
+
+        Returns:
+            options: A dict suitable for SQLALCHEMY_ENGINE_OPTIONS
+        """
+        path = (make_url(url).database or ':memory:') if url else self.path
+        creator = functools.partial(self.connect, path)
+        if path == ':memory:':
+            # Every connection to :memory: is a separate database; share one
+            return {'creator': creator, 'poolclass': StaticPool}
+
+        return {
+            'creator': creator,
+            'poolclass': QueuePool,
+            'pool_size': pool_size,
+            'max_overflow': 0,
+            'pool_timeout': DB_POOL_WAIT_TIMEOUT / 1000
+        }
+
+    def prepare_cursor(self, cursor, arraysize=None, prefetchrows=None):
+        """Apply a statement's fetch sizing to a cursor; SQLite has no prefetch."""
+        if arraysize is not None:
+            cursor.arraysize = arraysize
+
+    def bind_array(self, cursor, array):
+        """Bind an ArrayBind as a JSON array, which json_each reads back as rows."""
+        return json.dumps(array.values)
+
+    def execute_returning(self, cursor, steps, params, out_binds):
+        """
+        Execute the SQLite steps of a write that returns rows.
+
+        The first step is the DML statement with a RETURNING clause aliasing
+        its columns to the out bind names. Each later step is a SELECT that
+        may bind the values returned so far: a plain statement merges its
+        single row into the values by column name, and a (name, statement)
+        pair stores all of its rows under name, like a REF CURSOR.
+
+        Returns:
+            values: Dict of out bind name to value
+        """
+        values = {name: None for name, _ in out_binds}
+
+        cursor.execute(steps[0], params)
+        rows = cursor.fetchall()
+        values['r_row_count'] = len(rows)
+        if not rows:
+            return values
+        values.update(zip(self.column_names(cursor), rows[0]))
+
+        for step in steps[1:]:
+            target, statement = step if isinstance(step, tuple) else (None, step)
+            cursor.execute(statement, {**params, **values})
+            if target:
+                values[target] = cursor.fetchall()
+            else:
+                values.update(zip(self.column_names(cursor), cursor.fetchone()))
+        return values
+
+    def execute_batch(self, cursor, statement, rows):
+        """
+        Run a DML statement once per row inside the current transaction.
+        SQLite has no batch error mode, so each row runs under its own
+        savepoint and a failing row is rolled back alone.
+
+        Returns:
+            outcomes: One (rowcount, error) pair per row; error is None on success
+        """
+        if not cursor.connection.in_transaction:
+            cursor.execute("BEGIN")
+
+        outcomes = []
+        for row in rows:
+            cursor.execute("SAVEPOINT batch_row")
+            try:
+                cursor.execute(statement, row)
+                outcomes.append((cursor.rowcount, None))
+            except sqlite3.Error as e:
+                cursor.execute("ROLLBACK TO batch_row")
+                outcomes.append((0, e))
+            cursor.execute("RELEASE batch_row")
+        return outcomes
+
+    def column_names(self, cursor):
+        """Get the lower-cased column names of the last statement."""
+        return [column[0].lower() for column in cursor.description]
+
+    def is_disconnect(self, error):
+        """Whether an error lost the connection; a local file never does."""
+        return False
+
+    def is_retryable(self, error, write=False):
+        """
+        Whether a failed call may be tried again. A locked or busy database
+        rolls back only the failed statement, so writes may be retried too.
+        """
+        error = getattr(error, 'orig', error)
+        return isinstance(error, sqlite3.OperationalError) and (
+            'database is locked' in str(error) or 'database is busy' in str(error)
+        )
+
+    def set_call_timeout(self, connection, timeout_ms):
+        """
+        SQLite has no call timeout: a progress handler interrupts any
+        statement still running when the time is up, and lock waits are
+        cut to the time left. 0 removes the bound.
+        """
+        connection = getattr(connection, 'dbapi_connection', connection)
+        if not timeout_ms:
+            connection.set_progress_handler(None, 0)
+            connection.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT}")
+            return
+
+        expires = time.monotonic() + timeout_ms / 1000
+        connection.set_progress_handler(lambda: time.monotonic() > expires, SQLITE_PROGRESS_STEPS)
+        connection.execute(f"PRAGMA busy_timeout = {min(int(timeout_ms), SQLITE_BUSY_TIMEOUT)}")
+
+    def is_deadline_exceeded(self, error):
+        """Whether an error is a statement interrupted by its progress handler."""
+        error = getattr(error, 'orig', error)
+        return isinstance(error, sqlite3.OperationalError) and str(error) == 'interrupted'
+
+    def is_database_failure(self, error):
+        """
+        Whether an error means trouble with the database rather than with
+        the request; constraint violations are the caller's mistake.
+        """
+        error = getattr(error, 'orig', error)
+        return isinstance(error, sqlite3.Error) and not isinstance(error, sqlite3.IntegrityError)
+
+    def is_unique_violation(self, error):
+        """Whether a driver error is a unique-constraint violation."""
+        return isinstance(error, sqlite3.IntegrityError) and 'UNIQUE constraint failed' in str(error)
+
+    def reserve_ids(self, connection, sequence, table, column, count):
+        """
+        Reserve count values from the ID_SEQUENCES table that emulates
+        sequences. A sequence is seeded from the table's highest key the
+        first time it is used.
+        """
+        cursor = connection.cursor()
+        try:
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS ID_SEQUENCES (NAME TEXT PRIMARY KEY, NEXT_VALUE INTEGER NOT NULL)"
+            )
+            cursor.execute(
+                f"INSERT OR IGNORE INTO ID_SEQUENCES (NAME, NEXT_VALUE) "
+                f"SELECT ?, COALESCE(MAX({column}), 0) + 1 FROM {table}",
+                (sequence,)
+            )
+            cursor.execute(
+                "UPDATE ID_SEQUENCES SET NEXT_VALUE = NEXT_VALUE + ? WHERE NAME = ? RETURNING NEXT_VALUE",
+                (count, sequence)
+            )
+            end = cursor.fetchone()[0]
+            return list(range(end - count, end))
+        finally:
+            cursor.close()
+
+    def fetch_changes(self, connection, table, since=None):
+        """
+        Fetch the rows of a table changed since a previous fetch. SQLite
+        keeps no change numbers, so every row is returned and the caller
+        skips the unchanged ones.
+
+        Returns:
+            rows: List of column name to value dicts
+            since: Always None
+        """
+        return [dict(row) for row in connection.execute(select(table)).mappings()], None
+
+
+def get_dialect():
+    """
+    Get the dialect of the configured database.
+
+    Returns:
+        dialect: An OracleDialect or SQLiteDialect
+
+    Raises:
+        ValueError: If the configured database is neither Oracle nor SQLite
+    """
+    global _dialect
+    if _dialect is None:
+        backend = make_url(SQLALCHEMY_DATABASE_URI).get_backend_name()
+        if backend == 'oracle':
+            _dialect = OracleDialect()
+        elif backend == 'sqlite':
+            _dialect = SQLiteDialect(SQLALCHEMY_DATABASE_URI)
+        else:
+            raise ValueError(f"The direct data layer does not support the '{backend}' backend")
+    return _dialect
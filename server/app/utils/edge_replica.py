@@ -0,0 +1,325 @@
+"""
+Local SQLite edge replica
+
+When EDGE_REPLICA_PATH is set, every node keeps a copy of the HR_* tables in
+a local SQLite file and serves the reference lookups decorated with
+serve_from_edge from it, without a round trip to the database server.
+
+A background thread refreshes the copy every EDGE_REFRESH_INTERVAL seconds,
+and right after this node commits a write. Refreshes are incremental: on
+Oracle only the rows whose ORA_ROWSCN moved past the last refresh are
+fetched, and only those rows are looked up in the copy. Deleted rows leave
+no change number, so they are found by comparing primary keys in a sweep
+that runs every EDGE_DELETE_SWEEP_INTERVAL seconds, and right after this
+node serves a DELETE. Every refresh is applied in one SQLite transaction,
+so readers never see half of it. Reads fall back to the database while the
+copy is older than EDGE_MAX_STALENESS seconds.
+"""
+import functools
+import threading
+import time
+from flask import g, request
+from sqlalchemy import bindparam, delete, insert, select, tuple_, update
+from .dialects import SQLiteDialect, get_dialect
+from .sharding import SHARDED_TABLES, shard_configured
+from ..config import EDGE_REPLICA_PATH, EDGE_REFRESH_INTERVAL, EDGE_MAX_STALENESS, EDGE_DELETE_SWEEP_INTERVAL
+
+# Mirrored tables, by name prefix
+EDGE_TABLE_PREFIX = 'HR_'
+
+READ_METHODS = ('GET', 'HEAD')
+
+# Primary keys per lookup or delete statement, under SQLite's bind limit
+KEY_CHUNK_SIZE = 500
+
+_edge_dialect = None
+_refresh_requested = threading.Event()
+_sweep_requested = threading.Event()
+_refresh_lock = threading.Lock()
+_refresher = None
+_state_lock = threading.Lock()
+_state = {
+    'refreshed_at': None,
+    'swept_at': None,
+    'refreshes': 0,
+    'failures': 0,
+    'last_error': None,
+    'last_duration_ms': None,
+    'tables': {}
+}
+
+
+def edge_configured():
+    """Whether the local edge replica is enabled."""
+    return bool(EDGE_REPLICA_PATH)
+
+
+def get_edge_url():
+    """Get the SQLAlchemy URL of the edge replica file."""
+    return f'sqlite:///{EDGE_REPLICA_PATH}'
+
+
+def get_edge_dialect():
+    """Get the SQLite dialect of the edge replica file."""
+    global _edge_dialect
+    if _edge_dialect is None:
+        _edge_dialect = SQLiteDialect(get_edge_url())
+    return _edge_dialect
+
+
+def get_edge_engine_options():
+    """Get the SQLAlchemy engine options of the 'edge' bind."""
+    return get_edge_dialect().engine_options()
+
+
+def get_edge_tables():
+    """
+    Get the mirrored tables, parents first. Sharded tables are left out:
+    the main database only holds part of them.
+    """
+    from .. import db
+
+    return [
+        table for table in db.metadata.sorted_tables
+        if table.name.startswith(EDGE_TABLE_PREFIX) and not (shard_configured() and table.name in SHARDED_TABLES)
+    ]
+
+
+def serve_from_edge(view):
+    """
+    Mark a read-only view whose reads may be served by the edge replica.
+
+    Must be applied below the route decorator.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_edge_eligible = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def edge_eligible():
+    """Whether the current request's view was marked with serve_from_edge."""
+    return edge_configured() and g.get('db_edge_eligible', False)
+
+
+def get_edge_staleness():
+    """
+    Get the age of the edge copy.
+
+    Returns:
+        staleness: Seconds since the last successful refresh started, or None before the first one
+    """
+    refreshed_at = _state['refreshed_at']
+    if refreshed_at is None:
+        return None
+    return time.time() - refreshed_at
+
+
+def edge_is_fresh():
+    """Whether the edge copy is recent enough to serve reads."""
+    staleness = get_edge_staleness()
+    return staleness is not None and staleness <= EDGE_MAX_STALENESS
+
+
+def row_key(table, row):
+    """Get the primary-key tuple of a row mapping."""
+    return tuple(row[column.name] for column in table.primary_key.columns)
+
+
+def chunked(keys):
+    """Split a list of primary keys into statement-sized chunks."""
+    return [keys[start:start + KEY_CHUNK_SIZE] for start in range(0, len(keys), KEY_CHUNK_SIZE)]
+
+
+def key_filter(table, keys):
+    """Get a WHERE clause matching rows by primary-key tuple."""
+    return tuple_(*table.primary_key.columns).in_(keys)
+
+
+def refresh_table(source, target, table, marker, sweep=False):
+    """
+    Bring one table of a copy up to date.
+
+    Only the changed rows are looked up in the copy. A refresh without a
+    marker fetches every row, so it finds the deleted rows as well; other
+    refreshes compare primary keys with the source only when sweeping.
+
+    Args:
+        source: Connection to the primary database
+        target: Connection to the copy, inside the refresh transaction
+        table: Copied table
+        marker: Change marker returned by the previous refresh of the table, or None
+        sweep: Whether to look for rows deleted from the source
+
+    Returns:
+        marker: Change marker to pass to the next refresh
+        upserted: Number of rows inserted or updated
+        deleted: Number of rows deleted
+    """
+    full = marker is None
+    changed, marker = get_dialect().fetch_changes(source, table, marker)
+    key_columns = list(table.primary_key.columns)
+    changed_keys = [row_key(table, row) for row in changed]
+
+    if full:
+        local = {row_key(table, row): dict(row) for row in target.execute(select(table)).mappings()}
+    else:
+        local = {}
+        for keys in chunked(changed_keys):
+            local.update((row_key(table, row), dict(row))
+                         for row in target.execute(select(table).where(key_filter(table, keys))).mappings())
+
+    inserts, updates = [], []
+    for key, row in zip(changed_keys, changed):
+        if key not in local:
+            inserts.append(row)
+        elif local[key] != row:
+            updates.append({**row, **{f'key_{column.name}': value for column, value in zip(key_columns, key)}})
+    if inserts:
+        target.execute(insert(table), inserts)
+    if updates:
+        target.execute(
+            update(table).where(*[column == bindparam(f'key_{column.name}') for column in key_columns]),
+            updates
+        )
+
+    if full:
+        missing = set(local) - set(changed_keys)
+    elif sweep:
+        local_keys = {tuple(row) for row in target.execute(select(*key_columns))}
+        missing = local_keys - {tuple(row) for row in source.execute(select(*key_columns))}
+    else:
+        missing = set()
+    for keys in chunked(list(missing)):
+        target.execute(delete(table).where(key_filter(table, keys)))
+
+    return marker, len(inserts) + len(updates), len(missing)
+
+
+def sweep_due(now):
+    """Whether the next refresh should look for deleted rows."""
+    swept_at = _state['swept_at']
+    return swept_at is None or now - swept_at >= EDGE_DELETE_SWEEP_INTERVAL
+
+
+def refresh_edge_replica(sweep=None):
+    """
+    Refresh every mirrored table in one edge transaction.
+
+    Args:
+        sweep: Whether to look for deleted rows; by default when one was
+            requested or EDGE_DELETE_SWEEP_INTERVAL has passed
+
+    Returns:
+        stats: The refresh statistics (see get_edge_stats)
+    """
+    from .. import db
+
+    with _refresh_lock:
+        started = time.time()
+        if sweep is None:
+            sweep = _sweep_requested.is_set() or sweep_due(started)
+        if sweep:
+            _sweep_requested.clear()
+        markers = {name: stats.get('marker') for name, stats in _state['tables'].items()}
+        results = {}
+        try:
+            with db.engine.connect() as source, db.engines['edge'].begin() as target:
+                for table in get_edge_tables():
+                    results[table.name] = refresh_table(source, target, table, markers.get(table.name), sweep)
+        except Exception as e:
+            with _state_lock:
+                _state['failures'] += 1
+                _state['last_error'] = str(e)
+            if sweep:
+                _sweep_requested.set()
+            raise
+
+        with _state_lock:
+            for name, (marker, upserted, deleted) in results.items():
+                stats = _state['tables'].setdefault(name, {'rows_upserted': 0, 'rows_deleted': 0})
+                stats['marker'] = marker
+                stats['rows_upserted'] += upserted
+                stats['rows_deleted'] += deleted
+                stats['last_changes'] = upserted + deleted
+            # Everything committed on the primary before the refresh started is in the copy
+            _state['refreshed_at'] = started
+            if sweep:
+                _state['swept_at'] = started
+            _state['refreshes'] += 1
+            _state['last_error'] = None
+            _state['last_duration_ms'] = round((time.time() - started) * 1000, 3)
+    return get_edge_stats()
+
+
+def request_edge_refresh(response):
+    """Wake the refresher after this node commits a write, sweeping for deleted rows after a DELETE."""
+    if request.method not in READ_METHODS and response.status_code < 400:
+        if request.method == 'DELETE':
+            _sweep_requested.set()
+        _refresh_requested.set()
+    return response
+
+
+def run_refresher(app):
+    """Refresh the edge copy on an interval, or sooner when a refresh is requested."""
+    with app.app_context():
+        while True:
+            try:
+                refresh_edge_replica()
+            except Exception as e:
+                app.logger.warning("Edge replica refresh failed: %s", e)
+            _refresh_requested.wait(EDGE_REFRESH_INTERVAL)
+            _refresh_requested.clear()
+
+
+def init_edge_replica(app):
+    """
+    Create the edge copy's tables, register the hook that refreshes it after
+    local writes and start the background refresher.
+    """
+    global _refresher
+    if not edge_configured():
+        return
+
+    from .. import db
+
+    with app.app_context():
+        db.metadata.create_all(db.engines['edge'], tables=get_edge_tables())
+
+    app.after_request(request_edge_refresh)
+
+    if _refresher is None:
+        _refresher = threading.Thread(target=run_refresher, args=(app,), name='edge-replica-refresher', daemon=True)
+        _refresher.start()
+
+
+def get_edge_stats():
+    """
+    Get the edge copy's staleness and refresh statistics.
+
+    Returns:
+        stats: Staleness, refresh counts, last error and per-table change counts
+    """
+    staleness = get_edge_staleness()
+    swept_at = _state['swept_at']
+    with _state_lock:
+        tables = {
+            name: {key: value for key, value in stats.items() if key != 'marker'}
+            for name, stats in _state['tables'].items()
+        }
+        return {
+            'configured': edge_configured(),
+            'path': EDGE_REPLICA_PATH or None,
+            'staleness_seconds': round(staleness, 3) if staleness is not None else None,
+            'max_staleness_seconds': EDGE_MAX_STALENESS,
+            'refresh_interval_seconds': EDGE_REFRESH_INTERVAL,
+            'delete_sweep_interval_seconds': EDGE_DELETE_SWEEP_INTERVAL,
+            'last_sweep_seconds_ago': round(time.time() - swept_at, 3) if swept_at is not None else None,
+            'refreshes': _state['refreshes'],
+            'failures': _state['failures'],
+            'last_error': _state['last_error'],
+            'last_duration_ms': _state['last_duration_ms'],
+            'tables': tables
+        }
@@ -0,0 +1,182 @@
+"""
+Read-only fast path for the ORM list routes
+
+The country, region, job grade and job history lists are pure reads, so
+they need none of the ORM's identity map, change tracking or per-request
+query building. For each model this module builds its Core statements once
+(the whole table, its first page and the pages after a cursor) from the
+model's row serializer (see serializers.get_row_serializer). They select
+exactly the serialized columns, with the related ones through outer joins.
+The statements are constant objects with bound parameters, so SQLAlchemy
+compiles each of them once and finds it in its compiled cache afterwards.
+The rows come back as plain tuples and go straight into the row serializer.
+
+The statements run on the request's session, so they follow its read
+routing (replica, edge, heavy sub-pool), retries, deadlines and breakers.
+The job history is split across the region shards with its employees, so
+its statements run on every shard and the rows are merged in primary-key
+order. Writes keep using the ORM.
+"""
+from sqlalchemy import and_, bindparam, inspect as sa_inspect, or_, select
+from .serializers import get_row_serializer
+from .sharding import SHARDED_TABLES, get_shards, on_shard, shard_configured
+
+_plans = {}
+
+
+class ReadPlan:
+    """The prebuilt statements and row serializer of one model's list."""
+
+    def __init__(self, model, fields=None):
+        mapper = sa_inspect(model)
+        layout, self.serializer = get_row_serializer(model, fields)
+
+        table = mapper.local_table
+        source = table
+        aliases = {}
+        columns = []
+        for relationship, key in layout:
+            if relationship is None:
+                columns.append(mapper.get_property(key).columns[0])
+                continue
+            if relationship not in aliases:
+                prop = mapper.relationships[relationship]
+                alias = aliases[relationship] = prop.mapper.local_table.alias(relationship)
+                source = source.outerjoin(alias, and_(*(
+                    local == alias.c[remote.key] for local, remote in prop.local_remote_pairs
+                )))
+            target = mapper.relationships[relationship].mapper
+            columns.append(aliases[relationship].c[target.get_property(key).columns[0].key])
+
+        keys = list(mapper.primary_key)
+        self.key_count = len(keys)
+        self.table_name = table.name
+        # Where the primary key sits in a row, to merge the shards' rows
+        positions = [next((index for index, column in enumerate(columns) if column is key), None) for key in keys]
+        self.key_positions = positions if None not in positions else None
+        self.list_statement = select(*columns).select_from(source)
+        self.page_statement = self.list_statement.order_by(*keys).limit(bindparam('limit'))
+        self.page_after_statement = self.page_statement.where(keyset_after(keys))
+
+    def sharded(self):
+        """Whether the table is split across the region shards."""
+        return shard_configured() and self.table_name in SHARDED_TABLES
+
+    def execute(self, statement, params=None, limit=None):
+        """
+        Run one of the plan's statements on the request's session, on every
+        shard for a sharded table.
+
+        Args:
+            statement: The list, page or page-after statement
+            params: Bound parameters (optional)
+            limit: Rows to keep after merging the shards' pages (optional)
+
+        Returns:
+            rows: Result rows, merged in primary-key order across shards
+        """
+        from .. import db
+
+        if not self.sharded():
+            return db.session.execute(statement, params)
+        if self.key_positions is None:
+            raise ValueError(f'{self.table_name} is sharded; its reads must select the primary key')
+
+        return execute_on_shards(statement, params,
+                                 key=lambda row: tuple(row[position] for position in self.key_positions),
+                                 limit=limit)
+
+
+def execute_on_shards(statement, params=None, key=None, limit=None):
+    """
+    Run a statement on the request's session on every shard and merge the rows.
+
+    Args:
+        statement: SELECT statement
+        params: Bound parameters (optional)
+        key: Sort key of the merged rows; shard after shard when omitted
+        limit: Rows to keep after merging, for keyset pages (optional)
+
+    Returns:
+        rows: Result rows of every shard
+    """
+    from .. import db
+
+    rows = []
+    for shard in get_shards():
+        with on_shard(shard):
+            rows.extend(db.session.execute(statement, params))
+    if key is not None:
+        rows.sort(key=key)
+    return rows[:limit] if limit is not None else rows
+
+
+def keyset_after(keys):
+    """
+    Build the condition selecting the rows after :after_0, :after_1, ... in
+    the order of the key columns.
+    """
+    return or_(*(
+        and_(*(key == bindparam(f'after_{index}') for index, key in enumerate(keys[:position])),
+             keys[position] > bindparam(f'after_{position}'))
+        for position in range(len(keys))
+    ))
+
+
+def get_read_plan(model, fields=None):
+    """Get the prebuilt read statements of a model, building them on first use."""
+    fields = tuple(fields) if fields is not None else None
+    plan = _plans.get((model, fields))
+    if plan is None:
+        plan = _plans[(model, fields)] = ReadPlan(model, fields)
+    return plan
+
+
+def read_all(model, fields=None):
+    """
+    Read and serialize a whole table, like [obj.to_dict() for obj in Model.query.all()].
+
+    Args:
+        model: Mapped model class
+        fields: Keys to keep (default: all of to_dict()'s)
+
+    Returns:
+        rows: List of dicts
+    """
+    plan = get_read_plan(model, fields)
+    serializer = plan.serializer
+    return [serializer(row) for row in plan.execute(plan.list_statement)]
+
+
+def read_page(model, limit, after=None, fields=None):
+    """
+    Read and serialize one keyset page of a table, in primary-key order.
+
+    Args:
+        model: Mapped model class
+        limit: Rows to read
+        after: Primary-key values of the last row of the previous page, or None
+        fields: Keys to keep (default: all of to_dict()'s)
+
+    Returns:
+        rows: List of dicts
+    """
+    plan = get_read_plan(model, fields)
+    params = {'limit': limit}
+    if after:
+        if len(after) != plan.key_count:
+            raise ValueError('Invalid pagination cursor')
+        params.update({f'after_{index}': value for index, value in enumerate(after)})
+        statement = plan.page_after_statement
+    else:
+        statement = plan.page_statement
+    serializer = plan.serializer
+    return [serializer(row) for row in plan.execute(statement, params, limit)]
+
+
+def init_fast_reads(app):
+    """Build the read statements of the models with fast list routes at startup."""
+    from ..models import Country, Region, JobGrade, JobHistory
+
+    for model in (Country, Region, JobGrade, JobHistory):
+        get_read_plan(model)
@@ -0,0 +1,212 @@
+"""
+Group commit of small concurrent writes
+
+When DB_GROUP_COMMIT_WINDOW is set, the writes listed in GROUP_WRITES no
+longer commit one by one. Each caller queues its row and waits while a
+flusher thread, one per statement and shard, gathers the rows that arrive
+within the window (up to DB_GROUP_COMMIT_MAX_BATCH). The flusher runs the
+whole batch with one executemany, reads the written rows back with one
+lookup and commits once, so the commit cost is paid per batch, not per row.
+
+Each caller still gets its own row back, or its own error. Rows run with
+batch errors on Oracle and under a savepoint each on SQLite, so one failing
+row does not fail the rest of the batch. A batch that fails as a whole with
+a transient error is rolled back and run again (see retry.py), so the
+statements listed in GROUP_WRITES must be idempotent. Callers wait at most
+until their own deadline.
+"""
+import threading
+import time
+from .dialects import get_dialect
+from .queries import get_query, record_execution, record_statement
+from .retry import call_with_retry
+from ..config import DB_GROUP_COMMIT_WINDOW, DB_GROUP_COMMIT_MAX_BATCH
+
+# Coalesced writes: plain DML run per row, batch lookup of the written rows
+# and the bind holding each row's key
+GROUP_WRITES = {
+    'employees.update': ('employees.update_row', 'employees.get_batch', 'employee_id')
+}
+
+_committers = {}
+_committers_lock = threading.Lock()
+
+
+def group_commit_enabled():
+    """Whether small writes are coalesced into group commits."""
+    return DB_GROUP_COMMIT_WINDOW > 0
+
+
+class PendingWrite:
+    """One caller's row, waiting for its batch to commit."""
+
+    def __init__(self, params):
+        self.params = params
+        self.done = threading.Event()
+        self.row = None
+        self.error = None
+
+
+class GroupCommitter:
+    """Coalesces the rows of one write statement on one database into batches."""
+
+    def __init__(self, name, engine):
+        self.name = name
+        self.dml_name, self.lookup_name, self.key = GROUP_WRITES[name]
+        self.engine = engine
+        self._pending = []
+        self._condition = threading.Condition()
+        self._stats = {'batches': 0, 'rows': 0, 'row_errors': 0, 'batch_errors': 0, 'largest_batch': 0}
+        threading.Thread(target=self.run, name=f'group-commit-{name}', daemon=True).start()
+
+    def submit(self, params, timeout=None):
+        """
+        Queue a row and wait until its batch commits.
+
+        Args:
+            params: Binds of the row
+            timeout: Seconds to wait at most (default: no limit)
+
+        Returns:
+            row: The written row from the lookup, or None if no row matched
+
+        Raises:
+            TimeoutError: If the batch did not commit in time. A row still
+                queued is withdrawn; one already being written may commit.
+            Exception: The driver error of this row, or of the whole batch
+        """
+        write = PendingWrite(params)
+        with self._condition:
+            self._pending.append(write)
+            self._condition.notify()
+        if not write.done.wait(timeout):
+            with self._condition:
+                if write in self._pending:
+                    self._pending.remove(write)
+                    raise TimeoutError("The write was withdrawn before its batch started")
+            raise TimeoutError("The write's batch did not commit in time; it may still commit")
+
+        if write.error is not None:
+            raise write.error
+        return write.row
+
+    def run(self):
+        """Gather batches and write them, forever."""
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                deadline = time.monotonic() + DB_GROUP_COMMIT_WINDOW / 1000
+                while len(self._pending) < DB_GROUP_COMMIT_MAX_BATCH:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._pending[:DB_GROUP_COMMIT_MAX_BATCH]
+                del self._pending[:DB_GROUP_COMMIT_MAX_BATCH]
+            self.flush(batch)
+
+    def flush(self, batch):
+        """Write a batch in one transaction and hand every caller its outcome."""
+        start = time.perf_counter()
+        try:
+            outcomes, rows = call_with_retry(lambda: self.write(batch), get_dialect())
+        except Exception as e:
+            for write in batch:
+                write.error = e
+            outcomes = None
+        else:
+            for write, (count, error) in zip(batch, outcomes):
+                write.error = error
+                if error is None and count:
+                    write.row = rows.get(write.params[self.key])
+        finally:
+            for write in batch:
+                write.done.set()
+
+        record_execution(self.dml_name, time.perf_counter() - start, outcomes is None)
+        with self._condition:
+            self._stats['batches'] += 1
+            self._stats['rows'] += len(batch)
+            self._stats['largest_batch'] = max(self._stats['largest_batch'], len(batch))
+            if outcomes is None:
+                self._stats['batch_errors'] += 1
+            else:
+                self._stats['row_errors'] += sum(1 for _, error in outcomes if error is not None)
+
+    def write(self, batch):
+        """
+        Run the batch's rows, look the written rows up and commit.
+
+        Returns:
+            outcomes: One (rowcount, error) pair per row
+            rows: Written rows by key
+        """
+        dialect = get_dialect()
+        dml = get_query(self.dml_name).statement(dialect)
+        lookup = get_query(self.lookup_name)
+
+        connection = self.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            try:
+                record_statement(dml)
+                outcomes = dialect.execute_batch(cursor, dml, [write.params for write in batch])
+
+                keys = [write.params[self.key] for write, (count, error) in zip(batch, outcomes) if error is None and count]
+                rows = {}
+                if keys:
+                    # Fixed-shape IN list: unused binds are NULL and match nothing
+                    binds = {f'id{i}': keys[i] if i < len(keys) else None for i in range(DB_GROUP_COMMIT_MAX_BATCH)}
+                    statement = lookup.statement(dialect)
+                    dialect.prepare_cursor(cursor, lookup.arraysize, lookup.prefetchrows)
+                    record_statement(statement)
+                    cursor.execute(statement, binds)
+                    rows = {row[0]: row for row in cursor.fetchall()}
+            finally:
+                cursor.close()
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+        return outcomes, rows
+
+    def stats(self):
+        """Get the batch counters of this committer."""
+        with self._condition:
+            stats = dict(self._stats)
+        stats['avg_batch'] = round(stats['rows'] / stats['batches'], 2) if stats['batches'] else 0.0
+        return stats
+
+
+def get_committer(name, shard, engine):
+    """
+    Get the process-wide committer of a write statement on one shard.
+
+    Args:
+        name: A statement listed in GROUP_WRITES
+        shard: Shard name, part of the committer's key
+        engine: SQLAlchemy engine of the shard
+
+    Returns:
+        committer: The GroupCommitter
+    """
+    committer = _committers.get((name, shard))
+    if committer is None:
+        with _committers_lock:
+            committer = _committers.get((name, shard))
+            if committer is None:
+                committer = _committers[(name, shard)] = GroupCommitter(name, engine)
+    return committer
+
+
+def get_group_commit_stats():
+    """Get the window, batch size and counters of every committer in use."""
+    return {
+        'enabled': group_commit_enabled(),
+        'window_ms': DB_GROUP_COMMIT_WINDOW,
+        'max_batch': DB_GROUP_COMMIT_MAX_BATCH,
+        'committers': {f'{name}@{shard}': committer.stats() for (name, shard), committer in list(_committers.items())}
+    }
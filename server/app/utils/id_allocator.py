@@ -0,0 +1,106 @@
+"""
+Block allocation of primary keys
+
+Each process reserves a block of sequence values in one round trip and
+hands IDs out locally until the block runs dry, in the style of a hi/lo
+allocator. Reservations run on their own connection and commit at once,
+so they never hold locks inside a request's unit of work; values of a
+block left unused when the process exits are lost, like any sequence gap.
+"""
+import threading
+from .. import db
+from .dialects import get_dialect
+from ..config import DB_ID_BLOCK_SIZE
+
+# Allocated resources: sequence, table and primary-key column
+SEQUENCES = {
+    'employees': ('HR_EMPLOYEES_SEQ', 'HR_EMPLOYEES', 'EMPLOYEE_ID'),
+    'departments': ('HR_DEPARTMENTS_SEQ', 'HR_DEPARTMENTS', 'DEPARTMENT_ID'),
+    'locations': ('HR_LOCATIONS_SEQ', 'HR_LOCATIONS', 'LOCATION_ID')
+}
+
+_allocators = {}
+_allocators_lock = threading.Lock()
+
+
+class IdAllocator:
+    """Hands out primary keys for one resource from locally reserved blocks."""
+
+    def __init__(self, resource, block_size=DB_ID_BLOCK_SIZE):
+        self.resource = resource
+        self.sequence, self.table, self.column = SEQUENCES[resource]
+        self.block_size = block_size
+        self._ids = []
+        self._lock = threading.Lock()
+
+    def reserve(self, count):
+        """Reserve count new values from the database."""
+        connection = db.engine.raw_connection()
+        try:
+            ids = get_dialect().reserve_ids(connection, self.sequence, self.table, self.column, count)
+            connection.commit()
+            return ids
+        finally:
+            connection.close()
+
+    def next_ids(self, count):
+        """
+        Get count new primary keys.
+
+        A bulk request larger than what is left locally reserves the missing
+        values in the same round trip as the next block.
+
+        Args:
+            count: Number of keys needed
+
+        Returns:
+            ids: List of unused primary keys
+        """
+        with self._lock:
+            if count > len(self._ids):
+                self._ids.extend(self.reserve(count - len(self._ids) + self.block_size))
+            ids = self._ids[:count]
+            del self._ids[:count]
+            return ids
+
+    def next_id(self):
+        """Get one new primary key."""
+        return self.next_ids(1)[0]
+
+    def stats(self):
+        """Get the number of keys still reserved locally."""
+        return {'sequence': self.sequence, 'block_size': self.block_size, 'remaining': len(self._ids)}
+
+
+def get_allocator(resource):
+    """
+    Get the process-wide allocator of a resource.
+
+    Args:
+        resource: One of 'employees', 'departments' or 'locations'
+
+    Returns:
+        allocator: The IdAllocator for the resource
+    """
+    allocator = _allocators.get(resource)
+    if allocator is None:
+        with _allocators_lock:
+            allocator = _allocators.get(resource)
+            if allocator is None:
+                allocator = _allocators[resource] = IdAllocator(resource)
+    return allocator
+
+
+def allocate_id(resource):
+    """Get one new primary key of a resource."""
+    return get_allocator(resource).next_id()
+
+
+def allocate_ids(resource, count):
+    """Get count new primary keys of a resource for a bulk insert."""
+    return get_allocator(resource).next_ids(count)
+
+
+def get_allocator_stats():
+    """Get the local reservation state of every allocator in use."""
+    return {resource: allocator.stats() for resource, allocator in list(_allocators.items())}
@@ -0,0 +1,124 @@
+"""
+Compound documents for the employee and department endpoints
+
+?include=manager,direct_reports,job_history,department.location adds the
+named relationships to each returned record, so a page needs one request
+instead of one per related record. Dotted paths include the relationships
+of included records.
+
+Every relationship is resolved by a batched loader: the keys of all the
+records it applies to are collected first and looked up with one IN-list
+statement (see gather_batch_query), however many records there are, and
+never with a lookup per record.
+"""
+from .db_utils import (
+    gather_batch_query,
+    employee_from_row,
+    department_summary_from_row,
+    location_from_row,
+    job_history_from_row
+)
+
+# Deepest dotted path accepted, e.g. manager.department.location
+INCLUDE_MAX_DEPTH = 3
+
+
+class Relationship:
+    """A relationship that can be included in the records of one resource."""
+
+    def __init__(self, key, query, build, match=0, many=False, target=None, order=None):
+        """
+        Args:
+            key: Field of the parent record holding the looked-up key
+            query: Batch lookup (see register_batch_query)
+            build: Function building an included record from a row
+            match: Column of a row holding the key of the record it belongs to
+            many: Whether a record has a list of them, or at most one
+            target: Resource of the included records, if they have relationships of their own
+            order: Sort key of each shard's rows, for lists read from the shards
+        """
+        self.key = key
+        self.query = query
+        self.build = build
+        self.match = match
+        self.many = many
+        self.target = target
+        self.order = order
+
+
+RELATIONSHIPS = {
+    'employees': {
+        'manager': Relationship('manager_id', 'employees.by_ids', employee_from_row, target='employees'),
+        'direct_reports': Relationship('employee_id', 'employees.by_managers', employee_from_row, match=9, many=True,
+                                       target='employees', order=lambda row: (row[9], row[0])),
+        'job_history': Relationship('employee_id', 'job_history.by_employees', job_history_from_row, many=True,
+                                    order=lambda row: (row[0], row[1])),
+        'department': Relationship('department_id', 'departments.by_ids', department_summary_from_row,
+                                   target='departments')
+    },
+    'departments': {
+        'manager': Relationship('manager_id', 'employees.by_ids', employee_from_row, target='employees'),
+        'employees': Relationship('department_id', 'employees.by_departments', employee_from_row, match=10, many=True,
+                                  target='employees', order=lambda row: (row[10], row[0])),
+        'location': Relationship('department_id', 'departments.locations', lambda row: location_from_row(row[1:]))
+    }
+}
+
+
+def parse_includes(resource, value):
+    """
+    Parse an ?include= value into a tree of relationships.
+
+    Args:
+        resource: 'employees' or 'departments'
+        value: Comma-separated relationship paths, or None
+
+    Returns:
+        tree: {name: subtree} for each included relationship (empty for none)
+
+    Raises:
+        ValueError: If a path names a relationship that does not exist or is too deep
+    """
+    tree = {}
+    for path in filter(None, (part.strip() for part in (value or '').split(','))):
+        names = path.split('.')
+        if len(names) > INCLUDE_MAX_DEPTH:
+            raise ValueError(f"include '{path}' is nested more than {INCLUDE_MAX_DEPTH} levels deep")
+
+        current, node = resource, tree
+        for name in names:
+            relationship = RELATIONSHIPS.get(current, {}).get(name) if current else None
+            if relationship is None:
+                raise ValueError(f"Unknown include '{path}'")
+            node = node.setdefault(name, {})
+            current = relationship.target
+    return tree
+
+
+def load_includes(resource, records, tree):
+    """
+    Add the included relationships to records, with one batched lookup per
+    relationship and level.
+
+    Args:
+        resource: Resource of the records
+        records: Record dicts, updated in place
+        tree: Relationships to include, from parse_includes
+    """
+    for name, subtree in tree.items():
+        relationship = RELATIONSHIPS[resource][name]
+        keys = dict.fromkeys(record[relationship.key] for record in records if record.get(relationship.key) is not None)
+
+        related = {}
+        if keys:
+            for row in gather_batch_query(relationship.query, keys, key=relationship.order):
+                related.setdefault(row[relationship.match], []).append(relationship.build(row))
+
+        for record in records:
+            found = related.get(record.get(relationship.key), [])
+            record[name] = found if relationship.many else (found[0] if found else None)
+
+        if subtree:
+            # Records shared by several parents get their own relationships once
+            included = {id(item): item for items in related.values() for item in items}
+            load_includes(relationship.target, list(included.values()), subtree)
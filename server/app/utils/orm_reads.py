@@ -0,0 +1,281 @@
+"""
+ORM-path reads of the direct routes
+
+The employee, department, job and location routes read through the query
+registry on the direct path (see db_utils.py). While that path's breaker
+is open (see circuit_breaker.py), their fallback views read the same
+records here, on the request's session, so they go through the ORM's
+engines, read routing and retries instead.
+
+Each select lists the columns of the registered statement it stands in
+for, in the same order, so its rows go through the same builders in
+db_utils.py and a response is the same on either path. Employees and
+departments are read on every shard and merged like the gathered
+statements; a single record is looked for on its shard, found through the
+session, since locate_shard reads on the direct path.
+"""
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+from .. import db
+from ..models import Country, Department, Employee, Job, Location
+from .db_utils import (
+    department_from_rows,
+    department_list_from_row,
+    employee_from_row,
+    job_from_row,
+    job_from_rows,
+    location_from_row,
+    location_from_rows,
+    split_detail_rows
+)
+from .fast_reads import execute_on_shards
+from .sharding import MAIN_SHARD, cached_shard, get_shards, on_shard, remember_shard, shard_configured, shard_for_region
+
+_manager = aliased(Employee, name='manager')
+_member = aliased(Employee, name='member')
+_child_department = aliased(Department, name='child_department')
+
+# employees.list
+EMPLOYEE_SELECT = (
+    select(Employee.EMPLOYEE_ID, Employee.FIRST_NAME, Employee.LAST_NAME, Employee.EMAIL,
+           Employee.PHONE_NUMBER, Employee.HIRE_DATE, Employee.JOB_ID, Employee.SALARY,
+           Employee.COMMISSION_PCT, Employee.MANAGER_ID, Employee.DEPARTMENT_ID,
+           Department.DEPARTMENT_NAME, Job.JOB_TITLE)
+    .outerjoin(Department, Employee.DEPARTMENT_ID == Department.DEPARTMENT_ID)
+    .outerjoin(Job, Employee.JOB_ID == Job.JOB_ID)
+)
+
+# departments.list
+DEPARTMENT_SELECT = (
+    select(Department.DEPARTMENT_ID, Department.DEPARTMENT_NAME, Department.MANAGER_ID,
+           _manager.FIRST_NAME, _manager.LAST_NAME, Location.CITY, Country.COUNTRY_NAME, Job.JOB_TITLE)
+    .outerjoin(_manager, Department.MANAGER_ID == _manager.EMPLOYEE_ID)
+    .outerjoin(Location, Department.LOCATION_ID == Location.LOCATION_ID)
+    .outerjoin(Country, Location.COUNTRY_ID == Country.COUNTRY_ID)
+    .outerjoin(Job, _manager.JOB_ID == Job.JOB_ID)
+)
+
+# departments.get: the department, then one of its employees per row
+DEPARTMENT_DETAIL_SELECT = (
+    select(Department.DEPARTMENT_ID, Department.DEPARTMENT_NAME, Department.MANAGER_ID,
+           _manager.FIRST_NAME, Location.CITY, Country.COUNTRY_NAME, Job.JOB_TITLE,
+           _member.EMPLOYEE_ID, _member.FIRST_NAME, _member.LAST_NAME, _member.JOB_ID)
+    .outerjoin(_manager, Department.MANAGER_ID == _manager.EMPLOYEE_ID)
+    .outerjoin(Location, Department.LOCATION_ID == Location.LOCATION_ID)
+    .outerjoin(Country, Location.COUNTRY_ID == Country.COUNTRY_ID)
+    .outerjoin(Job, _manager.JOB_ID == Job.JOB_ID)
+    .outerjoin(_member, _member.DEPARTMENT_ID == Department.DEPARTMENT_ID)
+    .order_by(_member.EMPLOYEE_ID)
+)
+
+# jobs.list
+JOB_SELECT = select(Job.JOB_ID, Job.JOB_TITLE, Job.MIN_SALARY, Job.MAX_SALARY)
+
+# jobs.get_with_employees
+JOB_DETAIL_SELECT = (
+    select(Job.JOB_ID, Job.JOB_TITLE, Job.MIN_SALARY, Job.MAX_SALARY,
+           _member.EMPLOYEE_ID, _member.FIRST_NAME, _member.LAST_NAME, _member.DEPARTMENT_ID)
+    .outerjoin(_member, _member.JOB_ID == Job.JOB_ID)
+    .order_by(_member.EMPLOYEE_ID)
+)
+
+# locations.list
+LOCATION_SELECT = (
+    select(Location.LOCATION_ID, Location.STREET_ADDRESS, Location.POSTAL_CODE, Location.CITY,
+           Location.STATE_PROVINCE, Location.COUNTRY_ID, Country.COUNTRY_NAME)
+    .outerjoin(Country, Location.COUNTRY_ID == Country.COUNTRY_ID)
+)
+
+# locations.get
+LOCATION_DETAIL_SELECT = (
+    select(Location.LOCATION_ID, Location.STREET_ADDRESS, Location.POSTAL_CODE, Location.CITY,
+           Location.STATE_PROVINCE, Location.COUNTRY_ID, Country.COUNTRY_NAME,
+           _child_department.DEPARTMENT_ID, _child_department.DEPARTMENT_NAME, _child_department.MANAGER_ID)
+    .outerjoin(Country, Location.COUNTRY_ID == Country.COUNTRY_ID)
+    .outerjoin(_child_department, _child_department.LOCATION_ID == Location.LOCATION_ID)
+    .order_by(_child_department.DEPARTMENT_ID)
+)
+
+# locations.options
+LOCATION_OPTIONS_SELECT = (
+    select(Location.LOCATION_ID,
+           func.coalesce(Location.CITY, '') + ', ' + func.coalesce(Location.STATE_PROVINCE, '')
+           + ' (' + func.coalesce(Country.COUNTRY_NAME, '') + ')')
+    .outerjoin(Country, Location.COUNTRY_ID == Country.COUNTRY_ID)
+    .order_by(Location.CITY)
+)
+
+
+def read_rows(statement, sharded=False, key=None, limit=None):
+    """
+    Run a select on the request's session.
+
+    Args:
+        statement: SELECT statement
+        sharded: Whether it reads employees or departments, held by the region shards
+        key: Sort key of the rows merged across shards (optional)
+        limit: Rows to keep after merging, for keyset pages (optional)
+    """
+    if sharded and shard_configured():
+        return execute_on_shards(statement, key=key, limit=limit)
+    return db.session.execute(statement).all()
+
+
+def read_page_rows(statement, key_column, limit, after, sharded=False):
+    """Run one keyset page of a select, the rows after the key after in key order."""
+    statement = statement.where(key_column > (-1 if after is None else after)).order_by(key_column).limit(limit)
+    return read_rows(statement, sharded, key=lambda row: row[0], limit=limit)
+
+
+def read_many(statement, key_column, ids, build, sharded=False):
+    """
+    Read records by key in one statement (per shard), like db_utils.gather_many.
+
+    Returns:
+        (records, not_found): The records found, in the order of ids, and the keys of none
+    """
+    found = {row[0]: row for row in read_rows(statement.where(key_column.in_(ids)), sharded)}
+    return [build(found[key]) for key in ids if key in found], [key for key in ids if key not in found]
+
+
+def locate_shard(resource, key):
+    """
+    Get the shard holding an employee or department through the session.
+
+    Returns:
+        shard: A shard name; the main database if sharding is off or the key does not exist
+    """
+    if not shard_configured():
+        return MAIN_SHARD
+
+    shard = cached_shard(resource, key)
+    if shard is not None:
+        return shard
+
+    column = Employee.EMPLOYEE_ID if resource == 'employees' else Department.DEPARTMENT_ID
+    for shard in get_shards():
+        with on_shard(shard):
+            if db.session.execute(select(column).where(column == key)).first() is not None:
+                remember_shard(resource, key, shard)
+                return shard
+    return MAIN_SHARD
+
+
+def location_shard(location_id):
+    """Get the shard holding the departments of a location, by the location's region."""
+    if not shard_configured():
+        return MAIN_SHARD
+
+    statement = (select(Country.REGION_ID)
+                 .join(Location, Location.COUNTRY_ID == Country.COUNTRY_ID)
+                 .where(Location.LOCATION_ID == location_id))
+    with on_shard(MAIN_SHARD):
+        region_id = db.session.execute(statement).scalar()
+    return shard_for_region(region_id) if region_id is not None else MAIN_SHARD
+
+
+def options_from_rows(rows):
+    """Build dropdown options from (value, label) rows."""
+    return [{"value": row[0], "label": row[1]} for row in rows]
+
+
+def get_employees(limit=None, after=None):
+    """Get employees, or one keyset page of them, like db_utils.get_employees."""
+    if limit is None:
+        rows = read_rows(EMPLOYEE_SELECT, sharded=True)
+    else:
+        rows = read_page_rows(EMPLOYEE_SELECT, Employee.EMPLOYEE_ID, limit, after, sharded=True)
+    return [employee_from_row(row) for row in rows]
+
+
+def get_employees_by_ids(employee_ids):
+    """Get the employees with the given IDs, like db_utils.get_employees_by_ids."""
+    return read_many(EMPLOYEE_SELECT, Employee.EMPLOYEE_ID, employee_ids, employee_from_row, sharded=True)
+
+
+def get_employee(employee_id):
+    """Get a single employee by ID, like db_utils.get_employee."""
+    with on_shard(locate_shard('employees', employee_id)):
+        row = db.session.execute(EMPLOYEE_SELECT.where(Employee.EMPLOYEE_ID == employee_id)).first()
+    return employee_from_row(row) if row else None
+
+
+def get_departments(limit=None, after=None):
+    """Get departments, or one keyset page of them, like db_utils.get_departments."""
+    if limit is None:
+        rows = read_rows(DEPARTMENT_SELECT, sharded=True)
+    else:
+        rows = read_page_rows(DEPARTMENT_SELECT, Department.DEPARTMENT_ID, limit, after, sharded=True)
+    return [department_list_from_row(row) for row in rows]
+
+
+def get_departments_by_ids(department_ids):
+    """Get the departments with the given IDs, like db_utils.get_departments_by_ids."""
+    return read_many(DEPARTMENT_SELECT, Department.DEPARTMENT_ID, department_ids, department_list_from_row,
+                     sharded=True)
+
+
+def get_department(department_id):
+    """Get a single department and its employees by ID, like db_utils.get_department."""
+    with on_shard(locate_shard('departments', department_id)):
+        rows = db.session.execute(DEPARTMENT_DETAIL_SELECT.where(Department.DEPARTMENT_ID == department_id)).all()
+    if not rows:
+        return None
+    return department_from_rows(*split_detail_rows(rows, 7))
+
+
+def get_department_options():
+    """Get departments for dropdown options, like db_utils.get_department_options."""
+    statement = select(Department.DEPARTMENT_ID, Department.DEPARTMENT_NAME).order_by(Department.DEPARTMENT_NAME)
+    return options_from_rows(read_rows(statement, sharded=True, key=lambda row: row[1] or ''))
+
+
+def get_jobs():
+    """Get all jobs, like db_utils.get_jobs."""
+    return [job_from_row(row) for row in read_rows(JOB_SELECT)]
+
+
+def get_jobs_by_ids(job_ids):
+    """Get the jobs with the given IDs, like db_utils.get_jobs_by_ids."""
+    return read_many(JOB_SELECT, Job.JOB_ID, job_ids, job_from_row)
+
+
+def get_job(job_id):
+    """Get a single job and its employees on every shard, like db_utils.get_job."""
+    rows = read_rows(JOB_DETAIL_SELECT.where(Job.JOB_ID == job_id), sharded=True, key=lambda row: row[4] or 0)
+    if not rows:
+        return None
+    return job_from_rows(*split_detail_rows(rows, 4))
+
+
+def get_job_options():
+    """Get jobs for dropdown options, like db_utils.get_job_options."""
+    return options_from_rows(read_rows(select(Job.JOB_ID, Job.JOB_TITLE).order_by(Job.JOB_TITLE)))
+
+
+def get_locations(limit=None, after=None):
+    """Get locations, or one keyset page of them, like db_utils.get_locations."""
+    if limit is None:
+        rows = read_rows(LOCATION_SELECT)
+    else:
+        rows = read_page_rows(LOCATION_SELECT, Location.LOCATION_ID, limit, after)
+    return [location_from_row(row) for row in rows]
+
+
+def get_locations_by_ids(location_ids):
+    """Get the locations with the given IDs, like db_utils.get_locations_by_ids."""
+    return read_many(LOCATION_SELECT, Location.LOCATION_ID, location_ids, location_from_row)
+
+
+def get_location(location_id):
+    """Get a single location and its departments by ID, like db_utils.get_location."""
+    with on_shard(location_shard(location_id)):
+        rows = db.session.execute(LOCATION_DETAIL_SELECT.where(Location.LOCATION_ID == location_id)).all()
+    if not rows:
+        return None
+    return location_from_rows(*split_detail_rows(rows, 7))
+
+
+def get_location_options():
+    """Get locations for dropdown options, like db_utils.get_location_options."""
+    return options_from_rows(read_rows(LOCATION_OPTIONS_SELECT))
@@ -0,0 +1,152 @@
+"""
+Keyset pagination and multi-get helpers for the list endpoints
+"""
+import base64
+import json
+from flask import request
+from ..config import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, MAX_MULTI_GET_IDS
+
+
+class PageRequest:
+    """A parsed ?limit=&after= request for one resource."""
+
+    def __init__(self, resource, limit, after):
+        self.resource = resource
+        self.limit = limit
+        self.after = after  # list of key values of the last row seen, or None
+
+
+def encode_cursor(resource, key):
+    """
+    Encode the primary key of the last row on a page as an opaque
+    continuation token.
+
+    Args:
+        resource: Name of the listed resource
+        key: List of primary-key values (JSON serializable)
+
+    Returns:
+        token: A URL-safe string
+    """
+    payload = json.dumps({'r': resource, 'k': key}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(resource, token):
+    """
+    Decode a continuation token produced by encode_cursor.
+
+    Raises:
+        ValueError: If the token is malformed or belongs to another resource
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        key = payload['k']
+        owner = payload['r']
+    except (ValueError, KeyError, TypeError):
+        raise ValueError('Invalid pagination cursor')
+
+    if owner != resource or not isinstance(key, list):
+        raise ValueError('Invalid pagination cursor')
+    return key
+
+
+def get_page_request(resource, key_types=(int,)):
+    """
+    Parse the keyset pagination arguments of the current request.
+
+    Args:
+        resource: Name of the listed resource
+        key_types: Callables that coerce each primary-key column of the cursor
+
+    Returns:
+        page: A PageRequest, or None when neither limit nor after was given
+
+    Raises:
+        ValueError: If limit or after is invalid
+    """
+    limit_arg = request.args.get('limit')
+    after_arg = request.args.get('after')
+
+    if limit_arg is None and after_arg is None:
+        return None
+
+    if limit_arg is None:
+        limit = DEFAULT_PAGE_SIZE
+    else:
+        try:
+            limit = int(limit_arg)
+        except ValueError:
+            raise ValueError('limit must be an integer')
+        if limit < 1:
+            raise ValueError('limit must be at least 1')
+        limit = min(limit, MAX_PAGE_SIZE)
+
+    after = None
+    if after_arg:
+        key = decode_cursor(resource, after_arg)
+        if len(key) != len(key_types):
+            raise ValueError('Invalid pagination cursor')
+        try:
+            after = [key_type(value) for key_type, value in zip(key_types, key)]
+        except (ValueError, TypeError):
+            raise ValueError('Invalid pagination cursor')
+
+    return PageRequest(resource, limit, after)
+
+
+def is_full_list():
+    """Whether the current request reads a whole list: no ?limit=, ?after= or ?ids=."""
+    return not any(arg in request.args for arg in ('limit', 'after', 'ids'))
+
+
+def build_page(rows, page, key_fn):
+    """
+    Trim a result fetched with limit + 1 rows to the page size and build the
+    continuation token for the next page.
+
+    Args:
+        rows: Rows fetched in key order, at most page.limit + 1
+        page: The PageRequest being served
+        key_fn: Function returning the primary-key list of a row
+
+    Returns:
+        (rows, next_cursor): The page rows and the token, or None on the last page
+    """
+    if len(rows) <= page.limit:
+        return rows, None
+
+    rows = rows[:page.limit]
+    return rows, encode_cursor(page.resource, key_fn(rows[-1]))
+
+
+def get_ids_request(key_type=int):
+    """
+    Parse the ?ids= argument of a multi-get request on a list endpoint.
+
+    Args:
+        key_type: Callable that coerces each key
+
+    Returns:
+        ids: The distinct keys in request order, or None when ids was not given
+
+    Raises:
+        ValueError: If ids is empty, invalid, too long, or combined with limit or after
+    """
+    ids_arg = request.args.get('ids')
+    if ids_arg is None:
+        return None
+
+    if 'limit' in request.args or 'after' in request.args:
+        raise ValueError('ids cannot be combined with limit or after')
+
+    try:
+        ids = list(dict.fromkeys(key_type(part.strip()) for part in ids_arg.split(',') if part.strip()))
+    except ValueError:
+        raise ValueError('ids must be a comma-separated list of IDs')
+    if not ids:
+        raise ValueError('ids must name at least one ID')
+    if len(ids) > MAX_MULTI_GET_IDS:
+        raise ValueError(f'ids may name at most {MAX_MULTI_GET_IDS} IDs')
+    return ids
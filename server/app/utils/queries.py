@@ -0,0 +1,719 @@
+"""
+Registry of named SQL statements used by the direct database helpers
+"""
+import threading
+from ..config import DB_GROUP_COMMIT_MAX_BATCH
+
+# Fetch sizing profiles
+# Full-table lists fetch in large batches to cut network round trips,
+# single-row lookups prefetch just enough rows to detect the end of the
+# result set in the same round trip as the execute.
+LIST_FETCH = {'arraysize': 1000, 'prefetchrows': 1000}
+CHILD_FETCH = {'arraysize': 200, 'prefetchrows': 200}
+SINGLE_ROW_FETCH = {'arraysize': 1, 'prefetchrows': 2}
+COUNT_FETCH = {'arraysize': 1, 'prefetchrows': 2}
+
+_registry = {}
+_stats = {}
+_stats_lock = threading.Lock()
+_statement_texts = {}
+
+
+class NamedQuery:
+    """A pre-declared SQL statement with its own fetch sizing."""
+
+    def __init__(self, name, sql, arraysize, prefetchrows, variants=None):
+        self.name = name
+        self.sql = sql
+        self.arraysize = arraysize
+        self.prefetchrows = prefetchrows
+        self.variants = variants or {}
+        self._statements = {}
+
+    def statement(self, dialect):
+        """
+        Get the statement to send on a dialect, translated once and cached.
+
+        Returns:
+            statement: SQL text, or the list of steps of a SQLite variant
+                (see SQLiteDialect.execute_returning)
+        """
+        statement = self._statements.get(dialect.name)
+        if statement is None:
+            source = self.variants.get(dialect.name, self.sql)
+            if isinstance(source, str):
+                statement = dialect.translate(source)
+            else:
+                statement = [
+                    (step[0], dialect.translate(step[1].strip())) if isinstance(step, tuple)
+                    else dialect.translate(step.strip())
+                    for step in source
+                ]
+            self._statements[dialect.name] = statement
+        return statement
+
+
+def register_query(name, sql, fetch=LIST_FETCH, sqlite=None):
+    """
+    Register a named SQL statement.
+
+    The statement text is stored once so every execution sends exactly the
+    same SQL, which lets the driver statement cache reuse the parsed cursor.
+
+    Args:
+        name: Unique name of the statement
+        sql: The Oracle SQL text
+        fetch: Fetch sizing profile (arraysize and prefetchrows)
+        sqlite: SQLite replacement for statements the SQLite dialect cannot
+            rewrite mechanically, such as PL/SQL blocks (optional)
+
+    Returns:
+        query: The registered NamedQuery
+    """
+    if name in _registry:
+        raise ValueError(f"Query '{name}' is already registered")
+
+    variants = {'sqlite': sqlite} if sqlite is not None else None
+    query = NamedQuery(name, sql.strip(), fetch['arraysize'], fetch['prefetchrows'], variants)
+    _registry[name] = query
+    _stats[name] = {'hits': 0, 'errors': 0, 'time_total': 0.0, 'time_max': 0.0}
+    return query
+
+
+def get_query(name):
+    """Get a registered statement by name."""
+    try:
+        return _registry[name]
+    except KeyError:
+        raise KeyError(f"Query '{name}' is not registered")
+
+
+def record_execution(name, elapsed, failed=False):
+    """Record one execution of a named statement."""
+    with _stats_lock:
+        stats = _stats[name]
+        stats['hits'] += 1
+        stats['time_total'] += elapsed
+        stats['time_max'] = max(stats['time_max'], elapsed)
+        if failed:
+            stats['errors'] += 1
+
+
+def get_query_stats():
+    """
+    Get hit and latency counters for every registered statement.
+
+    Returns:
+        stats: A dict keyed by statement name
+    """
+    with _stats_lock:
+        snapshot = {name: dict(stats) for name, stats in _stats.items()}
+
+    return {
+        name: {
+            'hits': stats['hits'],
+            'errors': stats['errors'],
+            'time_total_ms': round(stats['time_total'] * 1000, 3),
+            'time_avg_ms': round(stats['time_total'] * 1000 / stats['hits'], 3) if stats['hits'] else 0.0,
+            'time_max_ms': round(stats['time_max'] * 1000, 3)
+        }
+        for name, stats in snapshot.items()
+    }
+
+
+def record_statement(sql):
+    """
+    Record one execution of a SQL text, registered or not, or of each step
+    of a SQLite write.
+
+    Every distinct text costs a hard parse and a slot in the statement
+    cache, so the number of distinct texts should stay bounded.
+    """
+    texts = [sql] if isinstance(sql, str) else [step[1] if isinstance(step, tuple) else step for step in sql]
+    with _stats_lock:
+        for text in texts:
+            _statement_texts[text] = _statement_texts.get(text, 0) + 1
+
+
+def get_statement_stats():
+    """
+    Get the number of distinct SQL texts executed so far.
+
+    Returns:
+        stats: A dict with the distinct text and total execution counts
+    """
+    with _stats_lock:
+        return {
+            'distinct_statements': len(_statement_texts),
+            'executions': sum(_statement_texts.values())
+        }
+
+
+# IN-list sizes of the batch lookups. A batch statement is registered once
+# per size and its IN list is padded with NULL binds to the next size, so
+# each lookup has at most len(BATCH_SIZES) statement texts. Oracle allows
+# 1000 expressions in a list; larger key sets are split.
+BATCH_SIZES = (10, 100, 1000)
+
+
+def register_batch_query(name, sql):
+    """
+    Register a SELECT looking up a batch of keys, once per BATCH_SIZES size.
+
+    Args:
+        name: Name of the lookup; each size is registered as name[size]
+        sql: The Oracle SQL text, with :ids where the IN list goes
+    """
+    for size in BATCH_SIZES:
+        binds = ', '.join(f':id{index}' for index in range(size))
+        register_query(f'{name}[{size}]', sql.replace(':ids', binds), CHILD_FETCH if size <= 100 else LIST_FETCH)
+
+
+def registered_query_count():
+    """Get the number of registered statements."""
+    return len(_registry)
+
+
+# Shared tails for single-round-trip writes. The written row comes back
+# through RETURNING ... INTO out binds and the joined display columns are
+# looked up inside the same PL/SQL block.
+EMPLOYEE_RETURNING = """
+    RETURNING EMPLOYEE_ID, FIRST_NAME, LAST_NAME, EMAIL, PHONE_NUMBER, HIRE_DATE,
+              JOB_ID, SALARY, COMMISSION_PCT, MANAGER_ID, DEPARTMENT_ID
+    INTO :r_employee_id, :r_first_name, :r_last_name, :r_email, :r_phone_number, :r_hire_date,
+         :r_job_id, :r_salary, :r_commission_pct, :r_manager_id, :r_department_id;
+    :r_row_count := SQL%ROWCOUNT;
+    IF :r_row_count > 0 THEN
+        SELECT (SELECT DEPARTMENT_NAME FROM HR_DEPARTMENTS WHERE DEPARTMENT_ID = :r_department_id),
+               (SELECT JOB_TITLE FROM HR_JOBS WHERE JOB_ID = :r_job_id)
+        INTO :r_department_name, :r_job_title
+        FROM DUAL;
+    END IF;
+"""
+
+DEPARTMENT_RETURNING = """
+    RETURNING DEPARTMENT_ID, DEPARTMENT_NAME, MANAGER_ID, LOCATION_ID
+    INTO :r_department_id, :r_department_name, :r_manager_id, :r_location_id;
+    :r_row_count := SQL%ROWCOUNT;
+    IF :r_row_count > 0 THEN
+        SELECT MAX(e.FIRST_NAME), MAX(l.CITY), MAX(c.COUNTRY_NAME), MAX(j.JOB_TITLE)
+        INTO :r_manager_first_name, :r_location_city, :r_location_country, :r_job_title
+        FROM DUAL
+        LEFT JOIN HR_EMPLOYEES e ON e.EMPLOYEE_ID = :r_manager_id
+        LEFT JOIN HR_JOBS j ON j.JOB_ID = e.JOB_ID
+        LEFT JOIN HR_LOCATIONS l ON l.LOCATION_ID = :r_location_id
+        LEFT JOIN HR_COUNTRIES c ON c.COUNTRY_ID = l.COUNTRY_ID;
+    END IF;
+"""
+
+DEPARTMENT_EMPLOYEES = """
+    SELECT EMPLOYEE_ID, FIRST_NAME, LAST_NAME, JOB_ID
+    FROM HR_EMPLOYEES
+    WHERE DEPARTMENT_ID = :r_department_id
+    ORDER BY EMPLOYEE_ID
+"""
+
+# SQLite has no PL/SQL, so the same writes run as a DML statement with a
+# RETURNING clause followed by the display-column lookup.
+EMPLOYEE_RETURNING_SQLITE = """
+    RETURNING EMPLOYEE_ID AS r_employee_id, FIRST_NAME AS r_first_name, LAST_NAME AS r_last_name,
+              EMAIL AS r_email, PHONE_NUMBER AS r_phone_number, HIRE_DATE AS r_hire_date,
+              JOB_ID AS r_job_id, SALARY AS r_salary, COMMISSION_PCT AS r_commission_pct,
+              MANAGER_ID AS r_manager_id, DEPARTMENT_ID AS r_department_id
+"""
+
+EMPLOYEE_LOOKUP_SQLITE = """
+    SELECT (SELECT DEPARTMENT_NAME FROM HR_DEPARTMENTS WHERE DEPARTMENT_ID = :r_department_id) AS r_department_name,
+           (SELECT JOB_TITLE FROM HR_JOBS WHERE JOB_ID = :r_job_id) AS r_job_title
+"""
+
+DEPARTMENT_RETURNING_SQLITE = """
+    RETURNING DEPARTMENT_ID AS r_department_id, DEPARTMENT_NAME AS r_department_name,
+              MANAGER_ID AS r_manager_id, LOCATION_ID AS r_location_id
+"""
+
+DEPARTMENT_LOOKUP_SQLITE = """
+    SELECT e.FIRST_NAME AS r_manager_first_name, l.CITY AS r_location_city,
+           c.COUNTRY_NAME AS r_location_country, j.JOB_TITLE AS r_job_title
+    FROM (SELECT 1) one
+    LEFT JOIN HR_EMPLOYEES e ON e.EMPLOYEE_ID = :r_manager_id
+    LEFT JOIN HR_JOBS j ON j.JOB_ID = e.JOB_ID
+    LEFT JOIN HR_LOCATIONS l ON l.LOCATION_ID = :r_location_id
+    LEFT JOIN HR_COUNTRIES c ON c.COUNTRY_ID = l.COUNTRY_ID
+"""
+
+
+def register_write(name, dml, returning, returning_sqlite, lookup_sqlite, children=None):
+    """
+    Register a single-round-trip write: a PL/SQL block on Oracle and the
+    equivalent RETURNING steps on SQLite.
+
+    Args:
+        name: Unique name of the statement
+        dml: The INSERT, UPDATE or DELETE statement, without a semicolon
+        returning: Oracle RETURNING ... INTO tail
+        returning_sqlite: SQLite RETURNING clause
+        lookup_sqlite: SQLite lookup of the display columns
+        children: (out bind, SELECT) of a child list returned with the row (optional)
+    """
+    block = "BEGIN\n    " + dml.strip() + returning
+    sqlite = [dml.strip() + returning_sqlite, lookup_sqlite]
+    if children:
+        out_bind, select = children
+        block += f"    OPEN :{out_bind} FOR{select.rstrip()};\n"
+        sqlite.append((out_bind, select))
+    register_query(name, block + "END;", SINGLE_ROW_FETCH, sqlite=sqlite)
+
+
+# EMPLOYEE QUERIES
+register_query('employees.list', """
+    SELECT e.EMPLOYEE_ID, e.FIRST_NAME, e.LAST_NAME, e.EMAIL,
+           e.PHONE_NUMBER, e.HIRE_DATE, e.JOB_ID, e.SALARY,
+           e.COMMISSION_PCT, e.MANAGER_ID, e.DEPARTMENT_ID,
+           d.DEPARTMENT_NAME, j.JOB_TITLE
+    FROM HR_EMPLOYEES e
+    LEFT JOIN HR_DEPARTMENTS d ON e.DEPARTMENT_ID = d.DEPARTMENT_ID
+    LEFT JOIN HR_JOBS j ON e.JOB_ID = j.JOB_ID
+""", LIST_FETCH)
+
+# Keyset pages: rows after the last key seen, in primary-key order.
+# The first page binds after = -1, below every generated ID.
+register_query('employees.page', """
+    SELECT e.EMPLOYEE_ID, e.FIRST_NAME, e.LAST_NAME, e.EMAIL,
+           e.PHONE_NUMBER, e.HIRE_DATE, e.JOB_ID, e.SALARY,
+           e.COMMISSION_PCT, e.MANAGER_ID, e.DEPARTMENT_ID,
+           d.DEPARTMENT_NAME, j.JOB_TITLE
+    FROM HR_EMPLOYEES e
+    LEFT JOIN HR_DEPARTMENTS d ON e.DEPARTMENT_ID = d.DEPARTMENT_ID
+    LEFT JOIN HR_JOBS j ON e.JOB_ID = j.JOB_ID
+    WHERE e.EMPLOYEE_ID > :after
+    ORDER BY e.EMPLOYEE_ID
+    FETCH FIRST :limit ROWS ONLY
+""", LIST_FETCH)
+
+register_query('employees.get', """
+    SELECT e.EMPLOYEE_ID, e.FIRST_NAME, e.LAST_NAME, e.EMAIL,
+           e.PHONE_NUMBER, e.HIRE_DATE, e.JOB_ID, e.SALARY,
+           e.COMMISSION_PCT, e.MANAGER_ID, e.DEPARTMENT_ID,
+           d.DEPARTMENT_NAME, j.JOB_TITLE
+    FROM HR_EMPLOYEES e
+    LEFT JOIN HR_DEPARTMENTS d ON e.DEPARTMENT_ID = d.DEPARTMENT_ID
+    LEFT JOIN HR_JOBS j ON e.JOB_ID = j.JOB_ID
+    WHERE e.EMPLOYEE_ID = :emp_id
+""", SINGLE_ROW_FETCH)
+
+# Shard lookup: whether a shard holds the employee
+register_query('employees.exists', """
+    SELECT 1 FROM HR_EMPLOYEES WHERE EMPLOYEE_ID = :id
+""", SINGLE_ROW_FETCH)
+
+# Unique-key check across shards: who uses an email
+register_query('employees.email_owner', """
+    SELECT EMPLOYEE_ID FROM HR_EMPLOYEES WHERE EMAIL = :email
+""", SINGLE_ROW_FETCH)
+
+register_write('employees.insert', """
+    INSERT INTO HR_EMPLOYEES (
+        EMPLOYEE_ID, FIRST_NAME, LAST_NAME, EMAIL, PHONE_NUMBER,
+        HIRE_DATE, JOB_ID, SALARY, COMMISSION_PCT, MANAGER_ID, DEPARTMENT_ID
+    ) VALUES (
+        :employee_id, :first_name, :last_name, :email, :phone_number,
+        TO_DATE(:hire_date, 'YYYY-MM-DD'), :job_id, :salary, :commission_pct, :manager_id, :department_id
+    )""", EMPLOYEE_RETURNING, EMPLOYEE_RETURNING_SQLITE, EMPLOYEE_LOOKUP_SQLITE)
+
+# Fixed-shape update: every column is bound on every call and a set_<field>
+# flag of 0 keeps the existing value, so all partial updates share one
+# statement text and one cached cursor.
+EMPLOYEE_UPDATE_DML = """
+    UPDATE HR_EMPLOYEES
+    SET FIRST_NAME = CASE WHEN :set_first_name = 1 THEN :first_name ELSE FIRST_NAME END,
+        LAST_NAME = CASE WHEN :set_last_name = 1 THEN :last_name ELSE LAST_NAME END,
+        EMAIL = CASE WHEN :set_email = 1 THEN :email ELSE EMAIL END,
+        PHONE_NUMBER = CASE WHEN :set_phone_number = 1 THEN :phone_number ELSE PHONE_NUMBER END,
+        JOB_ID = CASE WHEN :set_job_id = 1 THEN :job_id ELSE JOB_ID END,
+        SALARY = CASE WHEN :set_salary = 1 THEN TO_NUMBER(:salary) ELSE SALARY END,
+        COMMISSION_PCT = CASE WHEN :set_commission_pct = 1 THEN TO_NUMBER(:commission_pct) ELSE COMMISSION_PCT END,
+        MANAGER_ID = CASE WHEN :set_manager_id = 1 THEN TO_NUMBER(:manager_id) ELSE MANAGER_ID END,
+        DEPARTMENT_ID = CASE WHEN :set_department_id = 1 THEN TO_NUMBER(:department_id) ELSE DEPARTMENT_ID END
+    WHERE EMPLOYEE_ID = :employee_id"""
+
+register_write('employees.update', EMPLOYEE_UPDATE_DML,
+               EMPLOYEE_RETURNING, EMPLOYEE_RETURNING_SQLITE, EMPLOYEE_LOOKUP_SQLITE)
+
+# Group commit (see group_commit.py): the plain update runs once per row
+# with executemany, and the written rows come back with one lookup whose
+# IN list always has DB_GROUP_COMMIT_MAX_BATCH binds (unused ones are NULL).
+register_query('employees.update_row', EMPLOYEE_UPDATE_DML, SINGLE_ROW_FETCH)
+
+register_query('employees.get_batch', f"""
+    SELECT e.EMPLOYEE_ID, e.FIRST_NAME, e.LAST_NAME, e.EMAIL,
+           e.PHONE_NUMBER, e.HIRE_DATE, e.JOB_ID, e.SALARY,
+           e.COMMISSION_PCT, e.MANAGER_ID, e.DEPARTMENT_ID,
+           d.DEPARTMENT_NAME, j.JOB_TITLE
+    FROM HR_EMPLOYEES e
+    LEFT JOIN HR_DEPARTMENTS d ON e.DEPARTMENT_ID = d.DEPARTMENT_ID
+    LEFT JOIN HR_JOBS j ON e.JOB_ID = j.JOB_ID
+    WHERE e.EMPLOYEE_ID IN ({', '.join(f':id{i}' for i in range(DB_GROUP_COMMIT_MAX_BATCH))})
+""", {'arraysize': DB_GROUP_COMMIT_MAX_BATCH, 'prefetchrows': DB_GROUP_COMMIT_MAX_BATCH + 1})
+
+register_write('employees.delete', """
+    DELETE FROM HR_EMPLOYEES WHERE EMPLOYEE_ID = :employee_id""",
+    EMPLOYEE_RETURNING, EMPLOYEE_RETURNING_SQLITE, EMPLOYEE_LOOKUP_SQLITE)
+
+# DEPARTMENT QUERIES
+register_query('departments.list', """
+    SELECT
+        d.DEPARTMENT_ID,
+        d.DEPARTMENT_NAME,
+        d.MANAGER_ID,
+        e.FIRST_NAME AS MANAGER_FIRST_NAME,
+        e.LAST_NAME AS MANAGER_LAST_NAME,
+        l.CITY AS LOCATION_CITY,
+        c.COUNTRY_NAME AS LOCATION_COUNTRY,
+        j.JOB_TITLE AS JOB_TITLE
+    FROM HR_DEPARTMENTS d
+    LEFT JOIN HR_EMPLOYEES e ON d.MANAGER_ID = e.EMPLOYEE_ID
+    LEFT JOIN HR_LOCATIONS l ON d.LOCATION_ID = l.LOCATION_ID
+    LEFT JOIN HR_COUNTRIES c ON l.COUNTRY_ID = c.COUNTRY_ID
+    LEFT JOIN HR_JOBS j ON e.JOB_ID = j.JOB_ID
+""", LIST_FETCH)
+
+register_query('departments.page', """
+    SELECT
+        d.DEPARTMENT_ID,
+        d.DEPARTMENT_NAME,
+        d.MANAGER_ID,
+        e.FIRST_NAME AS MANAGER_FIRST_NAME,
+        e.LAST_NAME AS MANAGER_LAST_NAME,
+        l.CITY AS LOCATION_CITY,
+        c.COUNTRY_NAME AS LOCATION_COUNTRY,
+        j.JOB_TITLE AS JOB_TITLE
+    FROM HR_DEPARTMENTS d
+    LEFT JOIN HR_EMPLOYEES e ON d.MANAGER_ID = e.EMPLOYEE_ID
+    LEFT JOIN HR_LOCATIONS l ON d.LOCATION_ID = l.LOCATION_ID
+    LEFT JOIN HR_COUNTRIES c ON l.COUNTRY_ID = c.COUNTRY_ID
+    LEFT JOIN HR_JOBS j ON e.JOB_ID = j.JOB_ID
+    WHERE d.DEPARTMENT_ID > :after
+    ORDER BY d.DEPARTMENT_ID
+    FETCH FIRST :limit ROWS ONLY
+""", LIST_FETCH)
+
+# Detail statements return the parent columns followed by one child per row
+# (NULL child columns when there are none) so a single round trip serves
+# the parent and its child collection.
+register_query('departments.get', """
+    SELECT
+        d.DEPARTMENT_ID,
+        d.DEPARTMENT_NAME,
+        d.MANAGER_ID,
+        e.FIRST_NAME AS MANAGER_FIRST_NAME,
+        l.CITY AS LOCATION_CITY,
+        c.COUNTRY_NAME AS LOCATION_COUNTRY,
+        j.JOB_TITLE AS JOB_TITLE,
+        de.EMPLOYEE_ID, de.FIRST_NAME, de.LAST_NAME, de.JOB_ID
+    FROM HR_DEPARTMENTS d
+    LEFT JOIN HR_EMPLOYEES e ON d.MANAGER_ID = e.EMPLOYEE_ID
+    LEFT JOIN HR_LOCATIONS l ON d.LOCATION_ID = l.LOCATION_ID
+    LEFT JOIN HR_COUNTRIES c ON l.COUNTRY_ID = c.COUNTRY_ID
+    LEFT JOIN HR_JOBS j ON e.JOB_ID = j.JOB_ID
+    LEFT JOIN HR_EMPLOYEES de ON de.DEPARTMENT_ID = d.DEPARTMENT_ID
+    WHERE d.DEPARTMENT_ID = :dept_id
+    ORDER BY de.EMPLOYEE_ID
+""", CHILD_FETCH)
+
+register_query('departments.exists', """
+    SELECT 1 FROM HR_DEPARTMENTS WHERE DEPARTMENT_ID = :id
+""", SINGLE_ROW_FETCH)
+
+register_query('departments.options', """
+    SELECT DEPARTMENT_ID, DEPARTMENT_NAME FROM HR_DEPARTMENTS ORDER BY DEPARTMENT_NAME
+""", LIST_FETCH)
+
+register_write('departments.insert', """
+    INSERT INTO HR_DEPARTMENTS (
+        DEPARTMENT_ID, DEPARTMENT_NAME, MANAGER_ID, LOCATION_ID
+    ) VALUES (
+        :department_id, :department_name, :manager_id, :location_id
+    )""", DEPARTMENT_RETURNING, DEPARTMENT_RETURNING_SQLITE, DEPARTMENT_LOOKUP_SQLITE)
+
+# Fixed-shape update; the department's employees come back with the row
+register_write('departments.update', """
+    UPDATE HR_DEPARTMENTS
+    SET DEPARTMENT_NAME = CASE WHEN :set_department_name = 1 THEN :department_name ELSE DEPARTMENT_NAME END,
+        DEPARTMENT_ID = CASE WHEN :set_department_id = 1 THEN TO_NUMBER(:department_id) ELSE DEPARTMENT_ID END,
+        LOCATION_ID = CASE WHEN :set_location_id = 1 THEN TO_NUMBER(:location_id) ELSE LOCATION_ID END,
+        MANAGER_ID = CASE WHEN :set_manager_id = 1 THEN TO_NUMBER(:manager_id) ELSE MANAGER_ID END
+    WHERE DEPARTMENT_ID = :current_department_id""",
+    DEPARTMENT_RETURNING, DEPARTMENT_RETURNING_SQLITE, DEPARTMENT_LOOKUP_SQLITE,
+    children=('r_employees', DEPARTMENT_EMPLOYEES))
+
+register_write('departments.delete', """
+    DELETE FROM HR_DEPARTMENTS WHERE DEPARTMENT_ID = :department_id""",
+    DEPARTMENT_RETURNING, DEPARTMENT_RETURNING_SQLITE, DEPARTMENT_LOOKUP_SQLITE)
+
+register_query('direct.departments.get', """
+    SELECT d.DEPARTMENT_ID, d.DEPARTMENT_NAME, d.MANAGER_ID, d.LOCATION_ID,
+           l.CITY, l.STATE_PROVINCE,
+           de.EMPLOYEE_ID, de.FIRST_NAME, de.LAST_NAME, de.EMAIL, de.JOB_ID
+    FROM HR_DEPARTMENTS d
+    LEFT JOIN HR_LOCATIONS l ON d.LOCATION_ID = l.LOCATION_ID
+    LEFT JOIN HR_EMPLOYEES de ON de.DEPARTMENT_ID = d.DEPARTMENT_ID
+    WHERE d.DEPARTMENT_ID = :dept_id
+    ORDER BY de.EMPLOYEE_ID
+""", CHILD_FETCH)
+
+# JOB QUERIES
+register_query('jobs.list', """
+    SELECT JOB_ID, JOB_TITLE, MIN_SALARY, MAX_SALARY FROM HR_JOBS
+""", LIST_FETCH)
+
+register_query('jobs.get', """
+    SELECT JOB_ID, JOB_TITLE, MIN_SALARY, MAX_SALARY
+    FROM HR_JOBS
+    WHERE JOB_ID = :job_id
+""", SINGLE_ROW_FETCH)
+
+register_query('jobs.get_with_employees', """
+    SELECT j.JOB_ID, j.JOB_TITLE, j.MIN_SALARY, j.MAX_SALARY,
+           je.EMPLOYEE_ID, je.FIRST_NAME, je.LAST_NAME, je.DEPARTMENT_ID
+    FROM HR_JOBS j
+    LEFT JOIN HR_EMPLOYEES je ON je.JOB_ID = j.JOB_ID
+    WHERE j.JOB_ID = :job_id
+    ORDER BY je.EMPLOYEE_ID
+""", CHILD_FETCH)
+
+register_query('jobs.options', """
+    SELECT JOB_ID, JOB_TITLE FROM HR_JOBS ORDER BY JOB_TITLE
+""", LIST_FETCH)
+
+# LOCATION QUERIES
+register_query('locations.list', """
+    SELECT l.LOCATION_ID, l.STREET_ADDRESS, l.POSTAL_CODE, l.CITY,
+           l.STATE_PROVINCE, l.COUNTRY_ID, c.COUNTRY_NAME
+    FROM HR_LOCATIONS l
+    LEFT JOIN HR_COUNTRIES c ON l.COUNTRY_ID = c.COUNTRY_ID
+""", LIST_FETCH)
+
+register_query('locations.page', """
+    SELECT l.LOCATION_ID, l.STREET_ADDRESS, l.POSTAL_CODE, l.CITY,
+           l.STATE_PROVINCE, l.COUNTRY_ID, c.COUNTRY_NAME
+    FROM HR_LOCATIONS l
+    LEFT JOIN HR_COUNTRIES c ON l.COUNTRY_ID = c.COUNTRY_ID
+    WHERE l.LOCATION_ID > :after
+    ORDER BY l.LOCATION_ID
+    FETCH FIRST :limit ROWS ONLY
+""", LIST_FETCH)
+
+register_query('locations.get', """
+    SELECT l.LOCATION_ID, l.STREET_ADDRESS, l.POSTAL_CODE, l.CITY,
+           l.STATE_PROVINCE, l.COUNTRY_ID, c.COUNTRY_NAME,
+           ld.DEPARTMENT_ID, ld.DEPARTMENT_NAME, ld.MANAGER_ID
+    FROM HR_LOCATIONS l
+    LEFT JOIN HR_COUNTRIES c ON l.COUNTRY_ID = c.COUNTRY_ID
+    LEFT JOIN HR_DEPARTMENTS ld ON ld.LOCATION_ID = l.LOCATION_ID
+    WHERE l.LOCATION_ID = :loc_id
+    ORDER BY ld.DEPARTMENT_ID
+""", CHILD_FETCH)
+
+# Region of a location, which decides the shard of its departments
+register_query('locations.region', """
+    SELECT c.REGION_ID
+    FROM HR_LOCATIONS l
+    JOIN HR_COUNTRIES c ON l.COUNTRY_ID = c.COUNTRY_ID
+    WHERE l.LOCATION_ID = :loc_id
+""", SINGLE_ROW_FETCH)
+
+register_query('locations.options', """
+    SELECT l.LOCATION_ID,
+           COALESCE(l.CITY, '') || ', ' || COALESCE(l.STATE_PROVINCE, '') || ' (' || COALESCE(c.COUNTRY_NAME, '') || ')' AS LOCATION_DISPLAY
+    FROM HR_LOCATIONS l
+    LEFT JOIN HR_COUNTRIES c ON l.COUNTRY_ID = c.COUNTRY_ID
+    ORDER BY l.CITY
+""", LIST_FETCH)
+
+# COUNTRY QUERIES (direct fallback of the ORM country routes)
+register_query('countries.list', """
+    SELECT c.COUNTRY_ID, c.COUNTRY_NAME, c.REGION_ID, r.REGION_NAME
+    FROM HR_COUNTRIES c
+    LEFT JOIN HR_REGIONS r ON c.REGION_ID = r.REGION_ID
+""", LIST_FETCH)
+
+register_query('countries.page', """
+    SELECT c.COUNTRY_ID, c.COUNTRY_NAME, c.REGION_ID, r.REGION_NAME
+    FROM HR_COUNTRIES c
+    LEFT JOIN HR_REGIONS r ON c.REGION_ID = r.REGION_ID
+    WHERE :after IS NULL OR c.COUNTRY_ID > :after
+    ORDER BY c.COUNTRY_ID
+    FETCH FIRST :limit ROWS ONLY
+""", LIST_FETCH)
+
+register_query('countries.get', """
+    SELECT c.COUNTRY_ID, c.COUNTRY_NAME, c.REGION_ID, r.REGION_NAME,
+           l.LOCATION_ID, l.STREET_ADDRESS, l.POSTAL_CODE, l.CITY,
+           l.STATE_PROVINCE, l.COUNTRY_ID, c.COUNTRY_NAME
+    FROM HR_COUNTRIES c
+    LEFT JOIN HR_REGIONS r ON c.REGION_ID = r.REGION_ID
+    LEFT JOIN HR_LOCATIONS l ON l.COUNTRY_ID = c.COUNTRY_ID
+    WHERE c.COUNTRY_ID = :country_id
+    ORDER BY l.LOCATION_ID
+""", CHILD_FETCH)
+
+# REGION QUERIES (direct fallback of the ORM region routes)
+register_query('regions.list', """
+    SELECT REGION_ID, REGION_NAME FROM HR_REGIONS
+""", LIST_FETCH)
+
+register_query('regions.page', """
+    SELECT REGION_ID, REGION_NAME
+    FROM HR_REGIONS
+    WHERE REGION_ID > :after
+    ORDER BY REGION_ID
+    FETCH FIRST :limit ROWS ONLY
+""", LIST_FETCH)
+
+register_query('regions.get', """
+    SELECT r.REGION_ID, r.REGION_NAME,
+           c.COUNTRY_ID, c.COUNTRY_NAME, c.REGION_ID, r.REGION_NAME
+    FROM HR_REGIONS r
+    LEFT JOIN HR_COUNTRIES c ON c.REGION_ID = r.REGION_ID
+    WHERE r.REGION_ID = :region_id
+    ORDER BY c.COUNTRY_ID
+""", CHILD_FETCH)
+
+# JOB GRADE QUERIES (direct fallback of the ORM job grade routes)
+register_query('job_grades.list', """
+    SELECT GRADE_LEVEL, LOWEST_SAL, HIGHEST_SAL FROM HR_JOB_GRADES
+""", LIST_FETCH)
+
+register_query('job_grades.get', """
+    SELECT GRADE_LEVEL, LOWEST_SAL, HIGHEST_SAL
+    FROM HR_JOB_GRADES
+    WHERE GRADE_LEVEL = :grade_level
+""", SINGLE_ROW_FETCH)
+
+# JOB HISTORY QUERIES (direct fallback of the ORM job history routes), in
+# primary-key order so the shards' rows merge in order
+JOB_HISTORY_SELECT = """
+    SELECT h.EMPLOYEE_ID, e.FIRST_NAME, e.LAST_NAME, h.START_DATE, h.END_DATE,
+           h.JOB_ID, j.JOB_TITLE, h.DEPARTMENT_ID, d.DEPARTMENT_NAME
+    FROM HR_JOB_HISTORY h
+    LEFT JOIN HR_EMPLOYEES e ON h.EMPLOYEE_ID = e.EMPLOYEE_ID
+    LEFT JOIN HR_JOBS j ON h.JOB_ID = j.JOB_ID
+    LEFT JOIN HR_DEPARTMENTS d ON h.DEPARTMENT_ID = d.DEPARTMENT_ID"""
+
+register_query('job_history.list', JOB_HISTORY_SELECT + """
+    ORDER BY h.EMPLOYEE_ID, h.START_DATE
+""", LIST_FETCH)
+
+# Keyset on the composite key (EMPLOYEE_ID, START_DATE); the first page
+# binds after_id = -1 and a NULL after_date
+register_query('job_history.page', JOB_HISTORY_SELECT + """
+    WHERE h.EMPLOYEE_ID > :after_id
+       OR (h.EMPLOYEE_ID = :after_id AND h.START_DATE > :after_date)
+    ORDER BY h.EMPLOYEE_ID, h.START_DATE
+    FETCH FIRST :limit ROWS ONLY
+""", LIST_FETCH)
+
+# An employee, then one of their job history rows per row
+register_query('job_history.employee', """
+    SELECT e.EMPLOYEE_ID, e.FIRST_NAME, e.LAST_NAME, e.EMAIL,
+           h.EMPLOYEE_ID, e.FIRST_NAME, e.LAST_NAME, h.START_DATE, h.END_DATE,
+           h.JOB_ID, j.JOB_TITLE, h.DEPARTMENT_ID, d.DEPARTMENT_NAME
+    FROM HR_EMPLOYEES e
+    LEFT JOIN HR_JOB_HISTORY h ON h.EMPLOYEE_ID = e.EMPLOYEE_ID
+    LEFT JOIN HR_JOBS j ON h.JOB_ID = j.JOB_ID
+    LEFT JOIN HR_DEPARTMENTS d ON h.DEPARTMENT_ID = d.DEPARTMENT_ID
+    WHERE e.EMPLOYEE_ID = :emp_id
+    ORDER BY h.START_DATE
+""", CHILD_FETCH)
+
+# BATCH LOOKUPS of the ?include= loaders (see includes.py), one statement
+# per relationship whatever the number of parent rows
+EMPLOYEE_BATCH_SELECT = """
+    SELECT e.EMPLOYEE_ID, e.FIRST_NAME, e.LAST_NAME, e.EMAIL,
+           e.PHONE_NUMBER, e.HIRE_DATE, e.JOB_ID, e.SALARY,
+           e.COMMISSION_PCT, e.MANAGER_ID, e.DEPARTMENT_ID,
+           d.DEPARTMENT_NAME, j.JOB_TITLE
+    FROM HR_EMPLOYEES e
+    LEFT JOIN HR_DEPARTMENTS d ON e.DEPARTMENT_ID = d.DEPARTMENT_ID
+    LEFT JOIN HR_JOBS j ON e.JOB_ID = j.JOB_ID"""
+
+register_batch_query('employees.by_ids', EMPLOYEE_BATCH_SELECT + """
+    WHERE e.EMPLOYEE_ID IN (:ids)
+""")
+
+register_batch_query('employees.by_managers', EMPLOYEE_BATCH_SELECT + """
+    WHERE e.MANAGER_ID IN (:ids)
+    ORDER BY e.MANAGER_ID, e.EMPLOYEE_ID
+""")
+
+register_batch_query('employees.by_departments', EMPLOYEE_BATCH_SELECT + """
+    WHERE e.DEPARTMENT_ID IN (:ids)
+    ORDER BY e.DEPARTMENT_ID, e.EMPLOYEE_ID
+""")
+
+register_batch_query('departments.by_ids', """
+    SELECT d.DEPARTMENT_ID, d.DEPARTMENT_NAME, d.MANAGER_ID, d.LOCATION_ID
+    FROM HR_DEPARTMENTS d
+    WHERE d.DEPARTMENT_ID IN (:ids)
+""")
+
+# Keyed by department, as the department lists do not carry LOCATION_ID
+register_batch_query('departments.locations', """
+    SELECT d.DEPARTMENT_ID,
+           l.LOCATION_ID, l.STREET_ADDRESS, l.POSTAL_CODE, l.CITY,
+           l.STATE_PROVINCE, l.COUNTRY_ID, c.COUNTRY_NAME
+    FROM HR_DEPARTMENTS d
+    JOIN HR_LOCATIONS l ON d.LOCATION_ID = l.LOCATION_ID
+    LEFT JOIN HR_COUNTRIES c ON l.COUNTRY_ID = c.COUNTRY_ID
+    WHERE d.DEPARTMENT_ID IN (:ids)
+""")
+
+register_batch_query('job_history.by_employees', """
+    SELECT h.EMPLOYEE_ID, h.START_DATE, h.END_DATE, h.JOB_ID, j.JOB_TITLE,
+           h.DEPARTMENT_ID, d.DEPARTMENT_NAME
+    FROM HR_JOB_HISTORY h
+    LEFT JOIN HR_JOBS j ON h.JOB_ID = j.JOB_ID
+    LEFT JOIN HR_DEPARTMENTS d ON h.DEPARTMENT_ID = d.DEPARTMENT_ID
+    WHERE h.EMPLOYEE_ID IN (:ids)
+    ORDER BY h.EMPLOYEE_ID, h.START_DATE
+""")
+
+# MULTI-GET LOOKUPS (?ids=): the keys are bound as one collection (see
+# ArrayBind in dialects.py), so each statement has a single text and a
+# single cached cursor whatever the number of keys
+register_query('employees.get_many', EMPLOYEE_BATCH_SELECT + """
+    WHERE e.EMPLOYEE_ID IN (SELECT COLUMN_VALUE FROM TABLE(:ids))
+""", LIST_FETCH)
+
+register_query('departments.get_many', """
+    SELECT
+        d.DEPARTMENT_ID,
+        d.DEPARTMENT_NAME,
+        d.MANAGER_ID,
+        e.FIRST_NAME AS MANAGER_FIRST_NAME,
+        e.LAST_NAME AS MANAGER_LAST_NAME,
+        l.CITY AS LOCATION_CITY,
+        c.COUNTRY_NAME AS LOCATION_COUNTRY,
+        j.JOB_TITLE AS JOB_TITLE
+    FROM HR_DEPARTMENTS d
+    LEFT JOIN HR_EMPLOYEES e ON d.MANAGER_ID = e.EMPLOYEE_ID
+    LEFT JOIN HR_LOCATIONS l ON d.LOCATION_ID = l.LOCATION_ID
+    LEFT JOIN HR_COUNTRIES c ON l.COUNTRY_ID = c.COUNTRY_ID
+    LEFT JOIN HR_JOBS j ON e.JOB_ID = j.JOB_ID
+    WHERE d.DEPARTMENT_ID IN (SELECT COLUMN_VALUE FROM TABLE(:ids))
+""", LIST_FETCH)
+
+register_query('jobs.get_many', """
+    SELECT JOB_ID, JOB_TITLE, MIN_SALARY, MAX_SALARY
+    FROM HR_JOBS
+    WHERE JOB_ID IN (SELECT COLUMN_VALUE FROM TABLE(:ids))
+""", LIST_FETCH)
+
+register_query('locations.get_many', """
+    SELECT l.LOCATION_ID, l.STREET_ADDRESS, l.POSTAL_CODE, l.CITY,
+           l.STATE_PROVINCE, l.COUNTRY_ID, c.COUNTRY_NAME
+    FROM HR_LOCATIONS l
+    LEFT JOIN HR_COUNTRIES c ON l.COUNTRY_ID = c.COUNTRY_ID
+    WHERE l.LOCATION_ID IN (SELECT COLUMN_VALUE FROM TABLE(:ids))
+""", LIST_FETCH)
@@ -0,0 +1,283 @@
+"""
+Read-replica routing
+
+When DB_REPLICA_URI is set, the reads of GET and HEAD requests go to the
+replica, for both the ORM session and the direct helpers. Reads fall back
+to the primary while the replica lags more than DB_REPLICA_MAX_LAG seconds,
+and for DB_PRIMARY_PIN_SECONDS after a client writes, so users always read
+their own writes.
+
+Views marked with serve_from_edge read from the local edge replica instead
+(see edge_replica.py) while its copy is fresh enough, and heavy views read
+the primary through its own session sub-pool (see bulkheads.py). Inside an
+on_shard block the session reads and writes that region shard instead
+(see sharding.py).
+
+Lag is measured with a heartbeat row: the primary's DB_HEARTBEAT row is
+stamped with the current time at most every DB_REPLICA_LAG_CHECK_INTERVAL
+seconds and compared with the copy the replica has applied. On Oracle the
+table must exist on the primary:
+
+    CREATE TABLE DB_HEARTBEAT (ID NUMBER PRIMARY KEY, BEAT NUMBER NOT NULL)
+"""
+import math
+import sqlite3
+import threading
+import time
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy.engine import make_url
+from .bulkheads import HEAVY, current_workload, heavy_pool_configured
+from .dialects import get_dialect
+from .edge_replica import edge_configured, edge_eligible, edge_is_fresh, get_edge_dialect
+from .retry import call_with_retry
+from .sharding import MAIN_SHARD, current_shard
+from ..config import (
+    SQLALCHEMY_DATABASE_URI,
+    DB_REPLICA_URI,
+    DB_REPLICA_MAX_LAG,
+    DB_REPLICA_LAG_CHECK_INTERVAL,
+    DB_PRIMARY_PIN_SECONDS
+)
+
+READ_METHODS = ('GET', 'HEAD')
+
+# Cookie holding the time until which a client's reads stay on the primary
+PIN_COOKIE = 'hrms_primary_until'
+
+HEARTBEAT_SELECT = "SELECT BEAT FROM DB_HEARTBEAT WHERE ID = 1"
+HEARTBEAT_UPDATE = "UPDATE DB_HEARTBEAT SET BEAT = :beat WHERE ID = 1"
+HEARTBEAT_INSERT = "INSERT INTO DB_HEARTBEAT (ID, BEAT) VALUES (1, :beat)"
+HEARTBEAT_CREATE_SQLITE = "CREATE TABLE IF NOT EXISTS DB_HEARTBEAT (ID INTEGER PRIMARY KEY, BEAT REAL NOT NULL)"
+
+_lag_lock = threading.Lock()
+_lag_state = {
+    'lag': None,
+    'checked_at': 0.0,
+    'error': None
+}
+_counters_lock = threading.Lock()
+_counters = {
+    'edge_reads': 0,
+    'replica_reads': 0,
+    'primary_reads': 0,
+    'heavy_reads': 0,
+    'lagging': 0,
+    'pinned': 0
+}
+
+
+class RoutingSession(Session):
+    """
+    Flask-SQLAlchemy session that sends the reads of read-only requests to
+    the replicas, and everything inside an on_shard block to that shard.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and current_shard() != MAIN_SHARD:
+            return self._db.engines[current_shard()]
+        if bind is None and not self._flushing:
+            target = read_target()
+            if target != 'primary':
+                return self._db.engines[target]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def execute(self, statement, *args, **kwargs):
+        """
+        Execute a statement. The reads of read-only requests are retried
+        after transient errors, on a fresh transaction; a request that may
+        write is never retried here, as its earlier work would be lost.
+        """
+        if not has_request_context() or request.method not in READ_METHODS:
+            return super().execute(statement, *args, **kwargs)
+
+        def before_retry(error):
+            self.rollback()
+
+        return call_with_retry(lambda: super(RoutingSession, self).execute(statement, *args, **kwargs),
+                               current_dialect(), on_retry=before_retry)
+
+
+def replica_configured():
+    """Whether a read replica is configured."""
+    return bool(DB_REPLICA_URI)
+
+
+def measure_replica_lag():
+    """
+    Stamp a new heartbeat on the primary and compare the previous one with
+    the heartbeat the replica has applied.
+
+    Returns:
+        lag: 0.0 when the replica has applied the newest heartbeat, otherwise
+            the age in seconds of the newest heartbeat it has applied, or None
+            if there is no heartbeat to compare yet
+    """
+    from .. import db
+
+    now = time.time()
+    primary = db.engine.raw_connection()
+    try:
+        cursor = primary.cursor()
+        if get_dialect().name == 'sqlite':
+            cursor.execute(HEARTBEAT_CREATE_SQLITE)
+        cursor.execute(HEARTBEAT_SELECT)
+        row = cursor.fetchone()
+        primary_beat = row[0] if row else None
+
+        cursor.execute(HEARTBEAT_UPDATE, {'beat': now})
+        if cursor.rowcount == 0:
+            cursor.execute(HEARTBEAT_INSERT, {'beat': now})
+        primary.commit()
+    finally:
+        primary.close()
+
+    replica = db.engines['replica'].raw_connection()
+    try:
+        cursor = replica.cursor()
+        cursor.execute(HEARTBEAT_SELECT)
+        row = cursor.fetchone()
+        replica_beat = row[0] if row else None
+    finally:
+        replica.close()
+
+    if primary_beat is None or replica_beat is None:
+        return None
+    if replica_beat >= primary_beat:
+        return 0.0
+    return now - replica_beat
+
+
+def get_replica_lag():
+    """
+    Get the last measured replica lag, re-measuring it when it is older than
+    DB_REPLICA_LAG_CHECK_INTERVAL. Only one thread measures at a time; the
+    others keep using the previous value.
+
+    Returns:
+        lag: Seconds of lag, or None if unknown or the replica is unreachable
+    """
+    if time.time() - _lag_state['checked_at'] >= DB_REPLICA_LAG_CHECK_INTERVAL and _lag_lock.acquire(blocking=False):
+        try:
+            try:
+                _lag_state['lag'] = measure_replica_lag()
+                _lag_state['error'] = None
+            except Exception as e:
+                _lag_state['lag'] = None
+                _lag_state['error'] = str(e)
+            _lag_state['checked_at'] = time.time()
+        finally:
+            _lag_lock.release()
+    return _lag_state['lag']
+
+
+def is_pinned():
+    """Whether the client wrote recently and must read from the primary."""
+    try:
+        return float(request.cookies.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def read_target():
+    """
+    Get where the reads of the current request go: 'edge' for a view
+    marked with serve_from_edge while the edge copy is fresh, 'replica'
+    while the replica keeps up, 'heavy' (the primary, through the heavy
+    sub-pool) for a heavy view, otherwise 'primary'. Decided once per
+    request.
+    """
+    if not (replica_configured() or edge_configured() or heavy_pool_configured()) or not has_request_context():
+        return 'primary'
+
+    if 'db_read_target' not in g:
+        reason = None
+        if request.method not in READ_METHODS:
+            g.db_read_target = 'primary'
+        elif is_pinned():
+            g.db_read_target = 'primary'
+            reason = 'pinned'
+        elif edge_eligible() and edge_is_fresh():
+            g.db_read_target = 'edge'
+        elif replica_configured():
+            lag = get_replica_lag()
+            g.db_read_target = 'replica' if lag is not None and lag <= DB_REPLICA_MAX_LAG else 'primary'
+            if g.db_read_target == 'primary':
+                reason = 'lagging'
+        else:
+            g.db_read_target = 'primary'
+
+        if g.db_read_target == 'primary' and request.method in READ_METHODS and \
+                current_workload() == HEAVY and heavy_pool_configured():
+            g.db_read_target = 'heavy'
+
+        with _counters_lock:
+            _counters[f'{g.db_read_target}_reads'] += 1
+            if reason:
+                _counters[reason] += 1
+    return g.db_read_target
+
+
+def use_replica():
+    """Whether the reads of the current request go to the replica."""
+    return read_target() == 'replica'
+
+
+def current_dialect():
+    """Get the dialect of the database the current request reads from; 'heavy' is the primary."""
+    return get_edge_dialect() if read_target() == 'edge' else get_dialect()
+
+
+def pin_to_primary(response):
+    """Keep a client's reads on the primary for a while after a successful write."""
+    if (replica_configured() or edge_configured()) and request.method not in READ_METHODS and response.status_code < 400:
+        until = time.time() + DB_PRIMARY_PIN_SECONDS
+        response.set_cookie(
+            PIN_COOKIE,
+            f'{until:.3f}',
+            max_age=math.ceil(DB_PRIMARY_PIN_SECONDS),
+            httponly=True,
+            # The client is served from another site in production
+            secure=request.is_secure,
+            samesite='None' if request.is_secure else 'Lax'
+        )
+    return response
+
+
+def init_replicas(app):
+    """Register the request hook that pins writing clients to the primary."""
+    app.after_request(pin_to_primary)
+
+
+def get_replica_stats():
+    """
+    Get the replica lag and how reads were routed.
+
+    Returns:
+        stats: Lag, last check error and routing counters
+    """
+    lag = _lag_state['lag']
+    with _counters_lock:
+        counters = dict(_counters)
+
+    return {
+        'configured': replica_configured(),
+        'lag_seconds': round(lag, 3) if lag is not None else None,
+        'max_lag_seconds': DB_REPLICA_MAX_LAG,
+        'error': _lag_state['error'],
+        **counters
+    }
+
+
+def refresh_sqlite_replica():
+    """
+    Copy the primary SQLite file over the replica file. Local stand-in for
+    replication when both databases are SQLite files.
+    """
+    source = sqlite3.connect(make_url(SQLALCHEMY_DATABASE_URI).database)
+    target = sqlite3.connect(make_url(DB_REPLICA_URI).database)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
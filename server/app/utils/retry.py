@@ -0,0 +1,114 @@
+"""
+Retry policy for transient database errors
+
+A dropped session, a listener hiccup, a deadlock (ORA-00060) or a busy
+SQLite file should cost the caller a short pause, not a 500. Calls wrapped
+with call_with_retry are tried up to DB_RETRY_ATTEMPTS times with full
+jitter exponential backoff (a random pause of up to DB_RETRY_BASE_DELAY,
+doubling up to DB_RETRY_MAX_DELAY), so callers retrying together spread out. A pause never runs past the
+request's deadline: a retry that could not start before it is not waited
+for, and the request is answered as out of budget instead.
+
+Retries are idempotency aware: reads retry after any transient error,
+writes only after errors that roll back just the failed statement, since a
+write whose session dropped may or may not have been applied.
+"""
+import random
+import threading
+import time
+from .deadlines import DeadlineExceeded, get_deadline, mark_deadline_exceeded
+from ..config import DB_RETRY_ATTEMPTS, DB_RETRY_BASE_DELAY, DB_RETRY_MAX_DELAY
+
+_counters_lock = threading.Lock()
+_counters = {
+    'retries': 0,
+    'recovered': 0,
+    'exhausted': 0,
+    'failovers': 0
+}
+
+
+def backoff_delay(attempt):
+    """
+    Get the pause before a retry, with full jitter.
+
+    Args:
+        attempt: Number of the retry, from 1
+
+    Returns:
+        delay: Seconds to sleep
+    """
+    cap = min(DB_RETRY_MAX_DELAY, DB_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+    return random.uniform(0, cap) / 1000
+
+
+def record_retry_event(event):
+    """Count a retry, a recovered or exhausted call, or a failover."""
+    with _counters_lock:
+        _counters[event] += 1
+
+
+def call_with_retry(fn, dialect, write=False, on_retry=None, expires=None):
+    """
+    Call fn, retrying it after transient errors.
+
+    Args:
+        fn: Callable doing the database work; called again on every retry
+        dialect: Dialect of the database, which classifies the errors
+        write: Whether fn modifies data
+        on_retry: Callable getting the error before each retry, for example
+            to drop a lost connection; returning False gives up (optional)
+        expires: Deadline on the monotonic clock (default: the current request's)
+
+    Returns:
+        result: The result of fn
+
+    Raises:
+        DeadlineExceeded: If the pause before a retry would outlast the deadline
+        Exception: The last error, if it is not transient or the attempts ran out
+    """
+    if expires is None:
+        expires = get_deadline()
+    attempt = 0
+    while True:
+        try:
+            result = fn()
+        except Exception as e:
+            attempt += 1
+            if not dialect.is_retryable(e, write):
+                raise
+            if attempt >= DB_RETRY_ATTEMPTS:
+                record_retry_event('exhausted')
+                raise
+            delay = backoff_delay(attempt)
+            if expires is not None and time.monotonic() + delay >= expires:
+                record_retry_event('exhausted')
+                mark_deadline_exceeded()
+                raise DeadlineExceeded("Query deadline exceeded") from e
+            if on_retry is not None and on_retry(e) is False:
+                raise
+            record_retry_event('retries')
+            time.sleep(delay)
+            continue
+
+        if attempt:
+            record_retry_event('recovered')
+        return result
+
+
+def get_retry_stats():
+    """
+    Get the retry policy and its counters.
+
+    Returns:
+        stats: Attempts, delays and the retry, recovery, exhaustion and failover counts
+    """
+    with _counters_lock:
+        counters = dict(_counters)
+
+    return {
+        'attempts': DB_RETRY_ATTEMPTS,
+        'base_delay_ms': DB_RETRY_BASE_DELAY,
+        'max_delay_ms': DB_RETRY_MAX_DELAY,
+        **counters
+    }
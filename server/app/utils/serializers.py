@@ -0,0 +1,238 @@
+"""
+Serializers generated from the model metadata
+
+For every model a serializer is compiled once from its mapper: one
+function whose body lists the model's columns in order, the related columns
+declared in its __serialize_related__ (placed after the foreign key they
+come from), with dates turned into ISO strings inline. It gives the same
+dict as the model's to_dict(), and can be projected down to some fields.
+
+The generated code reads the instance's loaded state (its __dict__)
+straight away instead of going through the attribute instrumentation, and
+only falls back to attribute access, which loads what is missing, when a
+column is expired or a relationship was not loaded with the query (see the
+models' eager_query).
+
+Row serializers do the same for plain result rows, for the read-only fast
+path of app/utils/fast_reads.py: they get the columns to select, and turn
+each row of them into the same dict.
+"""
+from sqlalchemy import Date, DateTime, inspect as sa_inspect
+from sqlalchemy.orm import configure_mappers
+
+_serializers = {}
+_row_serializers = {}
+
+
+class Field:
+    """One key of a serialized model: a column, or columns of a related row."""
+
+    def __init__(self, key, attribute, columns=None, is_date=False):
+        self.key = key
+        self.attribute = attribute
+        self.columns = columns
+        self.is_date = is_date
+
+
+def get_fields(model):
+    """
+    Get the keys to_dict() gives for a model, in its order, from the mapper.
+
+    A column is serialized under its lower-cased name, or the name given in
+    the model's __serialize_names__, unless listed in __serialize_exclude__.
+    """
+    mapper = sa_inspect(model)
+    names = getattr(model, '__serialize_names__', {})
+    exclude = getattr(model, '__serialize_exclude__', ())
+
+    related = {}
+    for relationship, columns in getattr(model, '__serialize_related__', {}).items():
+        foreign_key = mapper.get_property_by_column(next(iter(mapper.relationships[relationship].local_columns)))
+        related.setdefault(foreign_key.key, []).extend(
+            Field(key, relationship, source if isinstance(source, tuple) else (source,))
+            for key, source in columns.items()
+        )
+
+    fields = []
+    for prop in mapper.column_attrs:
+        if prop.key in exclude:
+            continue
+        is_date = isinstance(prop.columns[0].type, (Date, DateTime))
+        fields.append(Field(names.get(prop.key, prop.key.lower()), prop.key, is_date=is_date))
+        fields.extend(related.get(prop.key, ()))
+    return fields
+
+
+def generate_body(fields, fast):
+    """
+    Generate the statements serializing fields.
+
+    Args:
+        fields: Fields to serialize
+        fast: Read the loaded state of 'state' (raising KeyError for anything
+            unloaded) instead of the attributes of 'obj'
+    """
+    def value(base, key):
+        return f'{base}[{key!r}]' if fast else f'{base}.{key}'
+
+    source = 'state' if fast else 'obj'
+    lines = []
+    for relationship in dict.fromkeys(field.attribute for field in fields if field.columns):
+        lines.append(f'r_{relationship} = {value(source, relationship)}')
+        if fast:
+            lines.append(f'r_{relationship} = r_{relationship}.__dict__ if r_{relationship} is not None else None')
+
+    items = []
+    for field in fields:
+        if field.columns:
+            related = f'r_{field.attribute}'
+            parts = [value(related, column) for column in field.columns]
+            if len(parts) == 1:
+                expression = parts[0]
+            else:
+                # Joined like to_dict()'s f-string: a space between the columns
+                expression = 'f"' + ' '.join('{' + part + '}' for part in parts) + '"'
+            expression = f'{expression} if {related} is not None else None'
+        elif field.is_date:
+            lines.append(f'c_{field.attribute} = {value(source, field.attribute)}')
+            expression = f'c_{field.attribute}.isoformat() if c_{field.attribute} is not None else None'
+        else:
+            expression = value(source, field.attribute)
+        items.append(f'{field.key!r}: {expression}')
+
+    lines.append('return {' + ', '.join(items) + '}')
+    return lines
+
+
+def build_serializer(model, fields):
+    """Compile the serializer of some fields of a model."""
+    name = f'serialize_{model.__name__}'
+    source = '\n'.join([
+        f'def {name}(obj):',
+        '    state = obj.__dict__',
+        '    try:',
+        *(f'        {line}' for line in generate_body(fields, fast=True)),
+        '    except KeyError:',
+        '        pass',
+        *(f'    {line}' for line in generate_body(fields, fast=False))
+    ])
+    namespace = {}
+    exec(compile(source, f'<{name}>', 'exec'), namespace)
+    return namespace[name]
+
+
+def get_serializer(model, fields=None):
+    """
+    Get the compiled serializer of a model.
+
+    Args:
+        model: Mapped model class
+        fields: Keys to keep, in any order (default: all of to_dict()'s)
+
+    Returns:
+        serializer: Function turning one instance into a dict
+
+    Raises:
+        ValueError: If a field is not one of the model's keys
+    """
+    fields = tuple(fields) if fields is not None else None
+    serializer = _serializers.get((model, fields))
+    if serializer is None:
+        serializer = _serializers[(model, fields)] = build_serializer(model, select_fields(model, fields))
+    return serializer
+
+
+def select_fields(model, fields):
+    """Get the Fields of a model named in fields, or all of them."""
+    all_fields = get_fields(model)
+    if fields is None:
+        return all_fields
+    unknown = set(fields) - {field.key for field in all_fields}
+    if unknown:
+        raise ValueError(f"Unknown fields for {model.__name__}: {', '.join(sorted(unknown))}")
+    return [field for field in all_fields if field.key in fields]
+
+
+def build_row_serializer(model, fields):
+    """
+    Compile the serializer of result rows holding some fields of a model.
+
+    Returns:
+        (layout, serializer): The (relationship or None, column key) pairs
+            to select, in row order, and the function turning a row into a dict
+    """
+    mapper = sa_inspect(model)
+    layout = []
+
+    def slot(relationship, key):
+        if (relationship, key) not in layout:
+            layout.append((relationship, key))
+        return f'v{layout.index((relationship, key))}'
+
+    items = []
+    for field in fields:
+        if not field.columns:
+            value = slot(None, field.attribute)
+            expression = f'{value}.isoformat() if {value} is not None else None' if field.is_date else value
+        elif len(field.columns) == 1:
+            # The outer join leaves the column NULL when there is no related row
+            expression = slot(field.attribute, field.columns[0])
+        else:
+            target = mapper.relationships[field.attribute].mapper
+            present = slot(field.attribute, target.get_property_by_column(target.primary_key[0]).key)
+            parts = [slot(field.attribute, column) for column in field.columns]
+            expression = 'f"' + ' '.join('{' + part + '}' for part in parts) + '"' + f' if {present} is not None else None'
+        items.append(f'{field.key!r}: {expression}')
+
+    name = f'serialize_{model.__name__}_row'
+    source = '\n'.join([
+        f'def {name}(row):',
+        f"    {', '.join(f'v{index}' for index in range(len(layout)))}, = row",
+        '    return {' + ', '.join(items) + '}'
+    ])
+    namespace = {}
+    exec(compile(source, f'<{name}>', 'exec'), namespace)
+    return layout, namespace[name]
+
+
+def get_row_serializer(model, fields=None):
+    """
+    Get the compiled serializer of result rows of a model.
+
+    Args:
+        model: Mapped model class
+        fields: Keys to keep, in any order (default: all of to_dict()'s)
+
+    Returns:
+        (layout, serializer): See build_row_serializer
+
+    Raises:
+        ValueError: If a field is not one of the model's keys
+    """
+    fields = tuple(fields) if fields is not None else None
+    row_serializer = _row_serializers.get((model, fields))
+    if row_serializer is None:
+        row_serializer = _row_serializers[(model, fields)] = build_row_serializer(model, select_fields(model, fields))
+    return row_serializer
+
+
+def serialize(obj, fields=None):
+    """Serialize one model instance, like its to_dict()."""
+    return get_serializer(type(obj), fields)(obj)
+
+
+def serialize_all(objs, fields=None):
+    """Serialize a list of instances of one model."""
+    if not objs:
+        return []
+    serializer = get_serializer(type(objs[0]), fields)
+    return [serializer(obj) for obj in objs]
+
+
+def init_serializers(app):
+    """Compile the serializer of every model once at startup."""
+    from .. import db
+
+    configure_mappers()
+    for mapper in db.Model.registry.mappers:
+        get_serializer(mapper.class_)
@@ -0,0 +1,399 @@
+"""
+Region sharding of employee and department data
+
+HR_REGIONS -> HR_COUNTRIES -> HR_LOCATIONS -> HR_DEPARTMENTS -> HR_EMPLOYEES
+gives every department and employee a region. When DB_SHARDS is set, the
+departments and employees of each listed region, and the job history of
+those employees, live in that region's database; every other region,
+employees without a department and all the remaining tables stay in the
+main database. Foreign keys cannot cross databases, so a manager must work
+in the region of the employees and departments they manage, and a job
+history row must name a department of its employee's region. Each shard keeps a copy of the
+reference tables (regions, countries, locations, jobs, job grades) so the
+registered statements join on it unchanged.
+
+The direct helpers in db_utils route single-entity calls to the entity's
+shard with on_shard, and scatter list calls to every shard in parallel,
+merging the results in key order. Which shard holds a key is remembered in
+a process-wide directory, filled on writes and on the first lookup. Keys
+found on no shard are remembered as missing for DB_SHARD_MISS_TTL seconds,
+so repeated reads of a bad ID do not scatter each time.
+Primary keys still come from the main database's sequences, so they are
+unique across shards.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from flask import current_app, g, has_app_context
+from ..config import DB_SHARDS, DB_SHARD_MISS_TTL
+
+# Name of the main database in the shard list
+MAIN_SHARD = 'main'
+
+# Tables split by region, and the tables copied to every shard
+SHARDED_TABLES = ('HR_DEPARTMENTS', 'HR_EMPLOYEES', 'HR_JOB_HISTORY')
+REFERENCE_TABLES = ('HR_REGIONS', 'HR_COUNTRIES', 'HR_LOCATIONS', 'HR_JOBS', 'HR_JOB_GRADES')
+
+# Most keys remembered as missing at once
+MISSING_CACHE_SIZE = 10000
+
+_directory = {}
+_missing = {}
+_directory_lock = threading.Lock()
+_counters_lock = threading.Lock()
+_counters = {
+    'scatters': 0,
+    'directory_hits': 0,
+    'directory_misses': 0,
+    'missing_hits': 0
+}
+
+
+class CrossShardWriteError(Exception):
+    """Raised when a write would move a record to another region's shard."""
+
+
+def shard_configured():
+    """Whether employees and departments are sharded by region."""
+    return bool(DB_SHARDS)
+
+
+def shard_name(region_id):
+    """Get the bind name of a region's shard."""
+    return f'shard_{region_id}'
+
+
+def get_shard_uris():
+    """Get the database URL of every region shard, by bind name."""
+    return {shard_name(region_id): uri for region_id, uri in DB_SHARDS.items()}
+
+
+def get_shards():
+    """Get every shard to scatter to, the main database first."""
+    return [MAIN_SHARD] + [shard_name(region_id) for region_id in DB_SHARDS]
+
+
+def shard_for_region(region_id):
+    """Get the shard holding a region's departments and employees."""
+    return shard_name(region_id) if region_id in DB_SHARDS else MAIN_SHARD
+
+
+def current_shard():
+    """Get the shard the direct helpers currently use."""
+    if not has_app_context():
+        return MAIN_SHARD
+    return g.get('db_shard', MAIN_SHARD)
+
+
+@contextmanager
+def on_shard(shard):
+    """
+    Run the direct helpers of the block against one shard.
+
+    Args:
+        shard: A name from get_shards
+    """
+    previous = current_shard()
+    g.db_shard = shard
+    try:
+        yield shard
+    finally:
+        g.db_shard = previous
+
+
+def cached_shard(resource, key):
+    """
+    Get the shard remembered for a key.
+
+    Args:
+        resource: 'employees' or 'departments'
+        key: Primary key
+
+    Returns:
+        shard: The shard name, or None if the key is not in the directory
+    """
+    shard = _directory.get((resource, key))
+    with _counters_lock:
+        _counters['directory_hits' if shard else 'directory_misses'] += 1
+    return shard
+
+
+def remember_shard(resource, key, shard):
+    """Remember which shard holds a key."""
+    if not shard_configured():
+        return
+    with _directory_lock:
+        _directory[(resource, key)] = shard
+        _missing.pop((resource, key), None)
+
+
+def known_missing(resource, key):
+    """Whether a key was found on no shard less than DB_SHARD_MISS_TTL seconds ago."""
+    expires = _missing.get((resource, key))
+    if expires is None:
+        return False
+    if expires < time.monotonic():
+        with _directory_lock:
+            _missing.pop((resource, key), None)
+        return False
+    with _counters_lock:
+        _counters['missing_hits'] += 1
+    return True
+
+
+def remember_missing(resource, key):
+    """Remember for DB_SHARD_MISS_TTL seconds that no shard holds a key."""
+    if not shard_configured() or DB_SHARD_MISS_TTL <= 0:
+        return
+    now = time.monotonic()
+    with _directory_lock:
+        if len(_missing) >= MISSING_CACHE_SIZE:
+            for stale in [missing for missing, expires in _missing.items() if expires < now]:
+                del _missing[stale]
+            if len(_missing) >= MISSING_CACHE_SIZE:
+                _missing.clear()
+        _missing[(resource, key)] = now + DB_SHARD_MISS_TTL
+
+
+def forget_shard(resource, key):
+    """Drop a deleted key from the directory."""
+    with _directory_lock:
+        _directory.pop((resource, key), None)
+
+
+def record_scatter():
+    """Count a scatter-gather read."""
+    with _counters_lock:
+        _counters['scatters'] += 1
+
+
+def get_shard_stats():
+    """
+    Get the shard layout and routing counters.
+
+    Returns:
+        stats: Shards by region, directory size and counters
+    """
+    with _counters_lock:
+        counters = dict(_counters)
+
+    return {
+        'configured': shard_configured(),
+        'regions': {str(region_id): shard_name(region_id) for region_id in DB_SHARDS},
+        'directory_size': len(_directory),
+        'missing_size': len(_missing),
+        **counters
+    }
+
+
+def sync_reference_tables():
+    """
+    Copy the reference tables of the main database to every shard, each
+    shard in one transaction.
+
+    Returns:
+        changes: Rows written or deleted per shard
+    """
+    from .. import db
+    from .edge_replica import refresh_table
+
+    tables = [table for table in db.metadata.sorted_tables if table.name in REFERENCE_TABLES]
+    changes = {}
+    with db.engine.connect() as source:
+        for shard in get_shards()[1:]:
+            with db.engines[shard].begin() as target:
+                changes[shard] = 0
+                for table in tables:
+                    _, upserted, deleted = refresh_table(source, target, table, None)
+                    changes[shard] += upserted + deleted
+    return changes
+
+
+def find_cross_shard_references(connection):
+    """
+    Find the references that would cross shards once the departments,
+    employees and job history are split by region.
+
+    Args:
+        connection: Connection to the main database
+
+    Returns:
+        references: Descriptions of the offending references
+    """
+    from sqlalchemy import select
+    from ..models import Country, Department, Employee, JobHistory, Location
+
+    department_shards = {
+        department_id: shard_for_region(region_id)
+        for department_id, region_id in connection.execute(
+            select(Department.DEPARTMENT_ID, Country.REGION_ID)
+            .join(Location, Department.LOCATION_ID == Location.LOCATION_ID, isouter=True)
+            .join(Country, Location.COUNTRY_ID == Country.COUNTRY_ID, isouter=True)
+        )
+    }
+    employees = connection.execute(select(Employee.EMPLOYEE_ID, Employee.DEPARTMENT_ID, Employee.MANAGER_ID)).all()
+    employee_shards = {
+        employee_id: department_shards.get(department_id, MAIN_SHARD)
+        for employee_id, department_id, _ in employees
+    }
+
+    references = []
+    for employee_id, _, manager_id in employees:
+        if manager_id is not None and employee_shards.get(manager_id) != employee_shards[employee_id]:
+            references.append(f"employee {employee_id} is managed by employee {manager_id} of another region")
+    for department_id, manager_id in connection.execute(select(Department.DEPARTMENT_ID, Department.MANAGER_ID)):
+        if manager_id is not None and employee_shards.get(manager_id) != department_shards[department_id]:
+            references.append(f"department {department_id} is managed by employee {manager_id} of another region")
+    for employee_id, department_id in connection.execute(select(JobHistory.EMPLOYEE_ID, JobHistory.DEPARTMENT_ID)):
+        if department_id is not None and department_shards.get(department_id) != employee_shards.get(employee_id):
+            references.append(f"job history of employee {employee_id} names department {department_id} of another region")
+    return references
+
+
+def init_shards():
+    """
+    Create the tables of every shard, copy the reference tables to them and
+    move the departments, employees and job history of each sharded region
+    out of the main database. Run once, with the application stopped.
+
+    Every region's rows are read first and written to its shard, each shard
+    in one transaction, and only then deleted from the main database, in one
+    transaction. If a shard write or the delete fails, the copies already
+    written are removed again, so the main database keeps every row and the
+    command can be rerun.
+
+    Managers are copied after the rows they point to, and cleared before
+    those rows are deleted, so the foreign keys hold at every statement.
+
+    Returns:
+        moved: Departments, employees and job history rows moved per shard
+
+    Raises:
+        CrossShardWriteError: If a manager or job history row references
+            another region; nothing is moved
+    """
+    from sqlalchemy import select
+    from .. import db
+    from ..models import Country, Department, Employee, JobHistory, Location
+    from .dialects import get_dialect
+    from .id_allocator import get_allocator
+
+    with db.engine.connect() as connection:
+        references = find_cross_shard_references(connection)
+    if references:
+        raise CrossShardWriteError(
+            f"{len(references)} reference(s) would cross region shards, e.g. {'; '.join(references[:5])}"
+        )
+
+    # Emulated sequences are seeded from the table's highest key; seed them before the rows move
+    if get_dialect().name == 'sqlite':
+        for resource in ('employees', 'departments'):
+            get_allocator(resource).reserve(0)
+
+    tables = [table for table in db.metadata.sorted_tables if table.name in SHARDED_TABLES + REFERENCE_TABLES]
+    for shard in get_shards()[1:]:
+        db.metadata.create_all(db.engines[shard], tables=tables)
+    sync_reference_tables()
+
+    departments, employees, job_history = Department.__table__, Employee.__table__, JobHistory.__table__
+    moves = {}
+    with db.engine.connect() as source:
+        for region_id in DB_SHARDS:
+            region_departments = (
+                select(Department.DEPARTMENT_ID)
+                .join(Location, Department.LOCATION_ID == Location.LOCATION_ID)
+                .join(Country, Location.COUNTRY_ID == Country.COUNTRY_ID)
+                .where(Country.REGION_ID == region_id)
+            )
+            region_employees = select(Employee.EMPLOYEE_ID).where(Employee.DEPARTMENT_ID.in_(region_departments))
+            moves[shard_name(region_id)] = {
+                table: [dict(row) for row in source.execute(select(table).where(column.in_(keys))).mappings()]
+                for table, column, keys in (
+                    (departments, departments.c.DEPARTMENT_ID, region_departments),
+                    (employees, employees.c.EMPLOYEE_ID, region_employees),
+                    (job_history, job_history.c.EMPLOYEE_ID, region_employees)
+                )
+            }
+
+    written = []
+    try:
+        for shard, rows in moves.items():
+            with db.engines[shard].begin() as target:
+                copy_region(target, rows)
+            written.append(shard)
+        with db.engine.begin() as source:
+            for rows in moves.values():
+                remove_region(source, rows)
+    except Exception:
+        for shard in written:
+            try:
+                with db.engines[shard].begin() as target:
+                    remove_region(target, moves[shard])
+            except Exception as e:
+                current_app.logger.error(f"Removing the rows copied to {shard} failed: {str(e)}")
+        raise
+
+    return {
+        shard: {
+            'departments': len(rows[departments]),
+            'employees': len(rows[employees]),
+            'job_history': len(rows[job_history])
+        }
+        for shard, rows in moves.items()
+    }
+
+
+def copy_region(connection, rows):
+    """
+    Insert a region's departments, employees and job history, with the
+    managers set once the rows they point to exist.
+
+    Args:
+        connection: Connection to the shard, in a transaction
+        rows: Row dicts by table (departments, employees, job history)
+    """
+    from sqlalchemy import bindparam, insert, update
+    from ..models import Department, Employee, JobHistory
+
+    departments, employees, job_history = Department.__table__, Employee.__table__, JobHistory.__table__
+    managed = ((departments, 'DEPARTMENT_ID'), (employees, 'EMPLOYEE_ID'))
+    for table, _ in managed:
+        if rows[table]:
+            connection.execute(insert(table), [{**row, 'MANAGER_ID': None} for row in rows[table]])
+    for table, key in managed:
+        managers = [{'key': row[key], 'manager': row['MANAGER_ID']} for row in rows[table] if row['MANAGER_ID'] is not None]
+        if managers:
+            connection.execute(
+                update(table).where(table.c[key] == bindparam('key')).values(MANAGER_ID=bindparam('manager')),
+                managers
+            )
+    if rows[job_history]:
+        connection.execute(insert(job_history), rows[job_history])
+
+
+def remove_region(connection, rows):
+    """
+    Delete a region's departments, employees and job history by key,
+    clearing the managers first.
+
+    Args:
+        connection: Connection to the database holding them, in a transaction
+        rows: Row dicts by table, as copy_region takes them
+    """
+    from sqlalchemy import delete, update
+    from ..models import Department, Employee, JobHistory
+    from .edge_replica import chunked
+
+    departments, employees, job_history = Department.__table__, Employee.__table__, JobHistory.__table__
+    department_ids = [row['DEPARTMENT_ID'] for row in rows[departments]]
+    employee_ids = [row['EMPLOYEE_ID'] for row in rows[employees]]
+    for keys in chunked(department_ids):
+        connection.execute(update(departments).where(departments.c.DEPARTMENT_ID.in_(keys)).values(MANAGER_ID=None))
+    for keys in chunked(employee_ids):
+        connection.execute(update(employees).where(employees.c.EMPLOYEE_ID.in_(keys)).values(MANAGER_ID=None))
+    for keys in chunked(employee_ids):
+        connection.execute(delete(job_history).where(job_history.c.EMPLOYEE_ID.in_(keys)))
+    for keys in chunked(employee_ids):
+        connection.execute(delete(employees).where(employees.c.EMPLOYEE_ID.in_(keys)))
+    for keys in chunked(department_ids):
+        connection.execute(delete(departments).where(departments.c.DEPARTMENT_ID.in_(keys)))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+Measure the CPU time per request of the ORM list routes on the ORM
+(Model.query with to_dict(), and with the generated serializers) and on the
+read-only Core fast path.
+
+Runs against the configured database. On a scratch SQLite database, --seed
+fills it with synthetic rows first:
+
+Usage:
+    DB_TYPE=sqlite DATABASE_URL=sqlite:///bench.db python benchmark_fast_reads.py --seed 10000
+"""
+import argparse
+import time
+from datetime import date, timedelta
+from flask import jsonify
+from sqlalchemy import insert
+from app import create_app, db
+from app.models import Region, Country, Location, Department, Job, Employee, JobHistory, JobGrade
+from app.utils.dialects import get_dialect
+from app.utils.fast_reads import read_all
+from app.utils.serializers import serialize_all
+
+def seed(rows):
+    """Fill an empty scratch database with rows job histories and the rows they refer to."""
+    if get_dialect().name != 'sqlite':
+        raise SystemExit('--seed only fills a scratch SQLite database')
+    db.create_all()
+    if db.session.query(JobHistory).first() is not None:
+        return
+
+    departments = 27
+    jobs = 19
+    db.session.execute(insert(Region), [{'REGION_ID': i, 'REGION_NAME': f'Region {i}'} for i in range(1, 5)])
+    db.session.execute(insert(Country), [
+        {'COUNTRY_ID': f'{chr(65 + i // 26)}{chr(65 + i % 26)}', 'COUNTRY_NAME': f'Country {i}', 'REGION_ID': i % 4 + 1}
+        for i in range(200)
+    ])
+    db.session.execute(insert(JobGrade), [
+        {'GRADE_LEVEL': chr(65 + i), 'LOWEST_SAL': i * 1000, 'HIGHEST_SAL': i * 1000 + 999} for i in range(6)
+    ])
+    db.session.execute(insert(Location), [{'LOCATION_ID': 1700, 'CITY': 'Seattle', 'COUNTRY_ID': 'AA'}])
+    db.session.execute(insert(Job), [{'JOB_ID': f'JOB_{i}', 'JOB_TITLE': f'Job {i}'} for i in range(jobs)])
+    db.session.execute(insert(Department), [
+        {'DEPARTMENT_ID': i, 'DEPARTMENT_NAME': f'Department {i}', 'LOCATION_ID': 1700} for i in range(departments)
+    ])
+    db.session.execute(insert(Employee), [
+        {'EMPLOYEE_ID': i, 'FIRST_NAME': f'First{i}', 'LAST_NAME': f'Last{i}', 'EMAIL': f'E{i}',
+         'JOB_ID': f'JOB_{i % jobs}', 'DEPARTMENT_ID': i % departments}
+        for i in range(rows)
+    ])
+    db.session.execute(insert(JobHistory), [
+        {'EMPLOYEE_ID': i, 'START_DATE': date(1995, 1, 1) + timedelta(days=i % 1500), 'END_DATE': date(1999, 12, 31),
+         'JOB_ID': f'JOB_{(i + 1) % jobs}', 'DEPARTMENT_ID': (i + 1) % departments}
+        for i in range(rows)
+    ])
+    db.session.commit()
+
+def cpu_per_request(app, path, body, requests):
+    """Run body as the view of requests GETs of path and return the mean CPU milliseconds."""
+    # Warm up statement and serializer caches before measuring
+    with app.test_request_context(path):
+        body()
+        db.session.remove()
+
+    start = time.process_time()
+    for _ in range(requests):
+        with app.test_request_context(path):
+            body()
+            db.session.remove()
+    return (time.process_time() - start) * 1000 / requests
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the ORM and the Core fast path on the ORM list routes.')
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0, help='Job history rows to seed a scratch SQLite database with')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    with app.app_context():
+        if args.seed:
+            seed(args.seed)
+        counts = {model: db.session.query(model).count() for model in (Country, Region, JobGrade, JobHistory)}
+
+    endpoints = [
+        ('/api/countries', Country, lambda: Country.eager_query().all()),
+        ('/api/regions', Region, lambda: Region.query.all()),
+        ('/api/job-grades', JobGrade, lambda: JobGrade.query.all()),
+        ('/api/job-history', JobHistory, lambda: JobHistory.eager_query().all())
+    ]
+
+    print(f"Requests per run: {args.requests} (CPU ms per request)")
+    for path, model, load in endpoints:
+        orm = cpu_per_request(app, path, lambda: jsonify([obj.to_dict() for obj in load()]), args.requests)
+        generated = cpu_per_request(app, path, lambda: jsonify(serialize_all(load())), args.requests)
+        fast = cpu_per_request(app, path, lambda: jsonify(read_all(model)), args.requests)
+        print(f"{path:<17} {counts[model]:>7} rows  orm+to_dict {orm:8.2f}  orm+generated {generated:8.2f}  "
+              f"fast path {fast:8.2f}  saved {orm - fast:8.2f} ms ({1 - fast / orm:4.0%})")
+
+if __name__ == '__main__':
+    main()
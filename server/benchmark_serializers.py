@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+Benchmark the generated model serializers against the hand-written to_dict()
+on Employee and JobHistory rows loaded from an in-memory SQLite database.
+
+Usage:
+    python benchmark_serializers.py --rows 100000
+"""
+import argparse
+import time
+from datetime import date, timedelta
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, joinedload
+from app import db
+from app.models import Region, Country, Location, Department, Job, Employee, JobHistory
+from app.utils.serializers import get_serializer
+
+def load_rows(rows):
+    """Fill an in-memory database and load rows Employee and JobHistory instances."""
+    engine = create_engine('sqlite://')
+    db.metadata.create_all(engine)
+
+    departments = 27
+    jobs = 19
+    with engine.begin() as connection:
+        connection.execute(insert(Region), [{'REGION_ID': 1, 'REGION_NAME': 'Americas'}])
+        connection.execute(insert(Country), [{'COUNTRY_ID': 'US', 'COUNTRY_NAME': 'United States', 'REGION_ID': 1}])
+        connection.execute(insert(Location), [{'LOCATION_ID': 1700, 'CITY': 'Seattle', 'COUNTRY_ID': 'US'}])
+        connection.execute(insert(Job), [
+            {'JOB_ID': f'JOB_{i}', 'JOB_TITLE': f'Job {i}', 'MIN_SALARY': 1000, 'MAX_SALARY': 9000} for i in range(jobs)
+        ])
+        connection.execute(insert(Department), [
+            {'DEPARTMENT_ID': i, 'DEPARTMENT_NAME': f'Department {i}', 'LOCATION_ID': 1700} for i in range(departments)
+        ])
+        connection.execute(insert(Employee), [
+            {'EMPLOYEE_ID': i, 'FIRST_NAME': f'First{i}', 'LAST_NAME': f'Last{i}', 'EMAIL': f'E{i}',
+             'PHONE_NUMBER': '515.123.4567', 'HIRE_DATE': date(2000, 1, 1) + timedelta(days=i % 7000),
+             'JOB_ID': f'JOB_{i % jobs}', 'SALARY': 5000.0 + i % 300, 'COMMISSION_PCT': None if i % 3 else 0.1,
+             'MANAGER_ID': None, 'DEPARTMENT_ID': i % departments}
+            for i in range(rows)
+        ])
+        connection.execute(insert(JobHistory), [
+            {'EMPLOYEE_ID': i, 'START_DATE': date(1995, 1, 1) + timedelta(days=i % 1500),
+             'END_DATE': None if i % 5 == 0 else date(1999, 12, 31),
+             'JOB_ID': f'JOB_{(i + 1) % jobs}', 'DEPARTMENT_ID': (i + 1) % departments}
+            for i in range(rows)
+        ])
+
+    session = Session(engine)
+    employees = session.scalars(
+        select(Employee).options(joinedload(Employee.job), joinedload(Employee.department))
+    ).unique().all()
+    job_histories = session.scalars(
+        select(JobHistory).options(joinedload(JobHistory.employee), joinedload(JobHistory.job), joinedload(JobHistory.department))
+    ).unique().all()
+    return session, employees, job_histories
+
+def rows_per_sec(function, objs, repeat):
+    """Serialize objs repeat times and return the best rate."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for obj in objs:
+            function(obj)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(objs) / best
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare generated serializers with to_dict().')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"Loading {args.rows} employees and job histories...")
+    session, employees, job_histories = load_rows(args.rows)
+
+    for name, model, objs, projection in (
+        ('Employee', Employee, employees, ('employee_id', 'first_name', 'last_name', 'job_title')),
+        ('JobHistory', JobHistory, job_histories, ('employee_id', 'start_date', 'end_date'))
+    ):
+        serializer = get_serializer(model)
+        if any(serializer(obj) != obj.to_dict() for obj in objs):
+            raise RuntimeError(f"Generated {name} serializer does not match to_dict()")
+
+        baseline = rows_per_sec(model.to_dict, objs, args.repeat)
+        generated = rows_per_sec(serializer, objs, args.repeat)
+        projected = rows_per_sec(get_serializer(model, projection), objs, args.repeat)
+        print(f"{name:<11} to_dict() {baseline:11,.0f} rows/s  generated {generated:11,.0f} rows/s "
+              f"({generated / baseline:4.1f}x)  projected {projected:11,.0f} rows/s ({projected / baseline:4.1f}x)")
+
+    session.close()
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,12 @@
 #!/usr/bin/env python
 import os
+import time
+import click
 from app import create_app, db
 from app.models import User, Department, Job, Employee
+from app.utils.replicas import refresh_sqlite_replica
+from app.utils.edge_replica import edge_configured, refresh_edge_replica
+from app.utils.sharding import CrossShardWriteError, shard_configured, init_shards, sync_reference_tables
 from flask_cors import CORS
 
 # Get configuration from environment or use default
@@ -49,5 +54,46 @@ def seed_db():
     db.session.commit()
     print("Database seeded with initial data.")
 
+@app.cli.command("sync-replica")
+@click.option('--interval', type=float, default=0, help='Repeat every INTERVAL seconds (default: copy once).')
+def sync_replica(interval):
+    """Copy the primary SQLite database over the replica file (local stand-in for replication)."""
+    while True:
+        refresh_sqlite_replica()
+        print("Replica refreshed from the primary.")
+        if not interval:
+            break
+        time.sleep(interval)
+
+@app.cli.command("refresh-edge")
+def refresh_edge():
+    """Bring the local edge replica up to date with the database."""
+    if not edge_configured():
+        raise click.ClickException("EDGE_REPLICA_PATH is not set.")
+    stats = refresh_edge_replica()
+    changes = sum(table['last_changes'] for table in stats['tables'].values())
+    print(f"Edge replica refreshed: {changes} row(s) changed in {stats['last_duration_ms']} ms.")
+
+@app.cli.command("init-shards")
+def init_shards_command():
+    """Create the region shards and move each region's departments, employees and job history into its shard."""
+    if not shard_configured():
+        raise click.ClickException("DB_SHARDS is not set.")
+    try:
+        moved_per_shard = init_shards()
+    except CrossShardWriteError as e:
+        raise click.ClickException(str(e))
+    for shard, moved in moved_per_shard.items():
+        print(f"{shard}: moved {moved['departments']} department(s), {moved['employees']} employee(s) "
+              f"and {moved['job_history']} job history row(s).")
+
+@app.cli.command("sync-shards")
+def sync_shards():
+    """Copy the reference tables (regions, countries, locations, jobs, job grades) to every shard."""
+    if not shard_configured():
+        raise click.ClickException("DB_SHARDS is not set.")
+    for shard, changes in sync_reference_tables().items():
+        print(f"{shard}: {changes} reference row(s) changed.")
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0') 
\ No newline at end of file
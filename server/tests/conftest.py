@@ -0,0 +1,138 @@
+"""
+In-process checks of the data layer against temporary SQLite databases
+
+The configuration is read from the environment when the app package is
+imported, so the SQLite backend and two region shards are selected here
+first. The blueprints can be registered once per process, so every test
+shares one app: it gets fresh databases, the shards switched off unless it
+asks for them, and a reset of the process-wide state the data layer keeps
+between requests.
+"""
+import os
+import tempfile
+
+_data_dir = tempfile.mkdtemp(prefix='hrms-tests-')
+os.environ['DB_TYPE'] = 'sqlite'
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_data_dir, 'main.db')}"
+os.environ['DB_SHARDS'] = ','.join(f"{region_id}=sqlite:///{os.path.join(_data_dir, f'shard-{region_id}.db')}"
+                                   for region_id in (1, 2))
+os.environ.pop('DB_REPLICA_URI', None)
+os.environ.pop('EDGE_REPLICA_PATH', None)
+
+import datetime
+import pytest
+from app import create_app, db
+from app.config import DB_SHARDS
+from app.models import Region, Country, Location, Job, Department, Employee, JobHistory
+from app.utils import admission, circuit_breaker, group_commit, id_allocator, sharding
+
+_app = None
+
+
+def remove_database(path):
+    """Delete a SQLite database file and its WAL files."""
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+@pytest.fixture
+def make_app(monkeypatch):
+    """
+    Get a factory of apps on empty databases.
+
+    make_app(sharded=True) gives regions 1 and 2 their own shard database.
+    """
+    def make(sharded=False):
+        global _app
+        if _app is None:
+            _app = create_app('testing')
+        with _app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+        for name in ('main', 'shard-1', 'shard-2'):
+            remove_database(os.path.join(_data_dir, f'{name}.db'))
+        if not sharded:
+            for region_id in list(DB_SHARDS):
+                monkeypatch.delitem(DB_SHARDS, region_id)
+
+        # Process-wide state a previous app may have left behind
+        monkeypatch.setattr(sharding, '_directory', {})
+        monkeypatch.setattr(sharding, '_missing', {})
+        monkeypatch.setattr(sharding, '_counters', dict.fromkeys(sharding._counters, 0))
+        monkeypatch.setattr(id_allocator, '_allocators', {})
+        monkeypatch.setattr(group_commit, '_committers', {})
+        monkeypatch.setattr(circuit_breaker, '_breakers',
+                            {path: circuit_breaker.CircuitBreaker(path) for path in circuit_breaker.PATHS})
+        monkeypatch.setattr(admission, 'DB_ADMISSION_CLIENT_RATE', 0)
+
+        with _app.app_context():
+            db.create_all()
+        return _app
+    return make
+
+
+def seed(app):
+    """
+    Fill the main database with two regions: department 10 in Seattle
+    (region 1) with employees 100-102, and department 20 in London
+    (region 2) with employees 200-201. Employees 101 and 201 have a job
+    history row.
+    """
+    with app.app_context():
+        db.session.add_all([
+            Region(REGION_ID=1, REGION_NAME='Americas'),
+            Region(REGION_ID=2, REGION_NAME='Europe'),
+            Country(COUNTRY_ID='US', COUNTRY_NAME='United States', REGION_ID=1),
+            Country(COUNTRY_ID='UK', COUNTRY_NAME='United Kingdom', REGION_ID=2),
+            Location(LOCATION_ID=1700, CITY='Seattle', COUNTRY_ID='US'),
+            Location(LOCATION_ID=2400, CITY='London', COUNTRY_ID='UK'),
+            Job(JOB_ID='IT_PROG', JOB_TITLE='Programmer', MIN_SALARY=4000, MAX_SALARY=10000)
+        ])
+        db.session.commit()
+        db.session.add_all([
+            Department(DEPARTMENT_ID=10, DEPARTMENT_NAME='IT', LOCATION_ID=1700),
+            Department(DEPARTMENT_ID=20, DEPARTMENT_NAME='HR', LOCATION_ID=2400)
+        ])
+        db.session.commit()
+        for employee_id, department_id, manager_id in ((100, 10, None), (101, 10, 100), (102, 10, 100),
+                                                       (200, 20, None), (201, 20, 200)):
+            db.session.add(Employee(EMPLOYEE_ID=employee_id, FIRST_NAME=f'F{employee_id}', LAST_NAME='L',
+                                    EMAIL=f'E{employee_id}', JOB_ID='IT_PROG', DEPARTMENT_ID=department_id,
+                                    MANAGER_ID=manager_id, HIRE_DATE=datetime.date(2020, 1, 2)))
+            db.session.commit()
+        db.session.add_all([
+            JobHistory(EMPLOYEE_ID=101, START_DATE=datetime.date(2018, 1, 1), END_DATE=datetime.date(2019, 12, 31),
+                       JOB_ID='IT_PROG', DEPARTMENT_ID=10),
+            JobHistory(EMPLOYEE_ID=201, START_DATE=datetime.date(2017, 1, 1), END_DATE=datetime.date(2019, 12, 31),
+                       JOB_ID='IT_PROG', DEPARTMENT_ID=20)
+        ])
+        db.session.commit()
+
+
+@pytest.fixture
+def app(make_app):
+    """An unsharded app on a seeded database."""
+    app = make_app()
+    seed(app)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def sharded_app(make_app):
+    """A seeded app whose regions 1 and 2 were moved into their shards."""
+    app = make_app(sharded=True)
+    seed(app)
+    with app.app_context():
+        sharding.init_shards()
+    return app
+
+
+@pytest.fixture
+def sharded_client(sharded_app):
+    return sharded_app.test_client()
@@ -0,0 +1,113 @@
+"""Clients over their rate get a 429, and under overload the lowest priorities are shed first."""
+import collections
+from types import SimpleNamespace
+import jwt
+import pytest
+from app.utils import admission
+
+TOKEN = jwt.encode({'sub': '7'}, admission.JWT_SECRET_KEY, algorithm='HS256')
+AUTHENTICATED = {'Authorization': f'Bearer {TOKEN}'}
+
+REQUESTS = {
+    'anonymous_write': ('put', {}),
+    'anonymous_read': ('get', {}),
+    'authenticated_write': ('put', AUTHENTICATED),
+    'authenticated_read': ('get', AUTHENTICATED)
+}
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    """Fresh admission state; returns a function setting the limits of a test."""
+    monkeypatch.setattr(admission, '_buckets', collections.OrderedDict())
+    monkeypatch.setattr(admission, '_in_flight', 0)
+    monkeypatch.setattr(admission, '_stats', {
+        **dict.fromkeys(('admitted', 'rate_limited', 'overloaded', 'peak_in_flight'), 0),
+        'shed_by_priority': dict.fromkeys(admission.PRIORITIES, 0)
+    })
+
+    def set_limits(rate=0, burst=1, max_in_flight=0, share=0.5):
+        monkeypatch.setattr(admission, 'DB_ADMISSION_CLIENT_RATE', rate)
+        monkeypatch.setattr(admission, 'DB_ADMISSION_CLIENT_BURST', burst)
+        monkeypatch.setattr(admission, 'DB_ADMISSION_MAX_IN_FLIGHT', max_in_flight)
+        monkeypatch.setattr(admission, 'PRIORITY_SHARES', {
+            'authenticated_read': 1.0,
+            'normal': share,
+            'anonymous_write': share ** 2
+        })
+    return set_limits
+
+
+def send(client, kind, address='10.0.0.1'):
+    method, headers = REQUESTS[kind]
+    if method == 'get':
+        return client.get('/api/employees/101', headers=headers, environ_base={'REMOTE_ADDR': address})
+    return client.put('/api/employees/101', json={'salary': 5000}, headers=headers,
+                      environ_base={'REMOTE_ADDR': address})
+
+
+def test_token_bucket_refills_at_the_client_rate(monkeypatch, limits):
+    limits(rate=2, burst=3)
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(admission, 'time', SimpleNamespace(monotonic=lambda: clock.now))
+
+    assert [admission.take_token('addr:a', False) for _ in range(3)] == [0, 0, 0]
+    assert admission.take_token('addr:a', False) == pytest.approx(0.5)
+    # Another client has its own bucket
+    assert admission.take_token('addr:b', False) == 0
+
+    clock.now += 0.5
+    assert admission.take_token('addr:a', False) == 0
+    assert admission.take_token('addr:a', False) == pytest.approx(0.5)
+
+    # A JWT user gets DB_ADMISSION_AUTHENTICATED_FACTOR times the burst
+    factor = int(admission.DB_ADMISSION_AUTHENTICATED_FACTOR)
+    assert [admission.take_token('user:7', True) for _ in range(3 * factor)] == [0] * 3 * factor
+    assert admission.take_token('user:7', True) > 0
+
+
+def test_clients_over_their_rate_get_a_429(client, limits):
+    limits(rate=0.5, burst=2)
+
+    responses = [send(client, 'anonymous_read') for _ in range(3)]
+
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    assert responses[-1].json['error'] == 429
+    assert responses[-1].headers['Retry-After'] == '2'
+    assert send(client, 'anonymous_read', address='10.0.0.2').status_code == 200
+    assert send(client, 'authenticated_read').status_code == 200
+    # An invalid token is an anonymous client
+    assert client.get('/api/employees/101', headers={'Authorization': 'Bearer forged'},
+                      environ_base={'REMOTE_ADDR': '10.0.0.1'}).status_code == 429
+    assert admission.get_admission_stats()['rate_limited'] == 2
+
+
+def test_anonymous_writes_are_shed_before_authenticated_reads(client, limits, monkeypatch):
+    limits(max_in_flight=4, share=0.5)
+
+    # The lowest load at which each kind of request is shed
+    shed_from = {}
+    for busy in range(5):
+        monkeypatch.setattr(admission, '_in_flight', busy)
+        for kind in REQUESTS:
+            response = send(client, kind)
+            if response.status_code == 503:
+                assert response.json['error'] == 503
+                assert response.headers['Retry-After'] == str(admission.DB_ADMISSION_RETRY_AFTER)
+                shed_from.setdefault(kind, busy)
+            else:
+                assert response.status_code == 200 and kind not in shed_from
+            assert admission._in_flight == busy
+
+    assert shed_from == {'anonymous_write': 1, 'anonymous_read': 2, 'authenticated_write': 2, 'authenticated_read': 4}
+    assert admission.get_admission_stats()['shed_by_priority'] == {
+        'authenticated_read': 1, 'normal': 2 * 3, 'anonymous_write': 4
+    }
+
+
+def test_monitoring_endpoints_are_never_shed(client, limits, monkeypatch):
+    limits(rate=0.01, burst=1, max_in_flight=1)
+    monkeypatch.setattr(admission, '_in_flight', 1)
+
+    for _ in range(3):
+        assert client.get('/api/direct/admission-stats').status_code == 200
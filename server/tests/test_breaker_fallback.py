@@ -0,0 +1,91 @@
+"""While a data path's breaker is open, its guarded reads answer the same from the other path."""
+from urllib.parse import quote
+import pytest
+from app import db
+from app.models import JobGrade
+from app.utils.circuit_breaker import get_breaker
+
+DIRECT_READS = [
+    '/api/employees/',
+    '/api/employees/?limit=2',
+    '/api/employees/?ids=201,999,100',
+    '/api/employees/101',
+    '/api/employees/999',
+    '/api/departments/',
+    '/api/departments/?limit=1',
+    '/api/departments/?ids=20,10',
+    '/api/departments/20',
+    '/api/departments/options',
+    '/api/jobs/',
+    '/api/jobs/?ids=IT_PROG,NONE',
+    '/api/jobs/IT_PROG',
+    '/api/jobs/options',
+    '/api/locations/',
+    '/api/locations/?limit=1',
+    '/api/locations/?ids=2400',
+    '/api/locations/2400',
+    '/api/locations/options'
+]
+
+ORM_READS = [
+    '/api/job-grades/',
+    '/api/job-grades/B',
+    '/api/job-history/',
+    '/api/job-history/?limit=1',
+    '/api/job-history/employee/201'
+]
+
+
+def add_job_grades(app):
+    with app.app_context():
+        db.session.add_all([
+            JobGrade(GRADE_LEVEL='A', LOWEST_SAL=1000, HIGHEST_SAL=2999),
+            JobGrade(GRADE_LEVEL='B', LOWEST_SAL=3000, HIGHEST_SAL=5999)
+        ])
+        db.session.commit()
+
+
+def assert_fallbacks_match(client, path, urls):
+    expected = {url: client.get(url) for url in urls}
+    # The following page of every paged read, from its real cursor
+    for url, response in list(expected.items()):
+        if response.json.get('next_cursor'):
+            next_url = f"{url}&after={quote(response.json['next_cursor'])}"
+            expected[next_url] = client.get(next_url)
+            assert expected[next_url].status_code == 200, next_url
+    urls = list(expected)
+    breaker = get_breaker(path)
+    breaker._trip()
+    fallbacks = breaker.stats()['fallbacks']
+
+    for url in urls:
+        response = client.get(url)
+        assert response.status_code == expected[url].status_code, url
+        if response.status_code == 200:
+            assert response.json == expected[url].json, url
+    assert breaker.stats()['fallbacks'] == fallbacks + len(urls)
+
+
+def test_direct_reads_fall_back_to_the_orm(client):
+    assert_fallbacks_match(client, 'direct', DIRECT_READS)
+
+
+def test_orm_reads_fall_back_to_the_direct_path(app, client):
+    add_job_grades(app)
+    assert_fallbacks_match(client, 'orm', ORM_READS)
+
+
+@pytest.mark.parametrize('path, urls', [('direct', DIRECT_READS), ('orm', ORM_READS)])
+def test_sharded_reads_fall_back(sharded_app, sharded_client, path, urls):
+    add_job_grades(sharded_app)
+    assert_fallbacks_match(sharded_client, path, urls)
+
+
+def test_includes_are_not_served_by_the_fallback(client):
+    get_breaker('direct')._trip()
+
+    response = client.get('/api/employees/101?include=manager')
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After']
+    assert get_breaker('direct').stats()['fallbacks'] == 0
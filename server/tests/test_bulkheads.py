@@ -0,0 +1,45 @@
+"""Only whole-table lists are heavy, and they queue within their own deadline."""
+import time
+from app.utils import bulkheads
+
+
+def admitted(name):
+    return bulkheads.get_bulkhead_stats()['classes'][name]['admitted']
+
+
+def test_pages_and_multi_gets_are_interactive(client):
+    heavy, interactive = admitted('heavy'), admitted('interactive')
+
+    assert client.get('/api/employees/?limit=2').status_code == 200
+    assert client.get('/api/employees/?ids=100,101').status_code == 200
+    assert client.get('/api/job-history/?limit=1').status_code == 200
+    assert admitted('heavy') == heavy
+    assert admitted('interactive') == interactive + 3
+
+    assert client.get('/api/employees/').status_code == 200
+    assert client.get('/api/job-history/').status_code == 200
+    assert admitted('heavy') == heavy + 2
+
+
+def test_heavy_queue_wait_is_bounded_by_the_list_deadline(app, client, monkeypatch):
+    view = app.view_functions['api.employee.get_employees_route']
+    milliseconds, when = view.db_deadline
+    monkeypatch.setattr(view, 'db_deadline', (200, when))
+    monkeypatch.setattr(bulkheads, 'DB_BULKHEAD_QUEUE_TIMEOUT', 30000)
+    heavy = bulkheads._bulkheads['heavy']
+    for _ in range(heavy.limit):
+        heavy._slots.acquire()
+    try:
+        start = time.monotonic()
+        response = client.get('/api/employees/')
+        waited = time.monotonic() - start
+
+        # A page is interactive, so it does not wait behind the full lists
+        assert client.get('/api/employees/?limit=1').status_code == 200
+    finally:
+        for _ in range(heavy.limit):
+            heavy._slots.release()
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After']
+    assert waited < 2
@@ -0,0 +1,70 @@
+"""A statement outliving its request's deadline is cancelled and answered with a 503."""
+import time
+import pytest
+from sqlalchemy import text
+from app import db
+from app.routes import direct_routes
+from app.utils import db_utils, deadlines
+
+# Counts for a long time unless its progress handler interrupts it
+SLOW_SQL = """
+    WITH RECURSIVE numbers(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM numbers LIMIT 100000000)
+    SELECT MAX(n) FROM numbers
+"""
+
+
+def slow_direct_read(employee_id):
+    db_utils.execute_query(SLOW_SQL)
+
+
+def slow_orm_read(employee_id):
+    db.session.execute(text(SLOW_SQL)).all()
+
+
+def exceeded(route):
+    return deadlines.get_deadline_stats()['exceeded'].get(route, 0)
+
+
+@pytest.mark.parametrize('slow_read', [slow_direct_read, slow_orm_read], ids=['direct', 'orm'])
+def test_a_slow_statement_is_cancelled_at_the_deadline(client, monkeypatch, slow_read):
+    monkeypatch.setattr(deadlines, 'DB_DEFAULT_DEADLINE', 100)
+    monkeypatch.setattr(direct_routes, 'get_employee', slow_read)
+    count = exceeded('api.direct.employee')
+
+    start = time.monotonic()
+    response = client.get('/api/direct/employees/100')
+    elapsed = time.monotonic() - start
+
+    assert response.status_code == 503
+    assert response.json['error'] == 503
+    assert response.headers['Retry-After'] == str(deadlines.DB_DEADLINE_RETRY_AFTER)
+    assert elapsed < 2
+    assert exceeded('api.direct.employee') == count + 1
+
+    # The connections go back to the pool without the progress handler
+    assert client.get('/api/employees/100').status_code == 200
+    assert client.get('/api/employees/').status_code == 200
+
+
+def test_a_view_budget_overrides_the_default(app, client, monkeypatch):
+    monkeypatch.setattr(deadlines, 'DB_DEFAULT_DEADLINE', 60000)
+    monkeypatch.setattr(direct_routes, 'get_employee', slow_direct_read)
+    view = app.view_functions['api.direct.employee']
+    monkeypatch.setattr(view, 'db_deadline', (100, None), raising=False)
+    count = exceeded('api.direct.employee')
+
+    start = time.monotonic()
+    response = client.get('/api/direct/employees/100')
+
+    assert response.status_code == 503
+    assert time.monotonic() - start < 2
+    assert exceeded('api.direct.employee') == count + 1
+
+
+def test_requests_within_budget_are_not_counted(client, monkeypatch):
+    monkeypatch.setattr(deadlines, 'DB_DEFAULT_DEADLINE', 5000)
+    before = deadlines.get_deadline_stats()['exceeded']
+
+    assert client.get('/api/direct/employees/100').status_code == 200
+    assert client.get('/api/direct/employees/999').status_code == 404
+    assert deadlines.get_deadline_stats()['exceeded'] == before
@@ -0,0 +1,49 @@
+"""Edge refreshes apply upserts incrementally and sweep for deletes on their own cadence."""
+import os
+import pytest
+from sqlalchemy import create_engine, delete, select, update
+from app import db
+from app.models import Region
+from app.utils.edge_replica import refresh_table
+from conftest import _data_dir, remove_database
+
+
+@pytest.fixture
+def copy(app):
+    path = os.path.join(_data_dir, 'edge.db')
+    remove_database(path)
+    engine = create_engine(f'sqlite:///{path}')
+    db.metadata.create_all(engine, tables=[Region.__table__])
+    yield engine
+    engine.dispose()
+
+
+def refresh(source, copy, marker, sweep=False):
+    with copy.begin() as target:
+        return refresh_table(source, target, Region.__table__, marker, sweep)
+
+
+def copied_names(copy):
+    with copy.connect() as connection:
+        return dict(connection.execute(select(Region.__table__)).all())
+
+
+def test_refresh_upserts_and_sweeps_deletes(app, copy):
+    table = Region.__table__
+    with app.app_context(), db.engine.connect() as source:
+        # The first refresh fetches every row, so it is complete
+        _, upserted, deleted = refresh(source, copy, None)
+        assert (upserted, deleted) == (2, 0)
+
+        source.execute(update(table).where(table.c.REGION_ID == 1).values(REGION_NAME='Amer'))
+        source.execute(delete(table).where(table.c.REGION_ID == 2))
+        source.commit()
+
+        # Incremental refreshes apply the change but leave deletes to the sweep
+        _, upserted, deleted = refresh(source, copy, 'marker')
+        assert (upserted, deleted) == (1, 0)
+        assert copied_names(copy) == {1: 'Amer', 2: 'Europe'}
+
+        _, upserted, deleted = refresh(source, copy, 'marker', sweep=True)
+        assert (upserted, deleted) == (0, 1)
+        assert copied_names(copy) == {1: 'Amer'}
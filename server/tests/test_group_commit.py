@@ -0,0 +1,52 @@
+"""Group commit hands each caller its own outcome, within its deadline."""
+import threading
+from app.utils import circuit_breaker, group_commit
+
+
+def put_concurrently(app, updates):
+    """PUT every (employee_id, body) pair at once, returning the responses in order."""
+    responses = [None] * len(updates)
+    barrier = threading.Barrier(len(updates))
+
+    def put(index, employee_id, body):
+        client = app.test_client()
+        barrier.wait()
+        responses[index] = client.put(f'/api/employees/{employee_id}', json=body)
+
+    threads = [threading.Thread(target=put, args=(index, *update)) for index, update in enumerate(updates)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return responses
+
+
+def test_each_caller_gets_its_own_error(app, monkeypatch):
+    monkeypatch.setattr(group_commit, 'DB_GROUP_COMMIT_WINDOW', 200)
+    responses = put_concurrently(app, [
+        (101, {'salary': 5000}),
+        (102, {'email': 'E100'}),
+        (201, {'salary': 7000})
+    ])
+
+    assert [response.status_code for response in responses] == [200, 400, 200]
+    assert responses[0].json['employee']['salary'] == 5000
+    assert responses[1].json['message'] == "Email 'E100' is already in use"
+    assert responses[2].json['employee']['salary'] == 7000
+    stats = group_commit.get_group_commit_stats()['committers']['employees.update@main']
+    assert stats['rows'] == 3 and stats['row_errors'] == 1
+
+
+def test_wait_is_bounded_by_the_deadline(client, monkeypatch):
+    monkeypatch.setattr(group_commit, 'DB_GROUP_COMMIT_WINDOW', 1000)
+    monkeypatch.setattr('app.utils.deadlines.DB_DEFAULT_DEADLINE', 100)
+
+    response = client.put('/api/employees/101', json={'salary': 5000})
+    assert response.status_code == 503
+    assert response.headers['Retry-After']
+    assert circuit_breaker.get_breaker('direct').stats()['failures'] == 1
+
+    # The queued row was withdrawn, not written after the caller gave up
+    monkeypatch.setattr('app.utils.deadlines.DB_DEFAULT_DEADLINE', 10000)
+    monkeypatch.setattr(group_commit, 'DB_GROUP_COMMIT_WINDOW', 0)
+    assert client.get('/api/employees/101').json['employee']['salary'] != 5000
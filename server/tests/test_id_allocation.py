@@ -0,0 +1,26 @@
+"""New records take their primary keys from the process's reserved blocks."""
+
+
+def create_department(client, **extra):
+    return client.post('/api/departments', json={'department_name': 'Ops', 'location_id': 1700,
+                                                 'manager_id': 100, **extra})
+
+
+def test_client_department_id_cannot_collide_with_reserved_block(client):
+    first = create_department(client)
+    assert first.status_code == 201
+    reserved = first.json['department']['department_id']
+
+    # The next ID of the block this process already holds
+    second = create_department(client, department_id=reserved + 1)
+    third = create_department(client)
+    assert second.status_code == 201
+    assert third.status_code == 201
+    ids = [response.json['department']['department_id'] for response in (first, second, third)]
+    assert ids == [reserved, reserved + 1, reserved + 2]
+
+
+def test_client_location_id_is_ignored(client):
+    response = client.post('/api/locations', json={'location_id': 1700, 'city': 'Austin', 'country_id': 'US'})
+    assert response.status_code == 201
+    assert response.json['location']['location_id'] != 1700
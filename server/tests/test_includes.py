@@ -0,0 +1,86 @@
+"""?include= loads each relationship with one batched lookup, whatever the number of records."""
+import pytest
+from app.utils import db_utils
+
+EMPLOYEE_INCLUDES = 'manager,direct_reports,job_history,department.location'
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    """The names of the statements run by the batched loaders, in order."""
+    names = []
+    gather_named_query = db_utils.gather_named_query
+
+    def record(name, params=None, key=None, limit=None):
+        names.append(name)
+        return gather_named_query(name, params, key, limit)
+
+    monkeypatch.setattr(db_utils, 'gather_named_query', record)
+    return names
+
+
+def lookup_names(names):
+    """The batch lookups among the statements, by name without the IN-list size."""
+    return sorted(name.split('[')[0] for name in names if '[' in name)
+
+
+@pytest.mark.parametrize('url', [
+    f'/api/employees/?include={EMPLOYEE_INCLUDES}',
+    f'/api/employees/?limit=2&include={EMPLOYEE_INCLUDES}',
+    f'/api/employees/?ids=201,101,100&include={EMPLOYEE_INCLUDES}',
+    f'/api/employees/101?include={EMPLOYEE_INCLUDES}'
+])
+@pytest.mark.parametrize('sharded', [False, True], ids=['single', 'sharded'])
+def test_one_lookup_per_relationship(request, lookups, url, sharded):
+    client = request.getfixturevalue('sharded_client' if sharded else 'client')
+    client.get(url)
+    lookups.clear()
+
+    response = client.get(url)
+
+    assert response.status_code == 200, response.json
+    assert lookup_names(lookups) == [
+        'departments.by_ids', 'departments.locations', 'employees.by_ids', 'employees.by_managers',
+        'job_history.by_employees'
+    ]
+
+
+@pytest.mark.parametrize('sharded', [False, True], ids=['single', 'sharded'])
+def test_included_records(request, sharded):
+    client = request.getfixturevalue('sharded_client' if sharded else 'client')
+
+    employees = {
+        employee['employee_id']: employee
+        for employee in client.get(f'/api/employees/?include={EMPLOYEE_INCLUDES}').json['employees']
+    }
+
+    assert employees[101]['manager']['employee_id'] == 100
+    assert employees[100]['manager'] is None
+    assert [report['employee_id'] for report in employees[100]['direct_reports']] == [101, 102]
+    assert employees[101]['direct_reports'] == []
+    assert [row['start_date'] for row in employees[101]['job_history']] == ['2018-01-01']
+    assert employees[100]['job_history'] == []
+    assert employees[201]['department']['department_id'] == 20
+    assert employees[201]['department']['location']['city'] == 'London'
+    assert employees[101]['department']['location']['city'] == 'Seattle'
+
+
+def test_nested_includes_load_each_level_once(client, lookups):
+    response = client.get('/api/departments/?include=employees.manager.department,manager')
+
+    assert response.status_code == 200
+    departments = {department['department_id']: department for department in response.json['departments']}
+    assert [employee['employee_id'] for employee in departments[10]['employees']] == [100, 101, 102]
+    assert departments[10]['employees'][1]['manager']['department']['department_id'] == 10
+    assert departments[10]['manager'] is None
+    # The department lookup has no keys when no department has a manager
+    assert lookup_names(lookups) == ['departments.by_ids', 'employees.by_departments', 'employees.by_ids']
+
+
+@pytest.mark.parametrize('include', ['salary', 'manager.salary', 'job_history.manager',
+                                     'manager.manager.manager.manager'])
+def test_unknown_or_too_deep_includes_are_bad_requests(client, include):
+    response = client.get(f'/api/employees/?include={include}')
+
+    assert response.status_code == 400
+    assert include in response.json['message']
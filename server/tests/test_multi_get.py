@@ -0,0 +1,84 @@
+"""?ids= returns the named records in request order with one statement, and lists the missing ones."""
+import pytest
+from app.utils import db_utils, pagination
+from app.utils.pagination import encode_cursor
+from app.utils.queries import get_statement_stats
+
+MULTI_GETS = [
+    ('/api/employees/', 'employees', 'employee_id', [201, 999, 100, 101, 998], [999, 998]),
+    ('/api/departments/', 'departments', 'department_id', [20, 30, 10], [30]),
+    ('/api/locations/', 'locations', 'location_id', [2400, 1700, 1], [1]),
+    ('/api/jobs/', 'jobs', 'job_id', ['NONE', 'IT_PROG'], ['NONE'])
+]
+
+
+@pytest.fixture
+def statements(monkeypatch):
+    """The names of the registered statements run, in order."""
+    names = []
+    execute_named_query = db_utils.execute_named_query
+    scatter_named_query = db_utils.scatter_named_query
+
+    def record_execute(name, params=None, fetchall=True):
+        names.append(name)
+        return execute_named_query(name, params, fetchall)
+
+    def record_scatter(name, params=None):
+        names.append(name)
+        return scatter_named_query(name, params)
+
+    monkeypatch.setattr(db_utils, 'execute_named_query', record_execute)
+    monkeypatch.setattr(db_utils, 'scatter_named_query', record_scatter)
+    return names
+
+
+def ids_url(url, ids):
+    return f"{url}?ids={','.join(str(key) for key in ids)}"
+
+
+@pytest.mark.parametrize('url, key, id_key, ids, missing', MULTI_GETS)
+@pytest.mark.parametrize('sharded', [False, True], ids=['single', 'sharded'])
+def test_records_come_back_in_request_order(request, statements, url, key, id_key, ids, missing, sharded):
+    client = request.getfixturevalue('sharded_client' if sharded else 'client')
+    response = client.get(ids_url(url, ids))
+
+    assert response.status_code == 200, response.json
+    assert [record[id_key] for record in response.json[key]] == [id_ for id_ in ids if id_ not in missing]
+    assert response.json['not_found'] == missing
+    assert statements == [f'{key}.get_many']
+    # Each record is the one the whole list has
+    everything = {record[id_key]: record for record in client.get(url).json[key]}
+    assert all(record == everything[record[id_key]] for record in response.json[key])
+
+
+def test_repeated_ids_are_returned_once(client):
+    response = client.get('/api/employees/?ids=101,100,101,100')
+
+    assert [employee['employee_id'] for employee in response.json['employees']] == [101, 100]
+    assert response.json['not_found'] == []
+
+
+def test_the_statement_text_does_not_depend_on_the_number_of_ids(client):
+    client.get('/api/employees/?ids=100')
+    distinct = get_statement_stats()['distinct_statements']
+
+    for count in (2, 5, 40):
+        assert client.get(ids_url('/api/employees/', range(100, 100 + count))).status_code == 200
+    assert get_statement_stats()['distinct_statements'] == distinct
+
+
+@pytest.mark.parametrize('query, message', [
+    ('ids=', 'at least one'),
+    ('ids=,,', 'at least one'),
+    ('ids=100,abc', 'comma-separated'),
+    ('ids=100,101,102', 'at most 2'),
+    ('ids=100&limit=1', 'cannot be combined'),
+    (f"ids=100&after={encode_cursor('employees', [100])}", 'cannot be combined')
+])
+def test_invalid_ids_are_bad_requests(client, monkeypatch, query, message):
+    monkeypatch.setattr(pagination, 'MAX_MULTI_GET_IDS', 2)
+
+    response = client.get(f'/api/employees/?{query}')
+
+    assert response.status_code == 400
+    assert message in response.json['message']
@@ -0,0 +1,118 @@
+"""Keyset pages walk a list exactly once, in key order, from opaque cursors."""
+import datetime
+from urllib.parse import quote
+import pytest
+from app import db
+from app.models import JobHistory
+from app.utils import pagination
+from app.utils.pagination import decode_cursor, encode_cursor, get_page_request
+
+
+def add_job_history(app):
+    """More history for employee 101, so pages split inside one employee."""
+    with app.app_context():
+        db.session.add_all([
+            JobHistory(EMPLOYEE_ID=101, START_DATE=datetime.date(2016, 1, 1), END_DATE=datetime.date(2016, 12, 31),
+                       JOB_ID='IT_PROG', DEPARTMENT_ID=10),
+            JobHistory(EMPLOYEE_ID=101, START_DATE=datetime.date(2017, 1, 1), END_DATE=datetime.date(2017, 12, 31),
+                       JOB_ID='IT_PROG', DEPARTMENT_ID=10),
+            JobHistory(EMPLOYEE_ID=100, START_DATE=datetime.date(2019, 6, 1), END_DATE=datetime.date(2019, 12, 31),
+                       JOB_ID='IT_PROG', DEPARTMENT_ID=10)
+        ])
+        db.session.commit()
+
+
+def walk(client, url, key, limit):
+    """Follow a list's cursors from its first page, collecting every row."""
+    rows, pages = [], 0
+    next_url = f'{url}?limit={limit}'
+    while next_url:
+        response = client.get(next_url)
+        assert response.status_code == 200, response.json
+        page = response.json[key]
+        assert len(page) <= limit
+        rows.extend(page)
+        pages += 1
+        cursor = response.json['next_cursor']
+        next_url = f'{url}?limit={limit}&after={quote(cursor)}' if cursor else None
+    return rows, pages
+
+
+def test_cursor_round_trip():
+    token = encode_cursor('job_histories', [101, '2017-01-01'])
+
+    assert '=' not in token and '/' not in token and '+' not in token
+    assert decode_cursor('job_histories', token) == [101, '2017-01-01']
+
+
+@pytest.mark.parametrize('token', [
+    encode_cursor('employees', [101]),
+    'not a cursor',
+    'e30',  # {}
+    'eyJyIjoiam9iX2hpc3RvcmllcyIsImsiOjF9'  # a key that is not a list
+])
+def test_foreign_or_malformed_cursors_are_rejected(token):
+    with pytest.raises(ValueError, match='Invalid pagination cursor'):
+        decode_cursor('job_histories', token)
+
+
+@pytest.mark.parametrize('query, message', [
+    ('limit=0', 'at least 1'),
+    ('limit=ten', 'integer'),
+    (f"after={encode_cursor('job_histories', [101])}", 'Invalid pagination cursor'),
+    (f"after={encode_cursor('job_histories', [101, 'yesterday'])}", 'Invalid pagination cursor')
+])
+def test_invalid_page_requests(app, query, message):
+    with app.test_request_context(f'/api/job-history/?{query}'):
+        with pytest.raises(ValueError, match=message):
+            get_page_request('job_histories', key_types=(int, datetime.date.fromisoformat))
+
+
+def test_page_request_defaults_and_caps(app, monkeypatch):
+    monkeypatch.setattr(pagination, 'MAX_PAGE_SIZE', 3)
+    with app.test_request_context('/api/employees/'):
+        assert get_page_request('employees') is None
+    with app.test_request_context('/api/employees/?limit=100'):
+        assert get_page_request('employees').limit == 3
+    with app.test_request_context(f"/api/job-history/?after={encode_cursor('job_histories', [101, '2017-01-01'])}"):
+        page = get_page_request('job_histories', key_types=(int, datetime.date.fromisoformat))
+        assert page.limit == pagination.DEFAULT_PAGE_SIZE
+        assert page.after == [101, datetime.date(2017, 1, 1)]
+
+
+def test_invalid_cursor_is_a_bad_request(client):
+    response = client.get(f"/api/employees/?after={encode_cursor('departments', [10])}")
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('url, key, id_key', [
+    ('/api/employees/', 'employees', 'employee_id'),
+    ('/api/departments/', 'departments', 'department_id'),
+    ('/api/countries/', 'countries', 'country_id'),
+    ('/api/direct/countries', 'countries', 'country_id')
+])
+@pytest.mark.parametrize('limit', [1, 2, 50])
+def test_pages_cover_the_list_once_in_key_order(client, url, key, id_key, limit):
+    everything = client.get(url).json[key]
+    rows, pages = walk(client, url, key, limit)
+
+    assert sorted(rows, key=lambda row: row[id_key]) == sorted(everything, key=lambda row: row[id_key])
+    assert [row[id_key] for row in rows] == sorted(row[id_key] for row in everything)
+    assert pages == -(-len(everything) // limit)
+
+
+@pytest.mark.parametrize('url', ['/api/job-history/', '/api/direct/job-history'])
+@pytest.mark.parametrize('limit', [1, 2, 3])
+@pytest.mark.parametrize('sharded', [False, True], ids=['single', 'sharded'])
+def test_job_history_pages_on_the_composite_key(request, url, limit, sharded):
+    app = request.getfixturevalue('sharded_app' if sharded else 'app')
+    add_job_history(app)
+    client = app.test_client()
+
+    everything = client.get(url).json['job_histories']
+    rows, pages = walk(client, url, 'job_histories', limit)
+
+    keys = [(row['employee_id'], row['start_date']) for row in rows]
+    assert keys == sorted((row['employee_id'], row['start_date']) for row in everything)
+    assert len(set(keys)) == len(keys) == 5
+    assert pages == -(-len(keys) // limit)
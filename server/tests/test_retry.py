@@ -0,0 +1,186 @@
+"""Transient errors are retried only where that is safe, within the request's deadline."""
+import time
+from types import SimpleNamespace
+import oracledb
+import pytest
+from flask import g
+from app.utils import db_utils, retry
+from app.utils.deadlines import DeadlineExceeded
+from app.utils.dialects import OracleDialect
+
+LOST = 'ORA-03113'
+DEADLOCK = 'ORA-00060'
+NO_LISTENER = 'DPY-6005'
+
+
+def ora(code):
+    return oracledb.DatabaseError(SimpleNamespace(full_code=code, message=code))
+
+
+class OracleErrors:
+    """The test database's dialect, classifying errors like Oracle does."""
+    DISCONNECT_ERRORS = OracleDialect.DISCONNECT_ERRORS
+    STATEMENT_ERRORS = OracleDialect.STATEMENT_ERRORS
+    error_code = OracleDialect.error_code
+    is_disconnect = OracleDialect.is_disconnect
+    is_retryable = OracleDialect.is_retryable
+
+    def __init__(self, dialect):
+        self.dialect = dialect
+
+    def __getattr__(self, name):
+        return getattr(self.dialect, name)
+
+
+class FlakyWork:
+    """Work that fails with the given errors, then reads one row."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.connections = []
+
+    def __call__(self, connection):
+        self.connections.append(connection)
+        if self.errors:
+            raise ora(self.errors.pop(0))
+        return connection.cursor().execute('SELECT 1').fetchone()[0]
+
+
+@pytest.fixture
+def oracle_errors(app, monkeypatch):
+    dialect = OracleErrors(db_utils.get_dialect())
+    monkeypatch.setattr(db_utils, 'unit_dialect', lambda: dialect)
+    monkeypatch.setattr(db_utils, 'get_dialect', lambda: dialect)
+    monkeypatch.setattr(retry, 'DB_RETRY_BASE_DELAY', 1)
+    monkeypatch.setattr(retry, '_counters', dict.fromkeys(retry._counters, 0))
+    return dialect
+
+
+@pytest.mark.parametrize('error', [LOST, DEADLOCK])
+def test_reads_retry_after_any_transient_error(app, oracle_errors, error):
+    work = FlakyWork(error)
+    with app.test_request_context('/api/employees/'):
+        assert db_utils.run_in_unit_of_work(work) == 1
+        assert not g.db_failed
+    assert len(work.connections) == 2
+    # A lost connection is replaced before the retry
+    assert (work.connections[0] is not work.connections[1]) == (error == LOST)
+    assert retry.get_retry_stats()['recovered'] == 1
+
+
+def test_writes_retry_only_after_a_statement_rollback(app, oracle_errors):
+    work = FlakyWork(DEADLOCK)
+    with app.test_request_context('/api/employees/', method='POST'):
+        assert db_utils.run_in_unit_of_work(work, write=True) == 1
+    assert len(work.connections) == 2
+
+    work = FlakyWork(LOST)
+    with app.test_request_context('/api/employees/', method='POST'):
+        with pytest.raises(oracledb.DatabaseError):
+            db_utils.run_in_unit_of_work(work, write=True)
+        assert g.db_failed
+    assert len(work.connections) == 1
+
+
+def test_a_lost_connection_holding_writes_is_not_retried(app, oracle_errors):
+    work = FlakyWork(LOST)
+    with app.test_request_context('/api/employees/', method='POST'):
+        db_utils.run_in_unit_of_work(FlakyWork(), write=True)
+        with pytest.raises(oracledb.DatabaseError):
+            db_utils.run_in_unit_of_work(work)
+        assert g.db_failed
+    assert len(work.connections) == 1
+    assert retry.get_retry_stats()['retries'] == 0
+
+
+def test_errors_that_are_not_transient_are_not_retried(app, oracle_errors):
+    work = FlakyWork('ORA-00001')
+    with app.test_request_context('/api/employees/'):
+        with pytest.raises(oracledb.DatabaseError):
+            db_utils.run_in_unit_of_work(work)
+    assert len(work.connections) == 1
+
+
+def test_retries_stop_after_the_last_attempt(app, oracle_errors, monkeypatch):
+    monkeypatch.setattr(retry, 'DB_RETRY_ATTEMPTS', 3)
+    work = FlakyWork(LOST, LOST, LOST)
+    with app.test_request_context('/api/employees/'):
+        with pytest.raises(oracledb.DatabaseError):
+            db_utils.run_in_unit_of_work(work)
+    assert len(work.connections) == 3
+    assert retry.get_retry_stats()['exhausted'] == 1
+
+
+def test_the_backoff_does_not_sleep_past_the_deadline(app, oracle_errors, monkeypatch):
+    monkeypatch.setattr(retry, 'backoff_delay', lambda attempt: 5)
+    work = FlakyWork(LOST)
+    with app.test_request_context('/api/employees/'):
+        g.db_deadline = time.monotonic() + 0.5
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            db_utils.run_in_unit_of_work(work)
+        assert time.monotonic() - start < 0.5
+        assert g.db_deadline_exceeded
+    assert len(work.connections) == 1
+
+
+class FakePool:
+    def __init__(self, dsn, down):
+        self.dsn = dsn
+        self.down = down
+        self.closed = False
+
+    def acquire(self):
+        if self.dsn in self.down:
+            raise ora(NO_LISTENER)
+        return SimpleNamespace(dsn=self.dsn)
+
+    def close(self, force=False):
+        self.closed = True
+
+
+@pytest.fixture
+def failover_dsns(oracle_errors, monkeypatch):
+    pools = []
+    down = {'db1'}
+
+    def create_pool(dsn, **kwargs):
+        pools.append(FakePool(dsn, down))
+        return pools[-1]
+
+    monkeypatch.setattr(oracledb, 'create_pool', create_pool)
+    monkeypatch.setattr(db_utils, 'ORACLE_DSN', 'db1')
+    monkeypatch.setattr(db_utils, 'ORACLE_FAILOVER_DSNS', ['db2'])
+    monkeypatch.setattr(db_utils, '_pools', {})
+    monkeypatch.setattr(db_utils, '_pool_counters', {})
+    monkeypatch.setattr(db_utils, '_dsn_index', 0)
+    return pools, down
+
+
+def test_an_unreachable_primary_fails_over_to_the_next_dsn(failover_dsns):
+    pools, down = failover_dsns
+
+    assert db_utils.acquire_pooled_connection('primary').dsn == 'db2'
+    assert pools[0].closed
+    assert db_utils.acquire_pooled_connection('heavy').dsn == 'db2'
+    assert retry.get_retry_stats()['failovers'] == 1
+
+    # The next failover wraps around to the first DSN
+    down.add('db2')
+    down.discard('db1')
+    assert db_utils.acquire_pooled_connection('primary').dsn == 'db1'
+    assert all(pool.closed for pool in pools[:-1])
+    assert retry.get_retry_stats()['failovers'] == 2
+
+
+def test_only_the_primary_fails_over_and_only_once_per_pool(failover_dsns):
+    stale = FakePool('db1', set())
+    db_utils._pools['primary'] = db_utils._pools['heavy'] = stale
+
+    assert db_utils.fail_over('primary', stale, ora(NO_LISTENER))
+    assert db_utils.fail_over('heavy', stale, ora(NO_LISTENER))
+    assert db_utils._dsn_index == 1
+    assert retry.get_retry_stats()['failovers'] == 1
+
+    assert not db_utils.fail_over('replica', stale, ora(NO_LISTENER))
+    assert not db_utils.fail_over('primary', stale, ora('ORA-00001'))
@@ -0,0 +1,81 @@
+"""The generated serializers give exactly what each model's to_dict() gives."""
+import datetime
+import pytest
+from app import db
+from app.models import Country, Department, Employee, Job, JobGrade, JobHistory, Location, Region, User
+from app.utils.fast_reads import read_all, read_page
+from app.utils.serializers import get_fields, serialize, serialize_all
+
+MODELS = [User, Region, Country, Location, Department, Job, Employee, JobHistory, JobGrade]
+
+
+@pytest.fixture
+def parity_app(app):
+    """The seeded app, plus rows with no related records and empty dates."""
+    with app.app_context():
+        db.session.add_all([
+            User(email='a@example.com', username='a', first_name='A', password='secret',
+                 created_at=datetime.datetime(2024, 5, 6, 7, 8, 9)),
+            Country(COUNTRY_ID='XX', COUNTRY_NAME='Nowhere'),
+            Location(LOCATION_ID=9000, CITY='Nowhere'),
+            Department(DEPARTMENT_ID=90, DEPARTMENT_NAME='Orphans'),
+            Employee(EMPLOYEE_ID=900, FIRST_NAME=None, LAST_NAME='Alone', EMAIL='E900'),
+            JobGrade(GRADE_LEVEL='A', LOWEST_SAL=1000, HIGHEST_SAL=2999)
+        ])
+        db.session.commit()
+        db.session.add(JobHistory(EMPLOYEE_ID=900, START_DATE=datetime.date(2021, 3, 4)))
+        db.session.commit()
+    return app
+
+
+def load(model, eager):
+    query = model.eager_query() if eager and hasattr(model, 'eager_query') else model.query
+    return query.all()
+
+
+def projection(model):
+    """Every other key of the model, asked for in reverse order."""
+    return [field.key for field in get_fields(model)][::-2]
+
+
+@pytest.mark.parametrize('model', MODELS, ids=lambda model: model.__name__)
+@pytest.mark.parametrize('eager', [True, False], ids=['eager', 'lazy'])
+def test_serializer_matches_to_dict(parity_app, model, eager):
+    with parity_app.app_context():
+        objs = load(model, eager)
+        assert objs
+        for obj in objs:
+            expected = obj.to_dict()
+            result = serialize(obj)
+            assert result == expected
+            assert list(result) == list(expected)
+
+            fields = projection(model)
+            projected = serialize(obj, fields)
+            assert projected == {key: expected[key] for key in fields}
+            assert list(projected) == [key for key in expected if key in fields]
+
+        assert serialize_all(objs) == [obj.to_dict() for obj in objs]
+
+
+@pytest.mark.parametrize('model', MODELS, ids=lambda model: model.__name__)
+def test_serializer_reloads_expired_instances(parity_app, model):
+    with parity_app.app_context():
+        objs = model.query.all()
+        expected = [obj.to_dict() for obj in objs]
+        db.session.expire_all()
+        assert serialize_all(objs) == expected
+
+
+@pytest.mark.parametrize('model', MODELS, ids=lambda model: model.__name__)
+def test_row_serializer_matches_to_dict(parity_app, model):
+    with parity_app.app_context():
+        expected = sorted((obj.to_dict() for obj in model.query.all()), key=repr)
+
+        assert sorted(read_all(model), key=repr) == expected
+        assert sorted(read_page(model, 1000), key=repr) == expected
+
+        fields = projection(model)
+        assert sorted(read_all(model, fields), key=repr) == sorted((
+            {key: value for key, value in row.items() if key in fields} for row in expected
+        ), key=repr)
@@ -0,0 +1,137 @@
+"""Region shards: moving rows, routing reads and the shard directory."""
+import pytest
+from sqlalchemy import text
+from app import db
+from app.models import Employee
+from app.utils import sharding
+from app.utils.sharding import CrossShardWriteError, get_shard_stats, init_shards
+from conftest import seed
+
+
+def test_missing_key_is_remembered_for_reads(sharded_client):
+    before = get_shard_stats()['scatters']
+    assert sharded_client.get('/api/employees/999').status_code == 404
+    assert get_shard_stats()['scatters'] == before + 1
+
+    assert sharded_client.get('/api/employees/999').status_code == 404
+    stats = get_shard_stats()
+    assert stats['scatters'] == before + 1
+    assert stats['missing_hits'] == 1
+
+    # Writes look again, in case another process just created the record
+    assert sharded_client.put('/api/employees/999', json={'first_name': 'X'}).status_code == 404
+    assert get_shard_stats()['scatters'] == before + 2
+
+
+def table_keys(app, shard, table, column):
+    with app.app_context():
+        engine = db.engine if shard == 'main' else db.engines[shard]
+        with engine.connect() as connection:
+            return sorted(row[0] for row in connection.execute(text(f'SELECT {column} FROM {table}')))
+
+
+def test_init_shards_moves_each_region_with_its_job_history(sharded_app):
+    assert table_keys(sharded_app, 'main', 'HR_EMPLOYEES', 'EMPLOYEE_ID') == []
+    assert table_keys(sharded_app, 'main', 'HR_JOB_HISTORY', 'EMPLOYEE_ID') == []
+    assert table_keys(sharded_app, 'shard_1', 'HR_EMPLOYEES', 'EMPLOYEE_ID') == [100, 101, 102]
+    assert table_keys(sharded_app, 'shard_1', 'HR_JOB_HISTORY', 'EMPLOYEE_ID') == [101]
+    assert table_keys(sharded_app, 'shard_2', 'HR_DEPARTMENTS', 'DEPARTMENT_ID') == [20]
+    assert table_keys(sharded_app, 'shard_2', 'HR_JOB_HISTORY', 'EMPLOYEE_ID') == [201]
+
+
+def test_init_shards_rejects_cross_region_managers(make_app):
+    app = make_app(sharded=True)
+    seed(app)
+    with app.app_context():
+        db.session.get(Employee, 201).MANAGER_ID = 100
+        db.session.commit()
+        with pytest.raises(CrossShardWriteError, match='employee 201 is managed by employee 100'):
+            init_shards()
+    assert table_keys(app, 'main', 'HR_EMPLOYEES', 'EMPLOYEE_ID') == [100, 101, 102, 200, 201]
+
+
+def fail_on_call(function, failing_call):
+    """Wrap function so its failing_call-th call raises instead."""
+    calls = []
+
+    def wrapper(*args, **kwargs):
+        calls.append(None)
+        if len(calls) == failing_call:
+            raise RuntimeError('simulated failure')
+        return function(*args, **kwargs)
+    return wrapper
+
+
+@pytest.mark.parametrize('step, failing_call', [('copy_region', 2), ('remove_region', 1)])
+def test_failed_init_shards_leaves_no_copies_and_can_be_rerun(make_app, monkeypatch, step, failing_call):
+    app = make_app(sharded=True)
+    seed(app)
+    original = getattr(sharding, step)
+    monkeypatch.setattr(sharding, step, fail_on_call(original, failing_call))
+    with app.app_context():
+        with pytest.raises(RuntimeError, match='simulated failure'):
+            init_shards()
+
+    assert table_keys(app, 'main', 'HR_EMPLOYEES', 'EMPLOYEE_ID') == [100, 101, 102, 200, 201]
+    assert table_keys(app, 'main', 'HR_JOB_HISTORY', 'EMPLOYEE_ID') == [101, 201]
+    for shard in ('shard_1', 'shard_2'):
+        assert table_keys(app, shard, 'HR_EMPLOYEES', 'EMPLOYEE_ID') == []
+        assert table_keys(app, shard, 'HR_DEPARTMENTS', 'DEPARTMENT_ID') == []
+
+    monkeypatch.setattr(sharding, step, original)
+    with app.app_context():
+        init_shards()
+    assert table_keys(app, 'main', 'HR_EMPLOYEES', 'EMPLOYEE_ID') == []
+    assert table_keys(app, 'shard_2', 'HR_EMPLOYEES', 'EMPLOYEE_ID') == [200, 201]
+
+
+def test_reads_span_the_shards(sharded_client):
+    employees = sharded_client.get('/api/employees').json['employees']
+    assert sorted(employee['employee_id'] for employee in employees) == [100, 101, 102, 200, 201]
+
+    histories = sharded_client.get('/api/job-history').json['job_histories']
+    assert [(history['employee_id'], history['employee_name'], history['department_name']) for history in histories] \
+        == [(101, 'F101 L', 'IT'), (201, 'F201 L', 'HR')]
+
+    page = sharded_client.get('/api/job-history?limit=1').json
+    assert [history['employee_id'] for history in page['job_histories']] == [101]
+    page = sharded_client.get(f"/api/job-history?limit=1&after={page['next_cursor']}").json
+    assert [history['employee_id'] for history in page['job_histories']] == [201]
+
+    response = sharded_client.get('/api/job-history/employee/201')
+    assert response.status_code == 200
+    assert response.json['job_histories'][0]['department_name'] == 'HR'
+
+    employee = sharded_client.get('/api/employees/201?include=job_history,manager').json['employee']
+    assert employee['job_history'][0]['department_name'] == 'HR'
+    assert employee['manager']['employee_id'] == 200
+
+
+def test_writes_keep_references_inside_a_region(sharded_client):
+    new_employee = {'first_name': 'N', 'last_name': 'E', 'email': 'NEW', 'job_id': 'IT_PROG', 'department_id': 20}
+    response = sharded_client.post('/api/employees', json={**new_employee, 'manager_id': 100})
+    assert response.status_code == 400
+    assert sharded_client.put('/api/employees/201', json={'manager_id': 100}).status_code == 400
+    assert sharded_client.post('/api/employees', json={**new_employee, 'manager_id': 200}).status_code == 201
+
+    response = sharded_client.post('/api/job-history', json={'employee_id': 201, 'start_date': '2016-01-01',
+                                                             'end_date': '2016-12-31', 'job_id': 'IT_PROG',
+                                                             'department_id': 10})
+    assert response.status_code == 400
+    response = sharded_client.post('/api/job-history', json={'employee_id': 201, 'start_date': '2016-01-01',
+                                                             'end_date': '2016-12-31', 'job_id': 'IT_PROG',
+                                                             'department_id': 20})
+    assert response.status_code == 201
+    assert table_keys(sharded_client.application, 'shard_2', 'HR_JOB_HISTORY', 'EMPLOYEE_ID') == [201, 201]
+
+
+def test_email_is_unique_across_shards(sharded_client):
+    # E101 lives on shard_1; the new employee would go to shard_2
+    new_employee = {'first_name': 'N', 'last_name': 'E', 'job_id': 'IT_PROG', 'department_id': 20}
+    response = sharded_client.post('/api/employees', json={**new_employee, 'email': 'E101'})
+    assert response.status_code == 400
+    assert response.json['message'] == "Email 'E101' is already in use"
+    assert sharded_client.put('/api/employees/201', json={'email': 'E101'}).status_code == 400
+
+    assert sharded_client.put('/api/employees/201', json={'email': 'E201', 'first_name': 'G'}).status_code == 200
+    assert sharded_client.post('/api/employees', json={**new_employee, 'email': 'UNIQUE'}).status_code == 201
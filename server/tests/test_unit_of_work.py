@@ -0,0 +1,27 @@
+"""A request's unit of work is always released, shard by shard."""
+import pytest
+from flask import g
+from app.utils.db_utils import release_unit_of_work
+
+
+class FakeConnection:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.rolled_back = self.closed = False
+
+    def rollback(self):
+        self.rolled_back = True
+        if self.fail:
+            raise RuntimeError('connection lost')
+
+    def close(self):
+        self.closed = True
+
+
+def test_release_rolls_back_and_closes_every_connection(app):
+    connections = {'main': FakeConnection(fail=True), 'shard_1': FakeConnection(), 'shard_2': FakeConnection()}
+    with app.test_request_context():
+        g.db_connections = dict(connections)
+        with pytest.raises(RuntimeError, match='connection lost'):
+            release_unit_of_work()
+    assert all(connection.rolled_back and connection.closed for connection in connections.values())
@@ -0,0 +1,61 @@
+"""Partial updates share one UPDATE text, whichever fields they set."""
+import pytest
+from app.utils import db_utils, group_commit
+from app.utils.queries import get_statement_stats
+
+EMPLOYEE_UPDATES = [
+    {'salary': 5000},
+    {'first_name': 'Ada'},
+    {'email': 'ada@example.com', 'phone_number': '555-0100'},
+    {'job_id': 'IT_PROG', 'manager_id': 100, 'department_id': 10},
+    {'commission_pct': 0.1, 'last_name': 'Lovelace', 'salary': 6000}
+]
+
+
+@pytest.fixture
+def updates(monkeypatch):
+    """The distinct UPDATE texts sent to the database."""
+    texts = set()
+    record_statement = db_utils.record_statement
+
+    def record(sql):
+        for text in [sql] if isinstance(sql, str) else [step[1] if isinstance(step, tuple) else step for step in sql]:
+            if text.lstrip().upper().startswith('UPDATE'):
+                texts.add(text)
+        record_statement(sql)
+
+    monkeypatch.setattr(db_utils, 'record_statement', record)
+    monkeypatch.setattr(group_commit, 'record_statement', record)
+    return texts
+
+
+@pytest.mark.parametrize('url', ['/api/employees/101', '/api/direct/employees/101'])
+@pytest.mark.parametrize('window', [0, 1], ids=['direct', 'group-commit'])
+def test_employee_updates_share_one_statement(client, updates, monkeypatch, url, window):
+    monkeypatch.setattr(group_commit, 'DB_GROUP_COMMIT_WINDOW', window)
+    responses = [client.put(url, json=EMPLOYEE_UPDATES[0])]
+    distinct = get_statement_stats()['distinct_statements']
+
+    responses += [client.put(url, json=body) for body in EMPLOYEE_UPDATES[1:]]
+
+    assert [response.status_code for response in responses] == [200] * len(EMPLOYEE_UPDATES)
+    assert len(updates) == 1
+    assert get_statement_stats()['distinct_statements'] == distinct
+
+    employee = client.get('/api/employees/101').json['employee']
+    assert (employee['first_name'], employee['last_name'], employee['email']) == ('Ada', 'Lovelace', 'ada@example.com')
+    assert (employee['salary'], employee['phone_number'], employee['manager_id']) == (6000, '555-0100', 100)
+
+
+def test_department_updates_share_one_statement(client, updates):
+    for body in ({'department_name': 'Engineering'}, {'manager_id': 100}, {'location_id': 1700, 'manager_id': 101}):
+        assert client.put('/api/departments/10', json=body).status_code == 200
+
+    assert len(updates) == 1
+    department = client.get('/api/departments/10').json['department']
+    assert (department['department_name'], department['manager_id']) == ('Engineering', 101)
+
+
+def test_an_update_without_fields_is_rejected(app):
+    with pytest.raises(ValueError, match='No fields'):
+        db_utils.update_params({'unknown': 1}, db_utils.EMPLOYEE_UPDATE_FIELDS)